@@ -0,0 +1 @@
+"""Load generators and a runner for measuring cache policies; run with `python -m benchmarks`."""
@@ -0,0 +1,47 @@
+import argparse
+import json
+import sys
+
+from benchmarks.runner import run_suite
+from benchmarks.workloads import WORKLOADS
+from custom_cache.cache_enum import EvictionPolicy, WritePolicy
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks',
+                                     description="Throughput, latency and hit ratio of every cache policy.")
+    parser.add_argument('--policies', nargs='+', default=[policy.value for policy in EvictionPolicy],
+                        choices=[policy.value for policy in EvictionPolicy])
+    parser.add_argument('--write-policies', nargs='+', default=[policy.value for policy in WritePolicy],
+                        choices=[policy.value for policy in WritePolicy])
+    parser.add_argument('--workloads', nargs='+', default=['zipf'], choices=sorted(WORKLOADS))
+    parser.add_argument('--threads', nargs='+', type=int, default=[1])
+    parser.add_argument('--storage', choices=['memory', 'file'], default='memory')
+    parser.add_argument('--capacity', type=int, default=1000)
+    parser.add_argument('--keys', type=int, default=10000)
+    parser.add_argument('--operations', type=int, default=100000)
+    parser.add_argument('--read-ratio', type=float, default=0.9)
+    parser.add_argument('--shards', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the JSON report here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run_suite(policies=[EvictionPolicy(policy) for policy in args.policies],
+                       write_policies=[WritePolicy(policy) for policy in args.write_policies],
+                       workloads=args.workloads, thread_counts=args.threads, storage=args.storage,
+                       capacity=args.capacity, key_count=args.keys, operation_count=args.operations,
+                       read_ratio=args.read_ratio, seed=args.seed, shards=args.shards)
+    # sorted keys and one result per line keep reports from different versions diffable
+    text = json.dumps(report, indent=1, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+import contextlib
+import itertools
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.workloads import operations
+from custom_cache.cache_enum import EvictionPolicy, WritePolicy
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.db_config import DATABASE_CONFIG
+from custom_cache.stats import LatencyHistogram
+from custom_cache.storage_service import SqliteService
+
+
+@contextlib.contextmanager
+def sqlite_storage(kind='memory', key_count=0):
+    """A SqliteService pre-loaded with `key_count` keys, in memory or in a temporary file."""
+    with tempfile.TemporaryDirectory() as directory:
+        config = dict(DATABASE_CONFIG['sqlite'])
+        if kind == 'file':
+            config['name'] = os.path.join(directory, 'benchmark.db')
+        elif kind != 'memory':
+            raise ValueError(f"Unsupported storage kind: {kind}")
+        handler = DatabaseFactory.get_database_handler(config=config)
+        # connect() announces itself on stdout, which is reserved for the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            handler.connect()
+        service = SqliteService(handler)
+        service.create_cache_storage_table()
+        service.insert_entries_in_storage([(f'key{key}', f'value{key}') for key in range(key_count)])
+        try:
+            yield service
+        finally:
+            handler.close()
+
+
+def run_benchmark(db_service, eviction_policy, write_policy, workload, capacity, key_count, operation_count,
+                  threads=1, read_ratio=0.9, seed=0, shards=1, **workload_options):
+    cache = CacheFactory.create_cache(eviction_policy, capacity, db_service, write_policy=write_policy,
+                                      refresh_check=30, shards=shards)
+    # one stream dealt round-robin, so all threads share the same hot set, scans and shifts
+    stream = operations(workload, key_count, operation_count, read_ratio, seed, **workload_options)
+    streams = [stream[index::threads] for index in range(threads)]
+    histograms = [LatencyHistogram() for _ in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def replay(stream, histogram):
+        get, put = cache.get, cache.put
+        clock = time.perf_counter_ns
+        barrier.wait()
+        for operation, key in stream:
+            start = clock()
+            if operation == 'get':
+                get(key)
+            else:
+                put(key, key)
+            histogram.record(clock() - start)
+
+    workers = [threading.Thread(target=replay, args=(stream, histogram), daemon=True)
+               for stream, histogram in zip(streams, histograms)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+    cache.close()
+
+    latency = histograms[0]
+    for histogram in histograms[1:]:
+        latency.merge(histogram)
+    stats = cache.stats()
+    return {
+        'policy': eviction_policy.value,
+        'write_policy': write_policy.value,
+        'workload': workload,
+        'threads': threads,
+        'shards': shards,
+        'capacity': capacity,
+        'key_count': key_count,
+        'operations': latency.count,
+        'read_ratio': read_ratio,
+        'ops_per_sec': round(latency.count / elapsed),
+        'mean_us': round(latency.total_ns / latency.count / 1000, 3),
+        'p50_us': latency.percentile(0.5) / 1000,
+        'p99_us': latency.percentile(0.99) / 1000,
+        'hit_ratio': round(stats['hit_ratio'], 4),
+        'loads': stats['loads'],
+        'evictions': stats['evictions'],
+    }
+
+
+def run_suite(policies=tuple(EvictionPolicy), write_policies=tuple(WritePolicy), workloads=('zipf',),
+              thread_counts=(1,), storage='memory', capacity=1000, key_count=10000, operation_count=100000,
+              read_ratio=0.9, seed=0, shards=1):
+    results = []
+    with sqlite_storage(storage, key_count) as db_service:
+        for policy, write_policy, workload, threads in itertools.product(policies, write_policies, workloads,
+                                                                         thread_counts):
+            result = run_benchmark(db_service, policy, write_policy, workload, capacity, key_count,
+                                   operation_count, threads, read_ratio, seed, shards)
+            result['storage'] = storage
+            results.append(result)
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
@@ -0,0 +1,67 @@
+import bisect
+import itertools
+import random
+
+
+def zipf_keys(key_count, seed=0, skew=1.0):
+    """Keys drawn with probability proportional to 1 / rank**skew; rank 0 is the hottest."""
+    rng = random.Random(seed)
+    cumulative = list(itertools.accumulate(1 / (rank + 1) ** skew for rank in range(key_count)))
+    total = cumulative[-1]
+    while True:
+        yield bisect.bisect_left(cumulative, rng.random() * total)
+
+
+def uniform_keys(key_count, seed=0):
+    rng = random.Random(seed)
+    while True:
+        yield rng.randrange(key_count)
+
+
+def scan_keys(key_count, seed=0, skew=1.0, scan_fraction=0.3, scan_length=None):
+    """Zipfian traffic interleaved with sequential scans over the whole keyspace.
+
+    About `scan_fraction` of the keys come from scans of `scan_length` consecutive keys,
+    the pattern a nightly batch job produces.
+    """
+    rng = random.Random(seed)
+    scan_length = scan_length or key_count
+    hot = zipf_keys(key_count, seed, skew)
+    position = rng.randrange(key_count)
+    # chance per Zipfian key of starting a scan, so scans supply scan_fraction of all keys
+    scan_start = scan_fraction / ((1 - scan_fraction) * scan_length)
+    while True:
+        if rng.random() < scan_start:
+            for _ in range(scan_length):
+                yield position
+                position = (position + 1) % key_count
+        else:
+            yield next(hot)
+
+
+def shifting_hotspot_keys(key_count, seed=0, hot_fraction=0.1, hot_probability=0.9, shift_every=10000):
+    """A contiguous hot range that takes `hot_probability` of the traffic and moves every `shift_every` keys."""
+    rng = random.Random(seed)
+    hot_size = max(1, int(key_count * hot_fraction))
+    while True:
+        start = rng.randrange(key_count)
+        for _ in range(shift_every):
+            if rng.random() < hot_probability:
+                yield (start + rng.randrange(hot_size)) % key_count
+            else:
+                yield rng.randrange(key_count)
+
+
+WORKLOADS = {
+    'zipf': zipf_keys,
+    'uniform': uniform_keys,
+    'scan': scan_keys,
+    'hotspot': shifting_hotspot_keys,
+}
+
+
+def operations(workload, key_count, count, read_ratio=0.9, seed=0, **options):
+    """`count` ('get' | 'put', key) pairs; keys are strings so they hash like real cache keys."""
+    rng = random.Random(seed + 1)
+    keys = WORKLOADS[workload](key_count, seed=seed, **options)
+    return [('get' if rng.random() < read_ratio else 'put', f'key{key}') for key in itertools.islice(keys, count)]
@@ -0,0 +1,161 @@
+import logging
+import time
+from collections import OrderedDict
+
+from custom_cache.cache import Cache, MISSING
+from custom_cache.cache_enum import EvictionCause
+from custom_cache.entry import now_ms
+from custom_cache.exceptions import *
+
+
+class ARCCache(Cache):
+    """Adaptive Replacement Cache (Megiddo and Modha).
+
+    Resident keys are split between t1 (seen once recently) and t2 (seen at least twice). Keys
+    evicted from either list are remembered in the ghost lists b1 and b2, and a miss that lands
+    in a ghost list shifts the target size `p` of t1 towards whichever list would have kept it.
+    A one-off scan only ever churns t1, so the frequently used keys in t2 survive it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.t1 = OrderedDict()
+        self.t2 = OrderedDict()
+        self.b1 = OrderedDict()
+        self.b2 = OrderedDict()
+        self.p = 0
+        self.write_policy_obj = self._create_write_policy()
+
+        if not self.refresh_check:
+            raise ValueError("Please provide a valid value for refresh_check.")
+
+        self._start_refresh_task()
+
+        logging.info("ARC Cache created.")
+
+    def put(self, key, value, ttl=None):
+        try:
+            self.negative_cache.discard(key)
+            self.write_policy_obj.reserve([key])
+            with self.lock:
+                self._set_ttl(key, ttl)
+                self._insert(key, value)
+
+                commit = self.write_policy_obj.write(key, value)
+            if commit is not None:
+                commit.wait()
+
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while writing to the cache: {key}-{value}. Error: {e}")
+
+    def get(self, key):
+        try:
+            with self.lock:
+                value = self._lookup(key, time.time() * 1000)
+            if value is not MISSING:
+                return value
+
+            result = self._load(key)
+            if result:
+                with self.lock:
+                    result = self._fill(key, result)
+            return result
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while getting key from cache: {key}. Error: {e}")
+
+    def remove(self, key):
+        try:
+            with self.lock:
+                if key in self.cache:
+                    value = self._remove_entry(key, EvictionCause.EXPLICIT).value
+                    self.write_policy_obj.evict(key, value)
+                else:
+                    raise KeyNotFoundException(f"Key '{key}' not found in cache.")
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while removing key from cache: {key}. Error: {e}")
+
+    def _target_size(self):
+        # weight-only caches have no fixed slot count, so ghosts are bounded by the resident set
+        return self.capacity if self.capacity is not None else max(len(self.cache), 1)
+
+    def _insert(self, key, value):
+        if key in self.cache:
+            self._touch(key)
+        else:
+            # only a count-bounded cache makes room up front; weight is enforced after the store
+            full = self.capacity is not None and len(self.cache) >= self.capacity
+            if key in self.b1:
+                self.p = min(self._target_size(), self.p + max(1, len(self.b2) // len(self.b1)))
+                del self.b1[key]
+                if full:
+                    self._replace(in_b2=False)
+                self.t2[key] = None
+            elif key in self.b2:
+                self.p = max(0, self.p - max(1, len(self.b1) // len(self.b2)))
+                del self.b2[key]
+                if full:
+                    self._replace(in_b2=True)
+                self.t2[key] = None
+            else:
+                if full and not self.b1 and len(self.t1) >= self.capacity:
+                    # t1 alone fills the cache: drop its oldest key without remembering it
+                    self._evict_from(self.t1, None)
+                elif full:
+                    self._replace(in_b2=False)
+                self.t1[key] = None
+        self._store_entry(key, value, now_ms())
+        while self._over_capacity() and self.cache:
+            self._evict()
+
+    def _replace(self, in_b2):
+        if self.t1 and (len(self.t1) > self.p or (in_b2 and len(self.t1) == self.p) or not self.t2):
+            self._evict_from(self.t1, self.b1)
+        elif self.t2:
+            self._evict_from(self.t2, self.b2)
+
+    def _touch(self, key):
+        if key in self.t1:
+            del self.t1[key]
+            self.t2[key] = None
+        else:
+            self.t2.move_to_end(key)
+
+    def _evict(self):
+        self._replace(in_b2=False)
+
+    def _evict_from(self, resident, ghosts):
+        try:
+            key = next(iter(resident))
+            value = self._remove_entry(key, EvictionCause.SIZE).value
+
+            self.write_policy_obj.evict(key, value)
+
+            if ghosts is not None:
+                ghosts[key] = None
+                size = self._target_size()
+                while len(self.b1) + len(self.b2) > size:
+                    (self.b1 if len(self.b1) > len(self.b2) else self.b2).popitem(last=False)
+
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while evicting key from cache. Error: {e}")
+
+    def _discard(self, key):
+        self.t1.pop(key, None)
+        self.t2.pop(key, None)
+
+    def _snapshot_order(self):
+        yield from ((key, 1, 0) for key in self.t1)
+        yield from ((key, 2, 0) for key in self.t2)
+
+    def _snapshot_state(self):
+        return {'p': self.p, 'b1': list(self.b1), 'b2': list(self.b2)}
+
+    def _restore_position(self, key, segment, count):
+        (self.t2 if segment == 2 else self.t1)[key] = None
+
+    def _restore_state(self, state):
+        size = self._target_size()
+        self.p = min(state['p'], size)
+        # a ghost must not shadow a key that is already resident
+        self.b1 = OrderedDict.fromkeys(key for key in state['b1'][-size:] if key not in self.cache)
+        self.b2 = OrderedDict.fromkeys(key for key in state['b2'][-size:] if key not in self.cache)
@@ -0,0 +1,107 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from custom_cache.exceptions import *
+from custom_cache.memoize import memoize, memoize_many
+from custom_cache.single_flight import AsyncSingleFlight
+
+
+class AsyncCache:
+    """asyncio front end over any Cache policy.
+
+    Hits are served inline: the policy lock is never held across an await, and write-through
+    puts write to the store after releasing it. A write-back cache still writes a dirty key it
+    evicts under the lock, so hits can wait for that write. Storage reads and writes run on a
+    dedicated executor so the event loop is not blocked, and concurrent misses on a key share
+    one read through AsyncSingleFlight.
+    """
+
+    def __init__(self, cache, executor=None, max_workers=4):
+        self.cache = cache
+        self.owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cache-storage")
+        self.loader = AsyncSingleFlight()
+
+        logging.info("Async Cache created.")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def get(self, key):
+        try:
+            results, missing = self.cache._get_cached_many([key])
+            if not missing:
+                return results[key]
+            if self.cache._known_absent(key):
+                return None
+
+            generations, value = await self.loader.do(key, partial(self._run, self.cache._read_tracked, key))
+            self.cache._record_absent([key], {key: value}, generations)
+            if value:
+                return self.cache._fill_many({key: value})[key]
+            return value
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while getting key from cache: {key}. Error: {e}")
+
+    async def get_many(self, keys) -> dict:
+        try:
+            results, missing = self.cache._get_cached_many(keys)
+            missing = self.cache._filter_absent(missing)
+            if missing:
+                generations = self.cache._absent_generations(missing)
+                loaded = await self._run(self.cache._read_many_from_store, missing)
+                self.cache._record_absent(missing, loaded, generations)
+                results.update(self.cache._fill_many(loaded))
+            return results
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while getting keys from cache. Error: {e}")
+
+    async def put(self, key, value, ttl=None):
+        # write policies may hit storage or block on write-back backpressure
+        await self._run(self.cache.put, key, value, ttl)
+
+    async def put_many(self, items, ttl=None):
+        await self._run(self.cache.put_many, items, ttl)
+
+    async def remove(self, key):
+        await self._run(self.cache.remove, key)
+
+    async def remove_many(self, keys):
+        return await self._run(self.cache.remove_many, keys)
+
+    def stats(self):
+        return self.cache.stats()
+
+    async def flush(self):
+        await self._run(self.cache.flush)
+
+    async def preload(self, prefix=None, start=None, stop=None, page_size=1000):
+        return await self._run(self.cache.preload, prefix, start, stop, page_size)
+
+    def memoize(self, ttl=None, key=None, persist=False):
+        # persisted results are read and written on this cache's executor
+        return memoize(self.cache, ttl, key, persist, self.executor)
+
+    def memoize_many(self, ttl=None, key=None, persist=False):
+        return memoize_many(self.cache, ttl, key, persist, self.executor)
+
+    async def save_snapshot(self, path, flush=False):
+        return await self._run(self.cache.save_snapshot, path, flush)
+
+    async def load_snapshot(self, path):
+        return await self._run(self.cache.load_snapshot, path)
+
+    async def close(self):
+        try:
+            await self._run(self.cache.close)
+        finally:
+            if self.owns_executor:
+                self.executor.shutdown(wait=False)
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, partial(func, *args))
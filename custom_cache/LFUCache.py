@@ -1,17 +1,104 @@
-import asyncio
 import logging
 import time
-from collections import defaultdict
-from custom_cache.cache import Cache
+from collections import OrderedDict
+from custom_cache.cache import Cache, MISSING
+from custom_cache.cache_enum import EvictionCause
+from custom_cache.entry import now_ms
 from custom_cache.exceptions import *
-from custom_cache.write_policies import WritePolicyFactory
+
+
+class _FrequencyNode:
+    __slots__ = ('frequency', 'keys', 'prev', 'next')
+
+    def __init__(self, frequency):
+        self.frequency = frequency
+        # keys sharing this frequency, least recently used first
+        self.keys = OrderedDict()
+        self.prev = self
+        self.next = self
+
+
+class FrequencyList:
+    """Doubly linked list of frequency buckets giving O(1) increment, removal and LFU lookup."""
+
+    def __init__(self):
+        self.head = _FrequencyNode(0)
+        self.nodes = {}
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, key):
+        return key in self.nodes
+
+    def frequency(self, key):
+        return self.nodes[key].frequency
+
+    def add(self, key, frequency=1):
+        # snapshot restores add keys in ascending frequency, so try the tail before walking
+        tail = self.head.prev
+        if tail is not self.head and tail.frequency <= frequency:
+            prev, node = tail, tail if tail.frequency == frequency else self.head
+        else:
+            node = self.head.next
+            prev = self.head
+            while node is not self.head and node.frequency < frequency:
+                prev, node = node, node.next
+        if node is self.head or node.frequency != frequency:
+            node = self._insert_after(prev, frequency)
+        node.keys[key] = None
+        self.nodes[key] = node
+
+    def increment(self, key):
+        node = self.nodes[key]
+        target = node.next
+        if target is self.head or target.frequency != node.frequency + 1:
+            target = self._insert_after(node, node.frequency + 1)
+        target.keys[key] = None
+        self.nodes[key] = target
+        del node.keys[key]
+        if not node.keys:
+            self._unlink(node)
+
+    def remove(self, key):
+        node = self.nodes.pop(key)
+        del node.keys[key]
+        if not node.keys:
+            self._unlink(node)
+
+    def items(self):
+        # (key, frequency) from least to most frequent, least recently used first within a frequency
+        node = self.head.next
+        while node is not self.head:
+            for key in node.keys:
+                yield key, node.frequency
+            node = node.next
+
+    def least_frequent(self):
+        node = self.head.next
+        if node is self.head:
+            return None
+        return next(iter(node.keys))
+
+    def _insert_after(self, node, frequency):
+        new_node = _FrequencyNode(frequency)
+        new_node.prev = node
+        new_node.next = node.next
+        node.next.prev = new_node
+        node.next = new_node
+        return new_node
+
+    @staticmethod
+    def _unlink(node):
+        node.prev.next = node.next
+        node.next.prev = node.prev
 
 
 class LFUCache(Cache):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.frequency = defaultdict(int)
-        self.write_policy_obj = WritePolicyFactory.get_write_policy(self.write_policy, self._write_to_store)
+        self.frequency = FrequencyList()
+        self.write_policy_obj = self._create_write_policy()
 
         if not self.refresh_check:
             raise ValueError("Please provide a valid value for refresh_check.")
@@ -20,16 +107,18 @@ class LFUCache(Cache):
 
         logging.info("LFU Cache created.")
 
-    def put(self, key, value):
+    def put(self, key, value, ttl=None):
         try:
+            self.negative_cache.discard(key)
+            self.write_policy_obj.reserve([key])
             with self.lock:
-                self.frequency[key] += 1
-                self.cache[key] = (value, time.time())
-                if len(self.cache) > self.capacity:
-                    self._evict()
+                self._set_ttl(key, ttl)
+                self._insert(key, value)
 
                 # Delegate writing operation to the write policy object
-                self.write_policy_obj.write(key, value)
+                commit = self.write_policy_obj.write(key, value)
+            if commit is not None:
+                commit.wait()
 
         except Exception as e:
             raise CacheException(f"An unexpected error occurred while writing to the cache: {key}-{value}. Error: {e}")
@@ -37,17 +126,14 @@ class LFUCache(Cache):
     def get(self, key):
         try:
             with self.lock:
-                if key in self.cache:
-                    self.frequency[key] += 1
-                    return self.cache[key][0]
-                raise CacheMissException(f"Key '{key}' not found in cache.")
-        except CacheMissException as e:
-            logging.info(e)
-            result = self.db_service.get_entry_from_storage(key)
+                value = self._lookup(key, time.time() * 1000)
+            if value is not MISSING:
+                return value
+
+            result = self._load(key)
             if result:
-                self.cache[key] = (result, time.time())
-                if len(self.cache) > self.capacity:
-                    self._evict()
+                with self.lock:
+                    result = self._fill(key, result)
             return result
         except Exception as e:
             raise CacheException(f"An unexpected error occurred while getting key from cache: {key}. Error: {e}")
@@ -56,88 +142,46 @@ class LFUCache(Cache):
         try:
             with self.lock:
                 if key in self.cache:
-                    del self.cache[key]
-                    del self.frequency[key]
+                    value = self._remove_entry(key, EvictionCause.EXPLICIT).value
+                    self.write_policy_obj.evict(key, value)
                 else:
                     raise KeyNotFoundException(f"Key '{key}' not found in cache.")
         except Exception as e:
             raise CacheException(f"An unexpected error occurred while removing key from cache: {key}. Error: {e}")
 
+    def _insert(self, key, value):
+        if key in self.cache:
+            self.frequency.increment(key)
+        else:
+            # Make room before inserting so the new key is never its own victim
+            if self.capacity is not None and len(self.cache) >= self.capacity:
+                self._evict()
+            self.frequency.add(key)
+        self._store_entry(key, value, now_ms())
+        while self._over_capacity() and self.cache:
+            self._evict()
+
+    def _touch(self, key):
+        self.frequency.increment(key)
+
     def _evict(self):
         try:
-            least_frequent = min(self.frequency, key=self.frequency.get)
-            evicted_item = self.cache.pop(least_frequent)
-            del self.frequency[least_frequent]
-            logging.info(f"Evicted item: {least_frequent} -> {evicted_item}")
+            least_frequent = self.frequency.least_frequent()
+            if least_frequent is None:
+                return
+            evicted_item = self._remove_entry(least_frequent, EvictionCause.SIZE)
 
             # If using WRITE_BACK, write dirty entries to the store before eviction
-            self.write_policy_obj.evict(least_frequent, evicted_item)
+            self.write_policy_obj.evict(least_frequent, evicted_item.value)
 
         except Exception as e:
             raise CacheException(f"An unexpected error occurred while evicting key from cache. Error: {e}")
 
-    async def _refresh(self):
-        try:
-            while True:
-                await asyncio.sleep(self.refresh_check)
-                self._refresh_cache()
-        except Exception as e:
-            raise CacheException(f"An unexpected error occurred while refreshing the cache. Error: {e}")
-
-    async def _expire(self):
-        try:
-            while True:
-                await asyncio.sleep(self.refresh_check)
-                self._evict_expired_entries()
-        except Exception as e:
-            raise CacheException(f"An unexpected error occurred while evicting expired entries from cache. Error: {e}")
-
-    def _refresh_cache(self):
-        try:
-            with self.lock:
-                now = time.time()
-                expired_keys = [key for key, (_, timestamp) in self.cache.items() if now - timestamp > self.refresh_interval]
-
-                for key in expired_keys:
-                    fresh_value = self.db_service.get_entry_from_storage(key)
-                    if fresh_value:
-                        logging.info(f"Refreshing key '{key}' with new value from store.")
-                        self.cache[key] = (fresh_value, time.time())
-                    else:
-                        logging.info(f"Skipping refresh of key '{key}' in cache.")
-        except Exception as e:
-            raise CacheException(f"An unexpected error occurred while refreshing cache. Error: {e}")
-
-    def _evict_expired_entries(self):
-        try:
-            with self.lock:
-                now = time.time()
-                expired_keys = [key for key, (_, timestamp) in self.cache.items() if now - timestamp > self.ttl]
-                for key in expired_keys:
-                    logging.info(f"Evicting expired key: {key}")
-                    del self.cache[key]
-        except Exception as e:
-            raise CacheException(f"An unexpected error occurred while evicting expired entries from cache. Error: {e}")
+    def _discard(self, key):
+        self.frequency.remove(key)
 
-    def _write_to_store(self, key, value):
-        try:
-            self.db_service.insert_entry_in_storage(key, value)
-        except Exception as e:
-            raise CacheException(f"An error occurred while writing key '{key}' to the store. Error: {e}")
+    def _snapshot_order(self):
+        return ((key, 0, frequency) for key, frequency in self.frequency.items())
 
-    def _start_refresh_task(self):
-        try:
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                logging.warning("No event loop found; creating a new one.")
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-
-            if self.refresh_interval:
-                loop.create_task(self._refresh())
-            if self.ttl:
-                loop.create_task(self._expire())
-        except Exception as e:
-            logging.error(f"Unexpected error in starting refresh task: {e}")
-            raise
+    def _restore_position(self, key, segment, count):
+        self.frequency.add(key, max(count, 1))
@@ -0,0 +1,167 @@
+import logging
+from collections import defaultdict
+
+from custom_cache.cache import Cache
+from custom_cache.exceptions import *
+from custom_cache.stats import CacheStats
+
+
+class ShardedCache(Cache):
+    """Spreads keys over independent policy caches, each guarded by its own lock.
+
+    Capacity and max_weight are split across the shards; write-back thresholds apply to each
+    shard separately.
+    """
+
+    def __init__(self, shard_class, shard_count, capacity, db_service, *args, max_weight=None,
+                 latency_histograms=False, **kwargs):
+        # operations are timed inside the shards, so the router itself never wraps them
+        super().__init__(capacity, db_service, *args, max_weight=max_weight, **kwargs)
+        if shard_count < 1:
+            raise ValueError("Please provide a valid value for shard_count.")
+        if capacity is not None and capacity < shard_count:
+            raise ValueError("Capacity must be at least the number of shards.")
+
+        self.shard_count = shard_count
+        shard_weight = max_weight / shard_count if max_weight is not None else None
+        self.shards = [shard_class(shard_capacity, db_service, *args, max_weight=shard_weight,
+                                   latency_histograms=latency_histograms, **kwargs)
+                       for shard_capacity in self._split_capacity(capacity, shard_count)]
+
+        logging.info(f"Sharded Cache created with {shard_count} shards.")
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    @property
+    def weight(self):
+        return sum(shard.weight for shard in self.shards)
+
+    @staticmethod
+    def _split_capacity(capacity, shard_count):
+        if capacity is None:
+            return [None] * shard_count
+        base_capacity, remainder = divmod(capacity, shard_count)
+        return [base_capacity + (1 if index < remainder else 0) for index in range(shard_count)]
+
+    def shard_for(self, key):
+        return self.shards[hash(key) % self.shard_count]
+
+    def put(self, key, value, ttl=None):
+        self.shard_for(key).put(key, value, ttl)
+
+    def get(self, key):
+        return self.shard_for(key).get(key)
+
+    def remove(self, key):
+        self.shard_for(key).remove(key)
+
+    def put_many(self, items, ttl=None):
+        items = items.items() if isinstance(items, dict) else items
+        grouped = defaultdict(list)
+        for key, value in items:
+            grouped[self.shard_for(key)].append((key, value))
+        for shard, shard_items in grouped.items():
+            shard.put_many(shard_items, ttl)
+
+    def remove_many(self, keys):
+        removed = []
+        for shard, shard_keys in self._group_by_shard(keys).items():
+            removed.extend(shard.remove_many(shard_keys))
+        return removed
+
+    def flush(self):
+        for shard in self.shards:
+            shard.flush()
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+
+    def stats(self):
+        sizes = [len(shard) for shard in self.shards]
+        # misses resolved by get_many are loaded through the router, so its own loads count too
+        snapshot = CacheStats.combine([self.metrics] + [shard.metrics for shard in self.shards]).snapshot()
+        snapshot.update({
+            'shards': self.shard_count,
+            'size': sum(sizes),
+            'capacity': self.capacity,
+            'shard_sizes': sizes,
+            'weight': self.weight,
+            'max_weight': self.max_weight,
+            'dirty': sum(shard.write_policy_obj.pending for shard in self.shards),
+        })
+        return snapshot
+
+    def _collect_snapshot(self):
+        records = []
+        for shard in self.shards:
+            header, shard_records = shard._collect_snapshot()
+            records.extend(shard_records)
+        # hash() and so the shard of a key changes between processes, so per-shard state is not kept
+        return {'policy': header['policy'], 'state': None}, records
+
+    def _restore_snapshot(self, header, batches):
+        header = dict(header, state=None)
+        restored = 0
+        for batch in batches:
+            grouped = defaultdict(list)
+            for record in batch:
+                grouped[self.shard_for(record[0])].append(record)
+            for shard, records in grouped.items():
+                restored += shard._restore_snapshot(header, [records])
+        return restored
+
+    def _preload_page(self, items):
+        grouped = defaultdict(list)
+        for key, value in items:
+            grouped[self.shard_for(key)].append((key, value))
+        added = sum(shard._preload_page(shard_items)[0] for shard, shard_items in grouped.items())
+        # keep streaming until every shard is full, as keys hash to shards unevenly
+        return added, all(shard._is_full() for shard in self.shards)
+
+    def _get_cached_many(self, keys):
+        results = {}
+        missing = []
+        for shard, shard_keys in self._group_by_shard(keys).items():
+            cached, shard_missing = shard._get_cached_many(shard_keys)
+            results.update(cached)
+            missing.extend(shard_missing)
+        # Cache.get_many resolves the misses of every shard with one storage round trip
+        return results, missing
+
+    def _fill_many(self, loaded: dict) -> dict:
+        filled = {}
+        for shard, shard_keys in self._group_by_shard(loaded).items():
+            filled.update(shard._fill_many({key: loaded[key] for key in shard_keys}))
+        return filled
+
+    def _known_absent(self, key):
+        return self.shard_for(key)._known_absent(key)
+
+    def _key_ttl_ms(self, key):
+        return self.shard_for(key)._key_ttl_ms(key)
+
+    def _absent_generations(self, keys) -> dict:
+        generations = {}
+        for shard, shard_keys in self._group_by_shard(keys).items():
+            generations.update(shard._absent_generations(shard_keys))
+        return generations
+
+    def _record_absent(self, keys, loaded: dict, generations: dict):
+        for shard, shard_keys in self._group_by_shard(keys).items():
+            shard._record_absent(shard_keys, loaded, generations)
+
+    def _group_by_shard(self, keys):
+        grouped = defaultdict(list)
+        for key in dict.fromkeys(keys):
+            grouped[self.shard_for(key)].append(key)
+        return grouped
+
+    def _refresh_cache(self):
+        for shard in self.shards:
+            shard._refresh_cache()
+
+    def _evict_expired_entries(self):
+        for shard in self.shards:
+            shard._evict_expired_entries()
@@ -0,0 +1,312 @@
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+from contextlib import contextmanager
+
+from custom_cache.cache import Cache, MISSING
+from custom_cache.cache_enum import EvictionCause, WritePolicy
+from custom_cache.entry import now_ms
+from custom_cache.exceptions import *
+
+
+class SharedMemoryCache(Cache):
+    """LRU cache in a memory-mapped file that every process on a host can attach to by name.
+
+    The file is a set-associative hash table of fixed-size slots. A key hashes with crc32, so
+    every process agrees on its set, and a full set evicts the slot that was read or written
+    longest ago, which approximates LRU. Sets are guarded by striped fcntl byte-range locks on
+    the same file, taken under the usual per-process lock; the kernel drops them if a process
+    dies. Values are bytes or str and must fit in a slot with their key: larger ones still go
+    to the store but are not cached. The ttl is checked on read and when choosing a victim.
+    The table outlives its processes, so a restarted worker attaches to a warm cache, until
+    unlink() removes it.
+    """
+
+    MAGIC = b'CCSHMEM1'
+    # magic, slot size, set count, ways
+    HEADER = struct.Struct('<8sIII')
+    HEADER_SIZE = 64
+    # used, value kind, key length, value length, key hash, written at (ms), last access (monotonic ns)
+    SLOT = struct.Struct('<BBHIIqQ')
+    ACCESS = struct.Struct('<Q')
+    ACCESS_OFFSET = SLOT.size - ACCESS.size
+    LOCK_STRIPES = 64
+    BYTES, TEXT = 0, 1
+
+    def __init__(self, capacity, db_service, ttl=None, write_policy=WritePolicy.WRITE_THROUGH,
+                 refresh_interval=None, refresh_check=None, name='custom_cache', path=None, slot_size=256, ways=8,
+                 **kwargs):
+        super().__init__(capacity, db_service, ttl, write_policy, refresh_interval, refresh_check, **kwargs)
+        if not capacity or self.max_weight is not None or self.value_codec is not None:
+            raise ValueError("The shared-memory backend needs a capacity and does not support max_weight or "
+                             "value_codec.")
+        if refresh_interval or self.load_ttl is not None or self.jitter:
+            raise ValueError("refresh_interval, load_ttl and jitter are not supported by the shared-memory backend.")
+        if slot_size <= self.SLOT.size or ways < 1:
+            raise ValueError("Please provide valid values for slot_size and ways.")
+
+        self.slot_size = slot_size
+        self.ways = ways
+        self.set_count = -(-capacity // ways)
+        self.stripes = min(self.set_count, self.LOCK_STRIPES)
+        # one 8-byte resident count per lock stripe follows the header
+        self.data_offset = self.HEADER_SIZE + 8 * self.stripes
+        size = self.data_offset + self.set_count * ways * slot_size
+        directory = '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir()
+        self.path = path or os.path.join(directory, f'{name}.cache')
+
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            self._attach(size)
+            self.memory = mmap.mmap(self.fd, size)
+        except Exception:
+            os.close(self.fd)
+            raise
+        self.write_policy_obj = self._create_write_policy()
+
+        logging.info(f"Shared-memory Cache attached at {self.path}.")
+
+    def put(self, key, value, ttl=None):
+        try:
+            self.negative_cache.discard(key)
+            self.write_policy_obj.reserve([key])
+            with self.lock:
+                self._set_ttl(key, ttl)
+                self._insert(key, value)
+
+                commit = self.write_policy_obj.write(key, value)
+            if commit is not None:
+                commit.wait()
+
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while writing to the cache: {key}-{value}. Error: {e}")
+
+    def get(self, key):
+        try:
+            with self.lock:
+                value = self._lookup(key, time.time() * 1000)
+            if value is not MISSING:
+                return value
+
+            result = self._load(key)
+            if result:
+                with self.lock:
+                    result = self._fill(key, result)
+            return result
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while getting key from cache: {key}. Error: {e}")
+
+    def remove(self, key):
+        try:
+            with self.lock:
+                value = self._pop(key)
+                if value is MISSING:
+                    raise KeyNotFoundException(f"Key '{key}' not found in cache.")
+
+                self.write_policy_obj.evict(key, value)
+
+        except KeyNotFoundException as e:
+            logging.warning(e)
+
+    def remove_many(self, keys):
+        try:
+            with self.lock:
+                removed = []
+                for key in dict.fromkeys(keys):
+                    value = self._pop(key)
+                    if value is not MISSING:
+                        removed.append((key, value))
+
+                self.write_policy_obj.evict_many(removed)
+                return [key for key, _ in removed]
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while removing keys from cache. Error: {e}")
+
+    def __len__(self):
+        return sum(struct.unpack_from(f'<{self.stripes}Q', self.memory, self.HEADER_SIZE))
+
+    def close(self):
+        try:
+            super().close()
+        finally:
+            if not self.memory.closed:
+                self.memory.close()
+                os.close(self.fd)
+
+    def unlink(self):
+        # the table is shared, so only remove it once no process needs it any more
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def _preload_page(self, items):
+        # a full set evicts, so the table may never reach its capacity and the page is simply filled;
+        # keys another process holds keep their value
+        before = len(self)
+        with self.lock:
+            for key, value in items:
+                if value:
+                    self._fill(key, value)
+        after = len(self)
+        return max(after - before, 0), after >= self.capacity
+
+    def _set_ttl(self, key, ttl):
+        # a slot only records when it was written, so every key shares the cache's ttl
+        if ttl is not None:
+            raise ValueError("Per-key ttl is not supported by the shared-memory backend.")
+
+    def _attach(self, size):
+        header = self.HEADER.pack(self.MAGIC, self.slot_size, self.set_count, self.ways)
+        # lock byte 0 serialises creation; stripe locks start at byte 1
+        with self._file_lock(0):
+            if os.fstat(self.fd).st_size == 0:
+                os.ftruncate(self.fd, size)
+                os.pwrite(self.fd, header, 0)
+            elif os.pread(self.fd, self.HEADER.size, 0) != header:
+                raise ValueError(f"{self.path} holds a cache with a different layout.")
+
+    @contextmanager
+    def _file_lock(self, index):
+        # fcntl locks belong to the process, so threads are kept apart by self.lock as usual
+        fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, index)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, index)
+
+    def _locate(self, key):
+        encoded = key.encode()
+        key_hash = zlib.crc32(encoded)
+        return encoded, key_hash, key_hash % self.set_count
+
+    def _find(self, encoded, key_hash, set_index):
+        memory = self.memory
+        start = self.data_offset + set_index * self.ways * self.slot_size
+        for offset in range(start, start + self.ways * self.slot_size, self.slot_size):
+            used, _, key_length, _, slot_hash, _, _ = self.SLOT.unpack_from(memory, offset)
+            if used and slot_hash == key_hash:
+                key_start = offset + self.SLOT.size
+                if memory[key_start:key_start + key_length] == encoded:
+                    return offset
+        return None
+
+    def _read(self, offset):
+        _, kind, key_length, value_length, _, written, _ = self.SLOT.unpack_from(self.memory, offset)
+        value_start = offset + self.SLOT.size + key_length
+        value = self.memory[value_start:value_start + value_length]
+        return (value.decode() if kind == self.TEXT else value), written
+
+    def _read_key(self, offset):
+        key_length = self.SLOT.unpack_from(self.memory, offset)[2]
+        key_start = offset + self.SLOT.size
+        return self.memory[key_start:key_start + key_length].decode()
+
+    def _encode_value(self, value):
+        if isinstance(value, bytes):
+            return self.BYTES, value
+        if isinstance(value, str):
+            return self.TEXT, value.encode()
+        raise InvalidValueException(f"The shared-memory backend stores bytes or str values, not {type(value).__name__}.")
+
+    def _lookup(self, key, now):
+        encoded, key_hash, set_index = self._locate(key)
+        # the hit path locks inline: a generator context manager costs as much as the lookup
+        stripe = 1 + set_index % self.stripes
+        fcntl.lockf(self.fd, fcntl.LOCK_EX, 1, stripe)
+        try:
+            offset = self._find(encoded, key_hash, set_index)
+            if offset is None:
+                self.metrics.misses += 1
+                return MISSING
+            value, written = self._read(offset)
+            if self.ttl_ms and written + self.ttl_ms <= now:
+                self._clear(offset, set_index, EvictionCause.TTL)
+                self.metrics.misses += 1
+                return MISSING
+            self.ACCESS.pack_into(self.memory, offset + self.ACCESS_OFFSET, time.monotonic_ns())
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, stripe)
+        self.metrics.hits += 1
+        return value
+
+    def _insert(self, key, value):
+        kind, data = self._encode_value(value)
+        encoded, key_hash, set_index = self._locate(key)
+        with self._file_lock(1 + set_index % self.stripes):
+            self._store(encoded, key_hash, set_index, kind, data)
+
+    def _fill(self, key, value):
+        # a value written by any process while the load was in flight wins
+        kind, data = self._encode_value(value)
+        encoded, key_hash, set_index = self._locate(key)
+        with self._file_lock(1 + set_index % self.stripes):
+            offset = self._find(encoded, key_hash, set_index)
+            if offset is not None:
+                return self._read(offset)[0]
+            self._store(encoded, key_hash, set_index, kind, data)
+        return value
+
+    def _pop(self, key):
+        encoded, key_hash, set_index = self._locate(key)
+        with self._file_lock(1 + set_index % self.stripes):
+            offset = self._find(encoded, key_hash, set_index)
+            if offset is None:
+                return MISSING
+            value = self._read(offset)[0]
+            self._clear(offset, set_index, EvictionCause.EXPLICIT)
+        return value
+
+    def _store(self, encoded, key_hash, set_index, kind, data):
+        # called with the set's stripe lock held
+        offset = self._find(encoded, key_hash, set_index)
+        if self.SLOT.size + len(encoded) + len(data) > self.slot_size:
+            # too large for a slot: the store still gets the write, but a stale copy must not stay behind
+            if offset is not None:
+                self._clear(offset, set_index, EvictionCause.SIZE)
+            return
+        if offset is None:
+            offset = self._claim(set_index)
+        self.SLOT.pack_into(self.memory, offset, 1, kind, len(encoded), len(data), key_hash, now_ms(),
+                            time.monotonic_ns())
+        key_start = offset + self.SLOT.size
+        self.memory[key_start:key_start + len(encoded) + len(data)] = encoded + data
+
+    def _claim(self, set_index):
+        # a free slot, else an expired one, else the slot accessed longest ago
+        memory = self.memory
+        start = self.data_offset + set_index * self.ways * self.slot_size
+        victim = victim_access = None
+        expired_before = now_ms() - self.ttl_ms if self.ttl_ms else None
+        for offset in range(start, start + self.ways * self.slot_size, self.slot_size):
+            used, _, _, _, _, written, accessed = self.SLOT.unpack_from(memory, offset)
+            if not used:
+                self._count(set_index, 1)
+                return offset
+            if expired_before is not None and written <= expired_before:
+                self._clear(offset, set_index, EvictionCause.TTL)
+                self._count(set_index, 1)
+                return offset
+            if victim is None or accessed < victim_access:
+                victim, victim_access = offset, accessed
+
+        key = self._read_key(victim)
+        if self.write_policy_obj.is_dirty(key):
+            self.write_policy_obj.evict(key, self._read(victim)[0])
+        self.metrics.evictions[EvictionCause.SIZE] += 1
+        return victim
+
+    def _clear(self, offset, set_index, cause):
+        self.memory[offset] = 0
+        self._count(set_index, -1)
+        self.metrics.evictions[cause] += 1
+
+    def _count(self, set_index, delta):
+        offset = self.HEADER_SIZE + 8 * (set_index % self.stripes)
+        count, = struct.unpack_from('<Q', self.memory, offset)
+        struct.pack_into('<Q', self.memory, offset, count + delta)
@@ -0,0 +1,232 @@
+import logging
+import threading
+from contextlib import contextmanager
+
+from custom_cache.cache import Cache, MISSING
+from custom_cache.cache_enum import EvictionCause
+from custom_cache.disk_tier import DiskTier
+from custom_cache.entry import now_ms
+from custom_cache.exceptions import *
+from custom_cache.ShardedCache import ShardedCache
+from custom_cache.storage_service import StorageService
+
+
+class TieredStorage(StorageService):
+    """The store as an L1 sees it: the DiskTier is checked, and emptied, before the backing store.
+
+    A promoted value keeps the time it was first written and its own ttl, which the L1 picks up
+    through pop_promoted(), and one already past that ttl, or the L1's, is read from the store
+    instead.
+    """
+
+    def __init__(self, l2, db_service):
+        super().__init__(db_service.db_handler)
+        self.l2 = l2
+        self.db_service = db_service
+        # set by the TieredCache once the L1's ttl is known
+        self.ttl_ms = None
+        # (written_at, ttl_ms) of the values promoted but not yet inserted into the L1
+        self.promoted = {}
+
+    def might_contain(self, key):
+        # every demoted key was read from or written to the store, so its filter already knows it
+        return self.db_service.might_contain(key)
+
+    def pop_promoted(self, key):
+        return self.promoted.pop(key, None)
+
+    def get_entry_from_storage(self, key):
+        found = self._promote([key])
+        if key in found:
+            return found[key]
+        return self.db_service.get_entry_from_storage(key)
+
+    def get_entries_from_storage(self, keys):
+        keys = list(keys)
+        found = self._promote(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            found.update(self.db_service.get_entries_from_storage(missing))
+        return found
+
+    def _promote(self, keys):
+        try:
+            taken = self.l2.take_many(keys)
+        except Exception as e:
+            # the tier only holds copies of the store's values, so the store answers while it is failing
+            logging.warning(f"Could not read {len(keys)} keys from the disk tier: {e}")
+            taken = {}
+        now = now_ms()
+        found = {}
+        for key, (value, written_at, key_ttl_ms) in taken.items():
+            ttl_ms = key_ttl_ms or self.ttl_ms
+            if not ttl_ms or written_at + ttl_ms > now:
+                self.promoted[key] = (written_at, key_ttl_ms)
+                found[key] = value
+        # a key read from the store is new to the L1; drop anything left by a promotion it never used
+        for key in keys:
+            if key not in found:
+                self.promoted.pop(key, None)
+        return found
+
+    def iter_keys(self, *args, **kwargs):
+        return self.db_service.iter_keys(*args, **kwargs)
+
+    def iter_items(self, *args, **kwargs):
+        return self.db_service.iter_items(*args, **kwargs)
+
+    def insert_entry_in_storage(self, key, value):
+        self.db_service.insert_entry_in_storage(key, value)
+
+    def insert_entries_in_storage(self, entries):
+        self.db_service.insert_entries_in_storage(entries)
+
+    def delete_entries_from_storage(self, keys):
+        self.db_service.delete_entries_from_storage(keys)
+
+
+class TieredCache(Cache):
+    """A policy cache (L1) in front of a much larger DiskTier in its own SQLite file (L2).
+
+    Keys the L1 evicts for space are demoted to the L2, and an L1 miss takes the key back out of
+    the L2 before going to the store, so a key lives in at most one tier and each tier keeps its
+    own capacity and ttl. Writes and removals clear the key from the L2 as well, so an older
+    value can never be promoted over a newer one. While a key is being written only the values
+    being written can be demoted, so an eviction racing the write cannot put the old value back.
+    """
+
+    def __init__(self, cache_class, capacity, db_service, *args, l2_capacity, l2_path=None, l2_ttl=None,
+                 l2_codec=None, shards=1, latency_histograms=False, **kwargs):
+        self.l2 = DiskTier(l2_capacity, l2_path, l2_ttl, l2_codec)
+        # the values each key is being written with, one per writer in progress
+        self.writing = {}
+        self.writing_lock = threading.Lock()
+        storage = TieredStorage(self.l2, db_service)
+        # operations are timed inside the L1, so the tiered front never wraps them
+        super().__init__(capacity, storage, *args, **kwargs)
+        storage.ttl_ms = self.ttl_ms
+        if shards > 1:
+            self.l1 = ShardedCache(cache_class, shards, capacity, storage, *args, removal_listener=self._demote,
+                                   latency_histograms=latency_histograms, **kwargs)
+        else:
+            self.l1 = cache_class(capacity, storage, *args, removal_listener=self._demote,
+                                  latency_histograms=latency_histograms, **kwargs)
+
+        logging.info(f"Tiered Cache created with an L2 of {l2_capacity} entries at {self.l2.path}.")
+
+    def __len__(self):
+        return len(self.l1)
+
+    @property
+    def weight(self):
+        return self.l1.weight
+
+    def put(self, key, value, ttl=None):
+        with self._writing([(key, value)]):
+            self.l1.put(key, value, ttl)
+
+    def get(self, key):
+        return self.l1.get(key)
+
+    def remove(self, key):
+        with self._writing([(key, MISSING)]):
+            self.l1.remove(key)
+
+    def get_many(self, keys):
+        return self.l1.get_many(keys)
+
+    def put_many(self, items, ttl=None):
+        items = list(items.items() if isinstance(items, dict) else items)
+        with self._writing(items):
+            self.l1.put_many(items, ttl)
+
+    def remove_many(self, keys):
+        keys = list(dict.fromkeys(keys))
+        with self._writing((key, MISSING) for key in keys) as demoted:
+            removed = set(self.l1.remove_many(keys)).union(demoted)
+        return [key for key in keys if key in removed]
+
+    def flush(self):
+        self.l1.flush()
+
+    def close(self):
+        try:
+            self.l1.close()
+        finally:
+            self.l2.close()
+
+    def stats(self):
+        snapshot = self.l1.stats()
+        snapshot['l2'] = self.l2.stats()
+        return snapshot
+
+    def _demote(self, key, entry, cause):
+        # expired and removed keys are simply gone; only keys evicted for space are worth keeping
+        if cause is not EvictionCause.SIZE:
+            return
+        with self.writing_lock:
+            written = self.writing.get(key)
+            # the value a write replaces; a value the write itself stored, and the L1 evicted, is still kept
+            if written is not None and not any(value is entry.value for value in written):
+                return
+        try:
+            # runs under the L1 lock, so the demotion is only buffered
+            self.l2.put_many([(key, entry.value, entry.timestamp, self.l1._key_ttl_ms(key))])
+        except Exception as e:
+            # the store still has the value, so a failed demotion only costs a later miss
+            logging.warning(f"Could not demote key '{key}' to the disk tier: {e}")
+
+    def _collect_snapshot(self):
+        return self.l1._collect_snapshot()
+
+    def _restore_snapshot(self, header, batches):
+        restored = 0
+        for batch in batches:
+            # a key restored into the L1 must not also wait in the L2
+            with self._writing((record[0], record[1]) for record in batch):
+                restored += self.l1._restore_snapshot(header, [batch])
+        return restored
+
+    def _preload_page(self, items):
+        # a preloaded key must not also wait in the L2
+        with self._writing(items):
+            return self.l1._preload_page(items)
+
+    @contextmanager
+    def _writing(self, items):
+        # clears the keys of the (key, value) items from the L2 and keeps their older values from being
+        # demoted until the L1 holds the write; yields the keys that were in the L2
+        items = list(items)
+        with self.writing_lock:
+            for key, value in items:
+                self.writing.setdefault(key, []).append(value)
+        try:
+            yield self.l2.discard_many(key for key, _ in items)
+        finally:
+            with self.writing_lock:
+                for key, value in items:
+                    written = self.writing[key]
+                    del written[next(index for index, other in enumerate(written) if other is value)]
+                    if not written:
+                        del self.writing[key]
+
+    def _get_cached_many(self, keys):
+        return self.l1._get_cached_many(keys)
+
+    def _fill_many(self, loaded: dict) -> dict:
+        return self.l1._fill_many(loaded)
+
+    def _read_from_store(self, key):
+        return self.l1._read_from_store(key)
+
+    def _read_many_from_store(self, keys):
+        return self.l1._read_many_from_store(keys)
+
+    def _known_absent(self, key):
+        return self.l1._known_absent(key)
+
+    def _absent_generations(self, keys) -> dict:
+        return self.l1._absent_generations(keys)
+
+    def _record_absent(self, keys, loaded: dict, generations: dict):
+        self.l1._record_absent(keys, loaded, generations)
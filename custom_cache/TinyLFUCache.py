@@ -0,0 +1,152 @@
+import logging
+import time
+from collections import OrderedDict
+
+from custom_cache.cache import Cache, MISSING
+from custom_cache.cache_enum import EvictionCause
+from custom_cache.count_min_sketch import CountMinSketch
+from custom_cache.entry import now_ms
+from custom_cache.exceptions import *
+
+
+class TinyLFUCache(Cache):
+    """W-TinyLFU (Einziger, Friedman and Manes), laid out as in Caffeine.
+
+    New keys land in a small LRU admission window. Keys leaving the window join the probation
+    segment of a segmented LRU main region, and a second hit there promotes them to the
+    protected segment. When the cache is over capacity, the newest probation key (the candidate)
+    is compared with the oldest one (the victim) by their CountMinSketch estimates. The
+    candidate stays only if it has been seen more often, so one-hit wonders cannot push hot
+    keys out.
+    """
+
+    WINDOW_RATIO = 0.01
+    PROTECTED_RATIO = 0.8
+
+    def __init__(self, *args, sketch_capacity=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.window = OrderedDict()
+        self.probation = OrderedDict()
+        self.protected = OrderedDict()
+        # weight-only caches have no slot count to size the sketch from
+        self.sketch = CountMinSketch(sketch_capacity or self.capacity or 4096)
+        self.write_policy_obj = self._create_write_policy()
+
+        if not self.refresh_check:
+            raise ValueError("Please provide a valid value for refresh_check.")
+
+        self._start_refresh_task()
+
+        logging.info("TinyLFU Cache created.")
+
+    def put(self, key, value, ttl=None):
+        try:
+            self.negative_cache.discard(key)
+            self.write_policy_obj.reserve([key])
+            with self.lock:
+                self._set_ttl(key, ttl)
+                self._insert(key, value)
+
+                commit = self.write_policy_obj.write(key, value)
+            if commit is not None:
+                commit.wait()
+
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while writing to the cache: {key}-{value}. Error: {e}")
+
+    def get(self, key):
+        try:
+            with self.lock:
+                value = self._lookup(key, time.time() * 1000)
+            if value is not MISSING:
+                return value
+
+            result = self._load(key)
+            if result:
+                with self.lock:
+                    result = self._fill(key, result)
+            return result
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while getting key from cache: {key}. Error: {e}")
+
+    def remove(self, key):
+        try:
+            with self.lock:
+                if key in self.cache:
+                    value = self._remove_entry(key, EvictionCause.EXPLICIT).value
+                    self.write_policy_obj.evict(key, value)
+                else:
+                    raise KeyNotFoundException(f"Key '{key}' not found in cache.")
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while removing key from cache: {key}. Error: {e}")
+
+    def _segment_sizes(self):
+        size = self.capacity if self.capacity is not None else max(len(self.cache), 1)
+        window_size = max(1, int(size * self.WINDOW_RATIO))
+        return window_size, max(1, int((size - window_size) * self.PROTECTED_RATIO))
+
+    def _insert(self, key, value):
+        if key in self.cache:
+            self._touch(key)
+        else:
+            self.sketch.increment(key)
+            self.window[key] = None
+            window_size, _ = self._segment_sizes()
+            while len(self.window) > window_size:
+                candidate, _ = self.window.popitem(last=False)
+                self.probation[candidate] = None
+        self._store_entry(key, value, now_ms())
+        while self._over_capacity() and self.cache:
+            self._evict()
+
+    def _touch(self, key):
+        self.sketch.increment(key)
+        if key in self.window:
+            self.window.move_to_end(key)
+        elif key in self.probation:
+            del self.probation[key]
+            self.protected[key] = None
+            _, protected_size = self._segment_sizes()
+            while len(self.protected) > protected_size:
+                demoted, _ = self.protected.popitem(last=False)
+                self.probation[demoted] = None
+        else:
+            self.protected.move_to_end(key)
+
+    def _evict(self):
+        try:
+            if len(self.probation) > 1:
+                candidate = next(reversed(self.probation))
+                victim = next(iter(self.probation))
+                # ties go to the resident key, which is what keeps a scan from displacing it
+                key = victim if self.sketch.estimate(candidate) > self.sketch.estimate(victim) else candidate
+            else:
+                key = next(iter(self.probation or self.protected or self.window))
+            value = self._remove_entry(key, EvictionCause.SIZE).value
+
+            # a rejected candidate goes through the same hook, so a dirty value is still written back
+            self.write_policy_obj.evict(key, value)
+
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while evicting key from cache. Error: {e}")
+
+    def _discard(self, key):
+        self.window.pop(key, None)
+        self.probation.pop(key, None)
+        self.protected.pop(key, None)
+
+    def _snapshot_order(self):
+        # the sketch hashes with hash(), which differs per process, so estimates are saved per key
+        estimate = self.sketch.estimate
+        yield from ((key, 1, estimate(key)) for key in self.window)
+        yield from ((key, 2, estimate(key)) for key in self.probation)
+        yield from ((key, 3, estimate(key)) for key in self.protected)
+
+    def _restore_position(self, key, segment, count):
+        if segment == 1:
+            self.window[key] = None
+        elif segment == 3:
+            self.protected[key] = None
+        else:
+            self.probation[key] = None
+        self.sketch.restore(key, count)
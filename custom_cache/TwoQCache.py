@@ -0,0 +1,136 @@
+import logging
+import time
+from collections import OrderedDict
+
+from custom_cache.cache import Cache, MISSING
+from custom_cache.cache_enum import EvictionCause
+from custom_cache.entry import now_ms
+from custom_cache.exceptions import *
+
+
+class TwoQCache(Cache):
+    """Full 2Q (Johnson and Shasha).
+
+    New keys enter the FIFO a1_in and re-references there are ignored. Keys pushed out of a1_in
+    are remembered in the ghost FIFO a1_out, and only a key that comes back while still
+    remembered is promoted to the LRU main queue am. A scan passes through a1_in and a1_out
+    without touching am.
+    """
+
+    # a1_in and a1_out sizes as a share of capacity, the values suggested in the paper
+    IN_RATIO = 0.25
+    OUT_RATIO = 0.5
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.a1_in = OrderedDict()
+        self.a1_out = OrderedDict()
+        self.am = OrderedDict()
+        self.write_policy_obj = self._create_write_policy()
+
+        if not self.refresh_check:
+            raise ValueError("Please provide a valid value for refresh_check.")
+
+        self._start_refresh_task()
+
+        logging.info("2Q Cache created.")
+
+    def put(self, key, value, ttl=None):
+        try:
+            self.negative_cache.discard(key)
+            self.write_policy_obj.reserve([key])
+            with self.lock:
+                self._set_ttl(key, ttl)
+                self._insert(key, value)
+
+                commit = self.write_policy_obj.write(key, value)
+            if commit is not None:
+                commit.wait()
+
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while writing to the cache: {key}-{value}. Error: {e}")
+
+    def get(self, key):
+        try:
+            with self.lock:
+                value = self._lookup(key, time.time() * 1000)
+            if value is not MISSING:
+                return value
+
+            result = self._load(key)
+            if result:
+                with self.lock:
+                    result = self._fill(key, result)
+            return result
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while getting key from cache: {key}. Error: {e}")
+
+    def remove(self, key):
+        try:
+            with self.lock:
+                if key in self.cache:
+                    value = self._remove_entry(key, EvictionCause.EXPLICIT).value
+                    self.write_policy_obj.evict(key, value)
+                else:
+                    raise KeyNotFoundException(f"Key '{key}' not found in cache.")
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while removing key from cache: {key}. Error: {e}")
+
+    def _queue_sizes(self):
+        # weight-only caches size the queues from the resident set instead of a slot count
+        size = self.capacity if self.capacity is not None else max(len(self.cache), 1)
+        return max(1, int(size * self.IN_RATIO)), max(1, int(size * self.OUT_RATIO))
+
+    def _insert(self, key, value):
+        if key in self.cache:
+            self._touch(key)
+        elif key in self.a1_out:
+            del self.a1_out[key]
+            self.am[key] = None
+        else:
+            self.a1_in[key] = None
+        self._store_entry(key, value, now_ms())
+        while self._over_capacity() and self.cache:
+            self._evict()
+
+    def _touch(self, key):
+        # a hit in a1_in is treated as correlated with the first reference and not promoted
+        if key in self.am:
+            self.am.move_to_end(key)
+
+    def _evict(self):
+        try:
+            in_size, out_size = self._queue_sizes()
+            if len(self.a1_in) > in_size or not self.am:
+                key = next(iter(self.a1_in))
+                value = self._remove_entry(key, EvictionCause.SIZE).value
+                self.a1_out[key] = None
+                while len(self.a1_out) > out_size:
+                    self.a1_out.popitem(last=False)
+            else:
+                key = next(iter(self.am))
+                value = self._remove_entry(key, EvictionCause.SIZE).value
+
+            self.write_policy_obj.evict(key, value)
+
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while evicting key from cache. Error: {e}")
+
+    def _discard(self, key):
+        self.a1_in.pop(key, None)
+        self.am.pop(key, None)
+
+    def _snapshot_order(self):
+        yield from ((key, 1, 0) for key in self.a1_in)
+        yield from ((key, 2, 0) for key in self.am)
+
+    def _snapshot_state(self):
+        return list(self.a1_out)
+
+    def _restore_position(self, key, segment, count):
+        # keys from another policy were resident already, so they skip the a1_in probation
+        (self.a1_in if segment == 1 else self.am)[key] = None
+
+    def _restore_state(self, state):
+        _, out_size = self._queue_sizes()
+        self.a1_out = OrderedDict.fromkeys(key for key in state[-out_size:] if key not in self.cache)
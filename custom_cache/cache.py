@@ -1,14 +1,44 @@
 import asyncio
+import logging
+import random
+import sys
 import threading
+import time
 from collections import OrderedDict, defaultdict
+from itertools import islice
 from typing import Any
 
 from custom_cache.cache_enum import *
+from custom_cache.entry import CacheEntry, EncodedCacheEntry, WeightedCacheEntry, now_ms
+from custom_cache.exceptions import CacheException
+from custom_cache.expiration import ExpirationIndex
+from custom_cache.memoize import memoize, memoize_many
+from custom_cache.negative_cache import NegativeCache
+from custom_cache.single_flight import SingleFlight
+from custom_cache.snapshot import SnapshotReader, write_snapshot
+from custom_cache.stats import CacheStats
+from custom_cache.write_policies import WritePolicyFactory
+
+# sentinel returned by _lookup so cached falsy values are not mistaken for misses
+MISSING = object()
+
+
+def default_weigher(key, value):
+    # shallow size only: containers are weighed without their contents
+    return sys.getsizeof(key) + sys.getsizeof(value)
 
 
 class Cache:
+    # deadlines are rounded up to this many milliseconds so keys written together share a bucket
+    TIMER_RESOLUTION_MS = 10
+
     def __init__(self, capacity, db_service, ttl=None,
-                 write_policy=WritePolicy.WRITE_THROUGH, refresh_interval=None, refresh_check=30):
+                 write_policy=WritePolicy.WRITE_THROUGH, refresh_interval=None, refresh_check=30,
+                 flush_interval=None, flush_threshold=1000, max_dirty=None, negative_ttl=None,
+                 negative_capacity=1024, max_weight=None, weigher=None, latency_histograms=False,
+                 removal_listener=None, value_codec=None, commit_writer=None, load_ttl=None, jitter=0.0):
+        if capacity is None and max_weight is None:
+            raise ValueError("Please provide a capacity, a max_weight or both.")
         self.capacity = capacity
         self.ttl = ttl
         self.write_policy = write_policy
@@ -17,8 +47,42 @@ class Cache:
         self.lock = threading.Lock()
         self.db_service = db_service
         self.refresh_check = refresh_check
+        # deadline indexes so background sweeps only visit due entries; times are integer milliseconds
+        self.expiry_index = ExpirationIndex(self.TIMER_RESOLUTION_MS)
+        self.refresh_index = ExpirationIndex(self.TIMER_RESOLUTION_MS)
+        self.ttl_ms = int(ttl * 1000) if ttl else None
+        self.refresh_interval_ms = int(refresh_interval * 1000) if refresh_interval else None
+        # ttl in milliseconds of the keys that were put with their own ttl or loaded with a load_ttl
+        self.key_ttls = {}
+        # called as load_ttl(key, value) for values read from the store; returns seconds, or None for ttl
+        self.load_ttl = load_ttl
+        if not 0 <= jitter < 1:
+            raise ValueError("Please provide a jitter between 0 and 1.")
+        self.jitter = jitter
+        # write-back flusher settings, see WriteBackPolicy
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.max_dirty = max_dirty
+        self.background_tasks = []
+        self.loader = SingleFlight()
+        # keys the store reported absent, cached only when negative_ttl is set
+        self.negative_cache = NegativeCache(negative_ttl, negative_capacity)
+        # weight-bounded mode: entries are weighed on write and evicted until the total fits
+        self.max_weight = max_weight
+        self.weigher = weigher or default_weigher
+        self.total_weight = 0
+        self.metrics = CacheStats(latency_histograms)
+        # called as listener(key, entry, cause) with the lock held whenever an entry leaves the cache
+        self.removal_listener = removal_listener
+        # keeps values encoded in memory, e.g. a CompressingCodec for large documents
+        self.value_codec = value_codec
+        # a GroupCommitWriter shared by write-through caches on the same store, see WriteThroughPolicy
+        self.commit_writer = commit_writer
+        if latency_histograms:
+            for operation in ('get', 'put', 'remove', 'get_many', 'put_many', 'remove_many'):
+                setattr(self, operation, self.metrics.timed(operation, getattr(self, operation)))
 
-    def put(self, key: str, value: Any):
+    def put(self, key: str, value: Any, ttl=None):
         raise NotImplementedError
 
     def get(self, key: str) -> Any:
@@ -27,10 +91,483 @@ class Cache:
     def remove(self, key: str):
         raise NotImplementedError
 
+    def __len__(self):
+        return len(self.cache)
+
+    @property
+    def weight(self):
+        return self.total_weight
+
+    def stats(self) -> dict:
+        snapshot = self.metrics.snapshot()
+        snapshot.update({
+            'size': len(self),
+            'capacity': self.capacity,
+            'weight': self.weight,
+            'max_weight': self.max_weight,
+            'dirty': self.write_policy_obj.pending,
+        })
+        return snapshot
+
+    def get_many(self, keys) -> dict:
+        try:
+            results, missing = self._get_cached_many(keys)
+            missing = self._filter_absent(missing)
+            if missing:
+                generations = self._absent_generations(missing)
+                loaded = self._read_many_from_store(missing)
+                self._record_absent(missing, loaded, generations)
+                results.update(self._fill_many(loaded))
+            return results
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while getting keys from cache. Error: {e}")
+
+    def put_many(self, items, ttl=None):
+        try:
+            items = list(items.items() if isinstance(items, dict) else items)
+            self.negative_cache.discard_many(key for key, _ in items)
+            self.write_policy_obj.reserve(key for key, _ in items)
+            with self.lock:
+                for key, value in items:
+                    self._set_ttl(key, ttl)
+                    self._insert(key, value)
+
+                commit = self.write_policy_obj.write_many(items)
+            # a group commit is awaited outside the lock, so concurrent writers can join it
+            if commit is not None:
+                commit.wait()
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while writing keys to the cache. Error: {e}")
+
+    def remove_many(self, keys):
+        try:
+            with self.lock:
+                removed = []
+                for key in dict.fromkeys(keys):
+                    if key in self.cache:
+                        removed.append((key, self._remove_entry(key, EvictionCause.EXPLICIT).value))
+
+                self.write_policy_obj.evict_many(removed)
+                return [key for key, _ in removed]
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while removing keys from cache. Error: {e}")
+
+    def flush(self):
+        try:
+            self.write_policy_obj.flush()
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while flushing dirty keys to the store. Error: {e}")
+
+    def preload(self, prefix=None, start=None, stop=None, page_size=1000):
+        # streams the store in key order until the cache is full, see SqliteService.iter_items;
+        # resident keys keep their value and nothing is written back
+        try:
+            items = iter(self.db_service.iter_items(prefix, start, stop, page_size))
+            preloaded = 0
+            while True:
+                page = list(islice(items, page_size))
+                if not page:
+                    break
+                added, full = self._preload_page(page)
+                preloaded += added
+                if full:
+                    break
+            return preloaded
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while preloading the cache. Error: {e}")
+
+    def memoize(self, ttl=None, key=None, persist=False):
+        # decorator for sync and async functions, see custom_cache.memoize
+        return memoize(self, ttl, key, persist)
+
+    def memoize_many(self, ttl=None, key=None, persist=False):
+        return memoize_many(self, ttl, key, persist)
+
+    def save_snapshot(self, path, flush=False):
+        # dirty write-back entries are saved as dirty and queued again on load, unless flush=True
+        # writes them to the store first; only the in-memory walk holds the lock
+        try:
+            if flush:
+                self.flush()
+            header, records = self._collect_snapshot()
+            write_snapshot(path, header, records)
+            return len(records)
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while saving a snapshot to {path}. Error: {e}")
+
+    def load_snapshot(self, path):
+        # expired entries are dropped and resident keys keep their value; positions, counts and
+        # ghost lists only carry over into the policy that saved them
+        try:
+            with SnapshotReader(path) as reader:
+                return self._restore_snapshot(reader.header, reader.batches())
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while loading a snapshot from {path}. Error: {e}")
+
+    def close(self):
+        try:
+            for task in self.background_tasks:
+                # close() may run off the loop thread, e.g. from AsyncCache's executor
+                loop = task.get_loop()
+                if not loop.is_closed():
+                    loop.call_soon_threadsafe(task.cancel)
+            self.background_tasks.clear()
+            self.write_policy_obj.close()
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while closing the cache. Error: {e}")
+
+    def _create_write_policy(self):
+        return WritePolicyFactory.get_write_policy(self.write_policy, self._write_to_store, self._write_many_to_store,
+                                                   flush_interval=self.flush_interval,
+                                                   flush_threshold=self.flush_threshold, max_dirty=self.max_dirty,
+                                                   commit_writer=self.commit_writer)
+
+    def _collect_snapshot(self):
+        # entries are replaced rather than mutated, so values read under the lock stay consistent
+        with self.lock:
+            cache = self.cache
+            is_dirty = self.write_policy_obj.is_dirty
+            key_ttls = self.key_ttls
+            records = []
+            for key, segment, count in self._snapshot_order():
+                entry = cache[key]
+                records.append((key, entry.value, entry.timestamp, segment, count, is_dirty(key), key_ttls.get(key)))
+            state = self._snapshot_state()
+        return {'policy': type(self).__name__, 'state': state}, records
+
+    def _restore_snapshot(self, header, batches):
+        same_policy = header['policy'] == type(self).__name__
+        if same_policy and header['state'] is not None:
+            with self.lock:
+                self._restore_state(header['state'])
+        restored = 0
+        for batch in batches:
+            dirty_items = []
+            # one lock hold per frame, so traffic is still served while a large snapshot streams in
+            with self.lock:
+                now = now_ms()
+                for key, value, timestamp, segment, count, dirty, key_ttl_ms in batch:
+                    ttl_ms = key_ttl_ms or self.ttl_ms
+                    if key in self.cache or (ttl_ms and timestamp + ttl_ms <= now):
+                        continue
+                    self._set_ttl(key, key_ttl_ms / 1000 if key_ttl_ms else None)
+                    self._store_entry(key, value, timestamp)
+                    self._restore_position(key, segment if same_policy else None, count)
+                    if dirty:
+                        dirty_items.append((key, value))
+                    restored += 1
+                    # records run from first to last evicted, so a smaller cache keeps the right tail
+                    while self._over_capacity() and self.cache:
+                        self._evict()
+                commit = self.write_policy_obj.write_many(dirty_items) if dirty_items else None
+            # like put_many, a write-through commit is awaited outside the lock
+            if commit is not None:
+                commit.wait()
+        return restored
+
+    def _preload_page(self, items):
+        # one lock hold per page; returns the number of entries added and whether the cache is full
+        self.negative_cache.discard_many(key for key, _ in items)
+        added = 0
+        with self.lock:
+            for key, value in items:
+                if self._is_full():
+                    return added, True
+                if value and key not in self.cache:
+                    self._insert_loaded(key, value)
+                    added += 1
+            return added, self._is_full()
+
+    def _is_full(self) -> bool:
+        if self.capacity is not None and len(self.cache) >= self.capacity:
+            return True
+        return self.max_weight is not None and self.total_weight >= self.max_weight
+
+    def _get_cached_many(self, keys):
+        results = {}
+        missing = []
+        with self.lock:
+            now = time.time() * 1000
+            for key in dict.fromkeys(keys):
+                value = self._lookup(key, now)
+                if value is MISSING:
+                    missing.append(key)
+                else:
+                    results[key] = value
+        return results, missing
+
+    def _fill_many(self, loaded: dict) -> dict:
+        filled = {}
+        with self.lock:
+            for key, value in loaded.items():
+                if value:
+                    filled[key] = self._fill(key, value)
+        return filled
+
+    def _load(self, key: str):
+        if self._known_absent(key):
+            return None
+        # concurrent misses on the same key share one storage read
+        generations, result = self.loader.do(key, lambda: self._read_tracked(key))
+        if not result:
+            self._record_absent([key], {}, generations)
+        return result
+
+    def _read_tracked(self, key: str):
+        return self._absent_generations([key]), self._read_from_store(key)
+
+    def _read_from_store(self, key: str):
+        return self._timed_read(1, self.db_service.get_entry_from_storage, key)
+
+    def _read_many_from_store(self, keys) -> dict:
+        return self._timed_read(len(keys), self.db_service.get_entries_from_storage, keys)
+
+    def _timed_read(self, key_count, read, argument):
+        start = time.perf_counter_ns()
+        try:
+            result = read(argument)
+        except Exception:
+            self.metrics.record_load(key_count, time.perf_counter_ns() - start, failed=True)
+            raise
+        self.metrics.record_load(key_count, time.perf_counter_ns() - start)
+        return result
+
+    def _known_absent(self, key: str) -> bool:
+        return self.negative_cache.contains(key) or not self.db_service.might_contain(key)
+
+    def _filter_absent(self, keys):
+        return [key for key in keys if not self._known_absent(key)]
+
+    def _absent_generations(self, keys) -> dict:
+        # taken before a storage read, so _record_absent can tell which keys were written while it ran
+        if not self.negative_cache.enabled:
+            return {}
+        return {key: self.negative_cache.generation(key) for key in keys}
+
+    def _record_absent(self, keys, loaded: dict, generations: dict):
+        if self.negative_cache.enabled:
+            for key in keys:
+                if not loaded.get(key) and key not in self.cache:
+                    self.negative_cache.add(key, generations[key])
+
+    def _fill(self, key: str, value: Any):
+        # a loaded value never replaces one written while the load was in flight
+        if key not in self.cache:
+            self._insert_loaded(key, value)
+            return value
+        return self.cache[key].value
+
+    def _insert_loaded(self, key: str, value: Any):
+        promoted = self.db_service.pop_promoted(key)
+        if promoted is not None and promoted[1] is not None:
+            # a value handed back by a lower tier keeps the ttl it was put with
+            self._set_ttl(key, promoted[1] / 1000)
+        elif self.load_ttl is not None:
+            self._set_ttl(key, self.load_ttl(key, value))
+        self._insert(key, value)
+        if promoted is not None and key in self.cache:
+            # and its age, so that ttl still runs from the original write
+            self._store_entry(key, value, promoted[0])
+
+    def _set_ttl(self, key: str, ttl):
+        # called before the entry is stored; None falls back to the cache's ttl
+        if ttl is not None:
+            if ttl <= 0:
+                raise ValueError(f"Please provide a positive ttl for key '{key}'.")
+            self.key_ttls[key] = int(ttl * 1000)
+        elif self.key_ttls:
+            self.key_ttls.pop(key, None)
+
+    def _lookup(self, key: str, now: float):
+        # reads compare against a float millisecond clock; only stored timestamps need now_ms()
+        entry = self.cache.get(key)
+        if entry is None:
+            self.metrics.misses += 1
+            return MISSING
+        if self._is_expired(key, now):
+            self._remove_entry(key, EvictionCause.TTL)
+            self.metrics.misses += 1
+            return MISSING
+        self._touch(key)
+        self.metrics.hits += 1
+        return entry.value
+
+    def _insert(self, key: str, value: Any):
+        raise NotImplementedError
+
+    def _store_entry(self, key: str, value: Any, timestamp: int):
+        if self.value_codec is not None:
+            entry = EncodedCacheEntry(value, timestamp, self.value_codec)
+        elif self.max_weight is None:
+            entry = CacheEntry(value, timestamp)
+        else:
+            entry = WeightedCacheEntry(value, timestamp, 0)
+        if self.max_weight is not None:
+            # an encoded value is weighed as it is held
+            weight = self.weigher(key, value if self.value_codec is None else entry.data)
+            if weight < 0:
+                raise ValueError(f"Weigher returned a negative weight for key '{key}'.")
+            previous = self.cache.get(key)
+            self.total_weight += weight - (previous.weight if previous is not None else 0)
+            entry.weight = weight
+        self.cache[key] = entry
+        self._schedule(key, timestamp)
+
+    def _remove_entry(self, key: str, cause: EvictionCause):
+        entry = self.cache.pop(key)
+        self.metrics.evictions[cause] += 1
+        if self.max_weight is not None:
+            self.total_weight -= entry.weight
+        self._unschedule(key)
+        self._discard(key)
+        if self.removal_listener is not None:
+            self.removal_listener(key, entry, cause)
+        if self.key_ttls:
+            # dropped last, so a removal listener can still read the key's ttl
+            self.key_ttls.pop(key, None)
+        return entry
+
+    def _over_capacity(self) -> bool:
+        if self.capacity is not None and len(self.cache) > self.capacity:
+            return True
+        return self.max_weight is not None and self.total_weight > self.max_weight
+
+    def _touch(self, key: str):
+        raise NotImplementedError
 
     def _evict(self):
         raise NotImplementedError
 
-    def _refresh(self):
+    def _discard(self, key: str):
+        # drop the key from the policy's own bookkeeping; the entry itself is removed by the caller
+        raise NotImplementedError
+
+    def _snapshot_order(self):
+        # (key, segment, count) for every resident key, in the order _restore_position rebuilds it
+        raise NotImplementedError
+
+    def _snapshot_state(self):
+        return None
+
+    def _restore_position(self, key: str, segment, count: int):
+        # segment is None when the snapshot came from another policy
         raise NotImplementedError
 
+    def _restore_state(self, state):
+        pass
+
+    def _schedule(self, key: str, timestamp: int):
+        # reads and sweeps both go by these deadlines, so an entry expires at the same time either way
+        ttl_ms = self.key_ttls.get(key, self.ttl_ms) if self.key_ttls else self.ttl_ms
+        if ttl_ms:
+            self.expiry_index.schedule(key, timestamp + self._jittered(ttl_ms))
+        if self.refresh_interval_ms:
+            self.refresh_index.schedule(key, timestamp + self._jittered(self.refresh_interval_ms))
+
+    def _jittered(self, interval_ms: int) -> int:
+        # deadlines spread over [interval * (1 - jitter), interval], so keys written together are not
+        # all due on the same sweep and an entry never outlives its ttl
+        if not self.jitter:
+            return interval_ms
+        return interval_ms - int(interval_ms * self.jitter * random.random())
+
+    def _unschedule(self, key: str):
+        self.expiry_index.discard(key)
+        self.refresh_index.discard(key)
+
+    def _key_ttl_ms(self, key: str):
+        # the key's own ttl in milliseconds, or None when it follows the cache's
+        return self.key_ttls.get(key)
+
+    def _is_expired(self, key: str, now: float) -> bool:
+        return self.expiry_index.is_due(key, now)
+
+    async def _refresh(self):
+        try:
+            while True:
+                await asyncio.sleep(self.refresh_check)
+                # the sweep reads from storage, so keep it off the event loop
+                await asyncio.get_running_loop().run_in_executor(None, self._refresh_cache)
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while refreshing the cache. Error: {e}")
+
+    async def _expire(self):
+        try:
+            while True:
+                await asyncio.sleep(self.refresh_check)
+                self._evict_expired_entries()
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while evicting expired entries from cache. Error: {e}")
+
+    def _refresh_cache(self):
+        try:
+            with self.lock:
+                now = now_ms()
+                # the entry objects double as versions: any put replaces the entry
+                snapshot = {}
+                for key in self.refresh_index.pop_due(now):
+                    # an unflushed write-back is newer than the store, so it is not refreshed yet
+                    if self.write_policy_obj.is_dirty(key):
+                        self.refresh_index.schedule(key, now + self._jittered(self.refresh_interval_ms))
+                    else:
+                        snapshot[key] = self.cache[key]
+
+            if not snapshot:
+                return
+            # stale-while-revalidate: readers keep getting the old values while storage is queried
+            fresh_values = self._read_many_from_store(list(snapshot))
+
+            with self.lock:
+                now = now_ms()
+                for key, entry in snapshot.items():
+                    if self.cache.get(key) is not entry:
+                        continue
+                    fresh_value = fresh_values.get(key)
+                    if fresh_value and not self.write_policy_obj.is_dirty(key):
+                        if self.load_ttl is not None:
+                            self._set_ttl(key, self.load_ttl(key, fresh_value))
+                        self._store_entry(key, fresh_value, now)
+                        self.metrics.refreshes += 1
+                    else:
+                        self.refresh_index.schedule(key, now + self._jittered(self.refresh_interval_ms))
+                logging.debug("Refreshed %d of %d stale keys from store.", len(fresh_values), len(snapshot))
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while refreshing cache. Error: {e}")
+
+    def _evict_expired_entries(self):
+        try:
+            with self.lock:
+                now = now_ms()
+                for key in self.expiry_index.pop_due(now):
+                    self._remove_entry(key, EvictionCause.TTL)
+        except Exception as e:
+            raise CacheException(f"An unexpected error occurred while evicting expired entries from cache. Error: {e}")
+
+    def _write_to_store(self, key: str, value: Any):
+        try:
+            self.db_service.insert_entry_in_storage(key, value)
+        except Exception as e:
+            raise CacheException(f"An error occurred while writing key '{key}' to the store. Error: {e}")
+
+    def _write_many_to_store(self, items):
+        try:
+            self.db_service.insert_entries_in_storage(items)
+        except Exception as e:
+            raise CacheException(f"An error occurred while writing {len(items)} keys to the store. Error: {e}")
+
+    def _start_refresh_task(self):
+        try:
+            try:
+                loop = asyncio.get_event_loop()
+            except RuntimeError:
+                logging.warning("No event loop found; creating a new one.")
+                loop = asyncio.new_event_loop()
+                asyncio.set_event_loop(loop)
+
+            if self.refresh_interval:
+                self.background_tasks.append(loop.create_task(self._refresh()))
+            # any put can carry its own ttl, so the sweep runs even without a cache-wide one
+            self.background_tasks.append(loop.create_task(self._expire()))
+        except Exception as e:
+            logging.error(f"Unexpected error in starting refresh task: {e}")
+            raise
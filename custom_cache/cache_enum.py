@@ -11,3 +11,19 @@ class WritePolicy(Enum):
 class EvictionPolicy(Enum):
     LRU = "lru"
     LFU = "lfu"
+    ARC = "arc"
+    TWO_Q = "2q"
+    TINY_LFU = "tiny_lfu"
+
+
+# Where resident entries live
+class CacheBackend(Enum):
+    MEMORY = "memory"
+    SHARED_MEMORY = "shared_memory"
+
+
+# Why an entry left the cache, as reported by Cache.stats()
+class EvictionCause(Enum):
+    SIZE = "size"
+    TTL = "ttl"
+    EXPLICIT = "explicit"
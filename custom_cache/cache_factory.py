@@ -1,27 +1,72 @@
 import asyncio
 import logging
 
+from custom_cache.ARCCache import ARCCache
+from custom_cache.AsyncCache import AsyncCache
 from custom_cache.LFUCache import LFUCache
 from custom_cache.LRUCache import LRUCache
+from custom_cache.ShardedCache import ShardedCache
+from custom_cache.SharedMemoryCache import SharedMemoryCache
+from custom_cache.TieredCache import TieredCache
+from custom_cache.TinyLFUCache import TinyLFUCache
+from custom_cache.TwoQCache import TwoQCache
 from custom_cache.cache_enum import *
 from custom_cache.exceptions import *
+from custom_cache.group_commit import GroupCommitWriter
 
 
 class CacheFactory:
 
     @staticmethod
     def create_cache(eviction_policy: EvictionPolicy, capacity, db_service, ttl=None,
-                     write_policy=WritePolicy.WRITE_THROUGH, refresh_interval=None, refresh_check=None):
+                     write_policy=WritePolicy.WRITE_THROUGH, refresh_interval=None, refresh_check=None, shards=1,
+                     backend=CacheBackend.MEMORY, l2_capacity=None, l2_path=None, l2_ttl=None, group_commit=False,
+                     **options):
         try:
 
+            if group_commit:
+                if write_policy != WritePolicy.WRITE_THROUGH:
+                    raise CacheException("Group commit applies to write-through caches only.")
+                # one writer for every shard, so their writes share transactions
+                options['commit_writer'] = GroupCommitWriter(db_service.insert_entries_in_storage)
+
+            if backend == CacheBackend.SHARED_MEMORY:
+                # one table is shared by every process, so it cannot be split into per-process shards or tiers
+                if eviction_policy != EvictionPolicy.LRU or shards > 1 or l2_capacity:
+                    raise CacheException("The shared-memory backend supports unsharded, untiered LRU eviction only.")
+                return SharedMemoryCache(capacity, db_service, ttl, write_policy, refresh_interval,
+                                         refresh_check=refresh_check, **options)
+            elif backend != CacheBackend.MEMORY:
+                raise CacheException("Invalid Cache Backend")
+
             if eviction_policy == EvictionPolicy.LRU:
-                cache = LRUCache(capacity, db_service, ttl, write_policy, refresh_interval, refresh_check=refresh_check)
+                cache_class = LRUCache
 
             elif eviction_policy == EvictionPolicy.LFU:
-                cache = LFUCache(capacity, db_service, ttl, write_policy, refresh_interval, refresh_check=refresh_check)
+                cache_class = LFUCache
+
+            elif eviction_policy == EvictionPolicy.ARC:
+                cache_class = ARCCache
+
+            elif eviction_policy == EvictionPolicy.TWO_Q:
+                cache_class = TwoQCache
+
+            elif eviction_policy == EvictionPolicy.TINY_LFU:
+                cache_class = TinyLFUCache
             else:
                 raise CacheException("Invalid Eviction Policy Type")
 
+            if l2_capacity:
+                cache = TieredCache(cache_class, capacity, db_service, ttl, write_policy, refresh_interval,
+                                    refresh_check=refresh_check, l2_capacity=l2_capacity, l2_path=l2_path,
+                                    l2_ttl=l2_ttl, shards=shards, **options)
+            elif shards > 1:
+                cache = ShardedCache(cache_class, shards, capacity, db_service, ttl, write_policy, refresh_interval,
+                                     refresh_check=refresh_check, **options)
+            else:
+                cache = cache_class(capacity, db_service, ttl, write_policy, refresh_interval,
+                                    refresh_check=refresh_check, **options)
+
             return cache
 
         except CacheException as ce:
@@ -30,3 +75,11 @@ class CacheFactory:
         except Exception as e:
             logging.error(f"Unexpected error during cache creation: {e}")
             raise CacheException("An unexpected error occurred during cache creation.")
+
+    @staticmethod
+    def create_async_cache(eviction_policy: EvictionPolicy, capacity, db_service, ttl=None,
+                           write_policy=WritePolicy.WRITE_THROUGH, refresh_interval=None, refresh_check=None,
+                           executor=None, max_workers=4, **options):
+        cache = CacheFactory.create_cache(eviction_policy, capacity, db_service, ttl, write_policy, refresh_interval,
+                                          refresh_check, **options)
+        return AsyncCache(cache, executor=executor, max_workers=max_workers)
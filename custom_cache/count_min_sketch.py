@@ -0,0 +1,64 @@
+class CountMinSketch:
+    """Approximate access counts for TinyLFU admission.
+
+    `depth` rows of saturating counters, one byte each and capped at 15 as in Caffeine's 4-bit
+    sketch. Like Caffeine, a row is about four times the cache capacity wide. A key's estimate
+    is the minimum over its rows, so collisions can only overestimate. After
+    `sample_factor * capacity` increments every counter is halved, which ages out popularity
+    that is no longer current.
+    """
+
+    MAX_COUNT = 15
+    # one odd multiplier per row; multiplicative hashing with distinct constants keeps rows independent
+    ROW_MULTIPLIERS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+                       0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9)
+    # halves every byte in one C-level pass over the table
+    HALVE = bytes(count >> 1 for count in range(256))
+
+    def __init__(self, capacity, depth=4, sample_factor=10):
+        if capacity < 1 or not 1 <= depth <= len(self.ROW_MULTIPLIERS):
+            raise ValueError("Please provide valid values for capacity and depth.")
+        # small caches still get 256 counters a row, or a few hot keys would collide with everything
+        bits = max(8, (4 * capacity - 1).bit_length())
+        self.width = 1 << bits
+        self.shift = 64 - bits
+        self.depth = depth
+        self.rows = [(row * self.width, multiplier) for row, multiplier in enumerate(self.ROW_MULTIPLIERS[:depth])]
+        self.table = bytearray(self.width * depth)
+        self.sample_size = sample_factor * capacity
+        self.additions = 0
+
+    def estimate(self, key):
+        table = self.table
+        return min(table[index] for index in self._indexes(key))
+
+    def increment(self, key):
+        table = self.table
+        indexes = self._indexes(key)
+        current = min(table[index] for index in indexes)
+        if current < self.MAX_COUNT:
+            # conservative update: only the rows at the minimum grow, which limits overestimation
+            for index in indexes:
+                if table[index] == current:
+                    table[index] = current + 1
+            self.additions += 1
+            if self.additions >= self.sample_size:
+                self.reset()
+
+    def restore(self, key, count):
+        # raise the key's counters to a saved estimate without counting as new additions
+        table = self.table
+        count = min(count, self.MAX_COUNT)
+        for index in self._indexes(key):
+            if table[index] < count:
+                table[index] = count
+
+    def reset(self):
+        self.table = self.table.translate(self.HALVE)
+        self.additions //= 2
+
+    def _indexes(self, key):
+        # the top bits of a 64-bit product pick the column
+        key_hash = hash(key)
+        shift = self.shift
+        return [offset + ((key_hash * multiplier & 0xFFFFFFFFFFFFFFFF) >> shift) for offset, multiplier in self.rows]
@@ -1,4 +1,7 @@
+import contextlib
 import sqlite3
+import threading
+import weakref
 
 from custom_cache.db_config import DATABASE_CONFIG
 from custom_cache.exceptions import StorageException
@@ -8,6 +11,8 @@ class DatabaseHandler:
     def __init__(self):
         self.connection = None
         self.cursor = None
+        # serialises use of the shared connection and cursor across threads
+        self.lock = threading.RLock()
 
     def connect(self):
         raise NotImplementedError
@@ -17,26 +22,113 @@ class DatabaseHandler:
 
 
 class SQLiteHandler(DatabaseHandler):
+    """SQLite handler that gives every thread its own connection for file-backed databases.
+
+    An in-memory database only exists inside the connection that created it, so ':memory:'
+    keeps one shared connection serialised by the handler lock. File-backed databases open a
+    connection per thread on first use, tuned with the journal mode, synchronous level and
+    mmap size from DATABASE_CONFIG; readers then proceed concurrently under WAL. A thread's
+    connection is closed once the thread is gone, so thread churn does not leak file handles.
+    """
+
+    def __init__(self, config=None):
+        self.config = dict(config or DATABASE_CONFIG['sqlite'])
+        self.shared = self.config['name'] == ':memory:'
+        self.local = threading.local()
+        self.connections = []
+        self.connections_lock = threading.Lock()
+        super().__init__()
+        if not self.shared:
+            # every thread owns its connection, so there is nothing to serialise
+            self.lock = contextlib.nullcontext()
+
+    @property
+    def connection(self):
+        if self.shared:
+            return self.shared_connection
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = self._open_thread_connection()
+        return connection
+
+    @connection.setter
+    def connection(self, connection):
+        self.shared_connection = connection
+
+    @property
+    def cursor(self):
+        if self.shared:
+            return self.shared_cursor
+        cursor = getattr(self.local, 'cursor', None)
+        if cursor is None:
+            self._open_thread_connection()
+            cursor = self.local.cursor
+        return cursor
+
+    @cursor.setter
+    def cursor(self, cursor):
+        self.shared_cursor = cursor
+
     def connect(self):
         try:
-            self.connection = sqlite3.connect(DATABASE_CONFIG['sqlite']['name'])
-            self.cursor = self.connection.cursor()
+            if self.shared:
+                self.connection = self._open_connection()
+                self.cursor = self.connection.cursor()
+            else:
+                self._open_thread_connection()
             print("Connection established with sqlite")
         except Exception:
             raise StorageException("Unable to connect to the Storage.")
 
     def close(self):
         try:
-            self.connection.close()
+            with self.connections_lock:
+                connections, self.connections = self.connections, []
+            for connection in connections:
+                connection.close()
+            self.local = threading.local()
+            self.shared_connection = None
+            self.shared_cursor = None
         except Exception:
             raise StorageException("Unable to close connection with the Storage.")
 
+    def _open_thread_connection(self):
+        connection = self._open_connection()
+        self.local.connection = connection
+        self.local.cursor = connection.cursor()
+        # the finalizer only holds a weak reference, so it never keeps a closed handler alive
+        weakref.finalize(threading.current_thread(), self._release_connection, weakref.ref(self), connection)
+        return connection
+
+    @staticmethod
+    def _release_connection(handler_reference, connection):
+        handler = handler_reference()
+        if handler is not None:
+            with handler.connections_lock:
+                if connection in handler.connections:
+                    handler.connections.remove(connection)
+        connection.close()
+
+    def _open_connection(self):
+        connection = sqlite3.connect(self.config['name'], timeout=self.config.get('timeout', 5.0),
+                                     cached_statements=self.config.get('cached_statements', 128),
+                                     check_same_thread=False)
+        if not self.shared:
+            connection.execute(f"PRAGMA journal_mode={self.config.get('journal_mode', 'WAL')};")
+        if self.config.get('synchronous'):
+            connection.execute(f"PRAGMA synchronous={self.config['synchronous']};")
+        if self.config.get('mmap_size'):
+            connection.execute(f"PRAGMA mmap_size={int(self.config['mmap_size'])};")
+        with self.connections_lock:
+            self.connections.append(connection)
+        return connection
+
 
 class DatabaseFactory:
     @staticmethod
-    def get_database_handler(db_type=DATABASE_CONFIG['type']):
+    def get_database_handler(db_type=DATABASE_CONFIG['type'], config=None):
 
         if db_type == 'sqlite':
-            return SQLiteHandler()
+            return SQLiteHandler(config)
         else:
             raise StorageException(f"Unsupported database type: {db_type}")
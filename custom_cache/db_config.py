@@ -2,7 +2,15 @@ DATABASE_CONFIG = {
     # default db type
     'type': 'sqlite',
     'sqlite': {
-        'name': ':memory:'
+        'name': ':memory:',
+        # seconds a writer waits on a locked database before failing
+        'timeout': 5.0,
+        # compiled statements kept per connection
+        'cached_statements': 128,
+        # the settings below apply to file-backed databases, each thread gets its own connection
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,
     },
     # configuration for other data sources can be added below
 
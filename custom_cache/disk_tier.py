@@ -0,0 +1,252 @@
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+
+from custom_cache.database import DatabaseFactory
+from custom_cache.db_config import DATABASE_CONFIG
+from custom_cache.entry import now_ms
+from custom_cache.exceptions import StorageException
+from custom_cache.value_codecs import PickleCodec
+
+
+class DiskTier:
+    """A bounded SQLite file holding the entries an in-memory cache evicted, see TieredCache.
+
+    The tier is exclusive: take_many() hands entries back and drops them, and a key is demoted
+    again only once it left the in-memory cache. Rows are numbered in demotion order, so an
+    over-capacity tier drops its earliest demotions first, which follows the in-memory cache's
+    own eviction order. Demotions are buffered and the rows that were taken or discarded are
+    hidden, and both are written out in one transaction per batch, so a promotion costs a single
+    SELECT. put_many() only buffers, since it is called under the in-memory cache's lock; a due
+    batch is written by the next take_many() or discard_many(). The keys with a row are also
+    kept in memory, so looking up or discarding a key that was never demoted costs no query.
+    Values are stored with `codec`, pickled by default, and an entry is never returned once
+    `ttl` seconds have passed since it was written.
+
+    The file is not synced: the store stays the system of record. A file that was not closed
+    cleanly may still show hidden rows, so it is emptied when reopened. Without a path the file
+    is temporary and removed on close.
+    """
+
+    # SQLITE_MAX_VARIABLE_NUMBER on builds older than 3.32
+    MAX_QUERY_PARAMETERS = 999
+    WRITE_BATCH = 256
+
+    def __init__(self, capacity, path=None, ttl=None, codec=None):
+        if not capacity or capacity < 1:
+            raise ValueError("Please provide a valid capacity for the disk tier.")
+        self.capacity = capacity
+        self.ttl_ms = int(ttl * 1000) if ttl else None
+        self.codec = codec or PickleCodec()
+        self.temporary = path is None
+        if self.temporary:
+            descriptor, path = tempfile.mkstemp(prefix='cache-l2-', suffix='.db')
+            os.close(descriptor)
+        self.path = path
+        # the row count, the demotion counter and the buffers are kept in step with the table, so every
+        # statement runs under this lock
+        self.lock = threading.Lock()
+        # demoted (value, written_at, ttl_ms) per key, not yet written to the file
+        self.pending = {}
+        # keys whose rows were taken or discarded but are not deleted from the file yet
+        self.hidden = set()
+        # keys with a row in the file that is not hidden
+        self.stored = set()
+        self.hits = 0
+        self.misses = 0
+        self.demotions = 0
+        self.evictions = 0
+        self.expirations = 0
+        try:
+            with self.lock:
+                try:
+                    self._open()
+                except sqlite3.DatabaseError as e:
+                    if self.temporary:
+                        raise
+                    # the file is only a cache, so a damaged one is replaced rather than repaired
+                    logging.warning(f"Recreating the disk tier at {path}: {e}")
+                    self.handler.close()
+                    self._remove_files()
+                    self._open()
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            raise StorageException(f"An unexpected error occurred while opening the disk tier at {path}.")
+
+    def __len__(self):
+        return len(self.stored) + len(self.pending)
+
+    def take_many(self, keys) -> dict:
+        # returns (value, written_at, ttl_ms) per key that was held and has not expired under the tier's ttl
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        try:
+            with self.lock:
+                self._write_if_due()
+                entries = {}
+                for key in keys:
+                    entry = self.pending.pop(key, None)
+                    if entry is not None:
+                        entries[key] = entry
+                stored = self._select_stored([key for key in keys if key not in entries],
+                                             'key, value, written_at, ttl_ms')
+                self._hide([key for key, _, _, _ in stored])
+                entries.update((key, (self.codec.decode(value), written_at, ttl_ms))
+                               for key, value, written_at, ttl_ms in stored)
+
+                now = now_ms()
+                found = {}
+                for key, entry in entries.items():
+                    if self.ttl_ms and entry[1] + self.ttl_ms <= now:
+                        self.expirations += 1
+                    else:
+                        found[key] = entry
+                self.hits += len(found)
+                self.misses += len(keys) - len(found)
+                return found
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            raise StorageException(f"An unexpected error occurred while reading {len(keys)} keys from the disk tier.")
+
+    def put_many(self, items):
+        # items are (key, value, written_at, ttl_ms): the write time in milliseconds and the key's own
+        # ttl, or None, which the tier keeps for the cache the key is promoted back into
+        try:
+            with self.lock:
+                for key, value, written_at, ttl_ms in items:
+                    # re-buffering moves the key to the back of the demotion order
+                    self.pending.pop(key, None)
+                    self.pending[key] = (value, written_at, ttl_ms)
+                    self.demotions += 1
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            raise StorageException("An unexpected error occurred while writing to the disk tier.")
+
+    def discard_many(self, keys):
+        # returns the keys that were held, whether or not they had expired
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return []
+        try:
+            with self.lock:
+                self._write_if_due()
+                discarded = [key for key in keys if self.pending.pop(key, None) is not None]
+                stored = [key for key in keys if key in self.stored and key not in discarded]
+                self._hide(stored)
+                return discarded + stored
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            raise StorageException(f"An unexpected error occurred while removing {len(keys)} keys from the disk tier.")
+
+    def flush(self):
+        try:
+            with self.lock:
+                self._write_batch()
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            raise StorageException("An unexpected error occurred while writing to the disk tier.")
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.stored) + len(self.pending),
+                'capacity': self.capacity,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'demotions': self.demotions,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def close(self):
+        try:
+            if not self.temporary:
+                with self.lock:
+                    self._write_batch()
+                    self.handler.connection.execute("UPDATE l2_meta SET value = 1 WHERE name = 'clean';")
+                    self.handler.connection.commit()
+        finally:
+            self.handler.close()
+            if self.temporary:
+                self._remove_files()
+
+    def _open(self):
+        self.handler = DatabaseFactory.get_database_handler(config=dict(DATABASE_CONFIG['sqlite'], name=self.path,
+                                                                         synchronous='OFF'))
+        connection = self.handler.connection
+        connection.execute('CREATE TABLE IF NOT EXISTS l2_cache '
+                           '(key TEXT PRIMARY KEY, value BLOB NOT NULL, written_at INTEGER NOT NULL, ttl_ms INTEGER, '
+                           'sequence INTEGER NOT NULL);')
+        connection.execute('CREATE INDEX IF NOT EXISTS l2_cache_sequence ON l2_cache (sequence);')
+        connection.execute('CREATE TABLE IF NOT EXISTS l2_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);')
+        clean = connection.execute("SELECT value FROM l2_meta WHERE name = 'clean';").fetchone()
+        if not clean or not clean[0]:
+            connection.execute('DELETE FROM l2_cache;')
+        connection.execute("INSERT OR REPLACE INTO l2_meta (name, value) VALUES ('clean', 0);")
+        connection.commit()
+        self.stored = {key for key, in connection.execute('SELECT key FROM l2_cache;')}
+        self.sequence = connection.execute('SELECT COALESCE(MAX(sequence), 0) FROM l2_cache;').fetchone()[0]
+
+    def _write_if_due(self):
+        if len(self.pending) >= min(self.WRITE_BATCH, self.capacity) or len(self.hidden) >= self.WRITE_BATCH:
+            self._write_batch()
+
+    def _write_batch(self):
+        # called with the lock held: deletes the hidden rows and writes the buffered demotions together
+        if not self.pending and not self.hidden:
+            return
+        # a batch that cannot be written is dropped: the store still holds every value in it
+        pending, self.pending = self.pending, {}
+        rows = [(key, self.codec.encode(value), written_at, ttl_ms, sequence)
+                for sequence, (key, (value, written_at, ttl_ms)) in enumerate(pending.items(), self.sequence + 1)]
+        stored = self.stored.union(pending)
+        connection = self.handler.connection
+        try:
+            # every hidden key has a row; a demoted key may still have a stale one
+            self._delete(self.hidden.union(pending))
+            connection.executemany('INSERT INTO l2_cache (key, value, written_at, ttl_ms, sequence) '
+                                   'VALUES (?, ?, ?, ?, ?);', rows)
+            excess = max(len(stored) - self.capacity, 0)
+            trimmed = []
+            if excess:
+                trimmed = [key for key, in connection.execute(
+                    'SELECT key FROM l2_cache ORDER BY sequence LIMIT ?;', (excess,))]
+                self._delete(trimmed)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        self.hidden = set()
+        self.stored = stored.difference(trimmed)
+        self.sequence += len(rows)
+        self.evictions += excess
+
+    def _hide(self, keys):
+        self.hidden.update(keys)
+        self.stored.difference_update(keys)
+
+    def _select_stored(self, keys, columns):
+        keys = [key for key in keys if key in self.stored]
+        rows = []
+        for start in range(0, len(keys), self.MAX_QUERY_PARAMETERS):
+            chunk = keys[start:start + self.MAX_QUERY_PARAMETERS]
+            placeholders = ', '.join('?' * len(chunk))
+            rows.extend(self.handler.connection.execute(
+                f'SELECT {columns} FROM l2_cache WHERE key IN ({placeholders});', chunk))
+        return rows
+
+    def _delete(self, keys):
+        return self.handler.connection.executemany('DELETE FROM l2_cache WHERE key = ?;',
+                                                   [(key,) for key in keys]).rowcount
+
+    def _remove_files(self):
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.unlink(self.path + suffix)
+            except FileNotFoundError:
+                pass
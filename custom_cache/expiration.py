@@ -0,0 +1,84 @@
+import heapq
+
+
+class _Bucket:
+    __slots__ = ('deadline', 'keys')
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.keys = []
+
+
+class ExpirationIndex:
+    """Deadline index so a sweep only touches entries that are due.
+
+    Deadlines are rounded up to `resolution` and keys sharing a rounded deadline share one
+    bucket, so the heap holds one item per distinct tick rather than one per key. Rescheduling or
+    discarding a key leaves its old bucket slot behind; stale slots are skipped when popped and
+    the buckets are rebuilt once they outnumber the live keys.
+    """
+
+    COMPACTION_SLACK = 64
+
+    def __init__(self, resolution=1):
+        self.resolution = resolution
+        self.heap = []
+        self.buckets = {}
+        self.deadlines = {}
+        self.slots = 0
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def __contains__(self, key):
+        return key in self.deadlines
+
+    def schedule(self, key, deadline):
+        if self.resolution != 1:
+            deadline = -(-deadline // self.resolution) * self.resolution
+        bucket = self.buckets.get(deadline)
+        if bucket is None:
+            bucket = self.buckets[deadline] = _Bucket(deadline)
+            heapq.heappush(self.heap, deadline)
+        bucket.keys.append(key)
+        self.deadlines[key] = bucket
+        self.slots += 1
+        if self.slots > 2 * len(self.deadlines) + self.COMPACTION_SLACK:
+            self._compact()
+
+    def discard(self, key):
+        self.deadlines.pop(key, None)
+
+    def deadline(self, key):
+        bucket = self.deadlines.get(key)
+        return bucket.deadline if bucket is not None else None
+
+    def is_due(self, key, now):
+        bucket = self.deadlines.get(key)
+        return bucket is not None and bucket.deadline < now
+
+    def pop_due(self, now):
+        due = []
+        heap = self.heap
+        while heap and heap[0] < now:
+            bucket = self.buckets.pop(heapq.heappop(heap))
+            self.slots -= len(bucket.keys)
+            for key in bucket.keys:
+                if self.deadlines.get(key) is bucket:
+                    del self.deadlines[key]
+                    due.append(key)
+        return due
+
+    def clear(self):
+        self.heap.clear()
+        self.buckets.clear()
+        self.deadlines.clear()
+        self.slots = 0
+
+    def _compact(self):
+        for bucket in self.buckets.values():
+            bucket.keys = [key for key in dict.fromkeys(bucket.keys) if self.deadlines.get(key) is bucket]
+        self.buckets = {deadline: bucket for deadline, bucket in self.buckets.items() if bucket.keys}
+        self.heap = list(self.buckets)
+        heapq.heapify(self.heap)
+        self.slots = sum(len(bucket.keys) for bucket in self.buckets.values())
@@ -0,0 +1,90 @@
+import threading
+
+
+class _Commit:
+    __slots__ = ('writer', 'items', 'done', 'error')
+
+    def __init__(self, writer, items):
+        self.writer = writer
+        self.items = items
+        self.done = False
+        self.error = None
+
+    def wait(self):
+        self.writer.wait(self)
+
+
+class GroupCommitWriter:
+    """Commits the rows of concurrent write-through callers together, one transaction per batch.
+
+    Callers submit() while holding their cache lock, so the queue keeps the order in which the
+    caches applied the writes, and wait() once the lock is released. The first waiter becomes the
+    leader: it takes up to `max_batch` queued rows, writes them with a single write_many call and
+    wakes the callers it carried, then hands over to the next waiter. A caller returns once its
+    own rows are committed, or raises the error that failed their batch. Batches are written one
+    at a time and in queue order, so the store always ends up with the last value submitted.
+    """
+
+    def __init__(self, write_many, max_batch=1000):
+        if max_batch < 1:
+            raise ValueError("Please provide a valid value for max_batch.")
+        self.write_many = write_many
+        self.max_batch = max_batch
+        self.condition = threading.Condition()
+        self.queue = []
+        self.leading = False
+        self.batches = 0
+        self.rows = 0
+
+    def submit(self, items) -> _Commit:
+        commit = _Commit(self, list(items))
+        with self.condition:
+            self.queue.append(commit)
+        return commit
+
+    def write(self, items):
+        self.submit(items).wait()
+
+    def wait(self, commit):
+        while True:
+            with self.condition:
+                while self.leading and not commit.done:
+                    self.condition.wait()
+                if commit.done:
+                    if commit.error is not None:
+                        raise commit.error
+                    return
+                self.leading = True
+                batch = self._take_batch()
+
+            # repeated writes to a key collapse to the last value, which keeps the first key's position
+            rows = {}
+            for queued in batch:
+                rows.update(queued.items)
+            error = None
+            try:
+                if rows:
+                    self.write_many(list(rows.items()))
+            except Exception as e:
+                error = e
+
+            with self.condition:
+                for queued in batch:
+                    queued.done = True
+                    queued.error = error
+                self.leading = False
+                self.batches += 1
+                self.rows += len(rows)
+                self.condition.notify_all()
+
+    def _take_batch(self):
+        # called with the condition held; at least one commit is always taken
+        size = 0
+        taken = 0
+        for commit in self.queue:
+            if taken and size + len(commit.items) > self.max_batch:
+                break
+            size += len(commit.items)
+            taken += 1
+        batch, self.queue = self.queue[:taken], self.queue[taken:]
+        return batch
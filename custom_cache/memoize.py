@@ -0,0 +1,189 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import pickle
+
+from custom_cache.entry import now_ms
+from custom_cache.single_flight import AsyncSingleFlight, SingleFlight
+
+
+class Memoizer:
+    """Keys, reads and writes the results of one memoized function in a cache.
+
+    Keys are the function's qualified name plus a 128-bit blake2b digest of its pickled
+    arguments, or of whatever `key` returns for them. Results are stored as (result, deadline)
+    pairs, so falsy results are cached too and each function keeps its own ttl. Without
+    `persist` results only live in memory; with it they are written through the cache's write
+    policy and read back from the store, which must be able to hold them, e.g. a SqliteService
+    with a PickleCodec. Async functions reach the store on `executor`, the loop's default one
+    when it is None.
+    """
+
+    def __init__(self, cache, func, ttl=None, key=None, persist=False, executor=None):
+        self.cache = cache
+        self.executor = executor
+        self.prefix = f"{func.__module__}.{func.__qualname__}"
+        self.ttl_ms = int(ttl * 1000) if ttl else None
+        self.key_function = key
+        self.persist = persist
+
+    def key_for(self, args, kwargs):
+        if self.key_function is not None:
+            return f"{self.prefix}:{self.key_function(*args, **kwargs)}"
+        try:
+            data = pickle.dumps((args, sorted(kwargs.items())), protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            raise TypeError(f"Cannot hash the arguments of {self.prefix}, pass key= to memoize. Error: {e}")
+        return f"{self.prefix}:{hashlib.blake2b(data, digest_size=16).hexdigest()}"
+
+    def lookup(self, keys) -> dict:
+        if self.persist:
+            found = self.cache.get_many(keys)
+        else:
+            found = self.cache._get_cached_many(keys)[0]
+        now = now_ms()
+        results = {}
+        expired = []
+        for key, (result, deadline) in found.items():
+            if deadline is not None and deadline <= now:
+                expired.append(key)
+            else:
+                results[key] = result
+        if expired:
+            self.cache.remove_many(expired)
+        return results
+
+    def store(self, results: dict):
+        deadline = now_ms() + self.ttl_ms if self.ttl_ms else None
+        entries = {key: (result, deadline) for key, result in results.items()}
+        if self.persist:
+            self.cache.put_many(entries)
+        else:
+            # like a load, a result never replaces one stored while it was computed
+            self.cache._fill_many(entries)
+
+    def invalidate(self, keys):
+        self.cache.remove_many(keys)
+        if self.persist:
+            self.cache.db_service.delete_entries_from_storage(keys)
+
+    async def lookup_async(self, keys) -> dict:
+        # only persisted results can reach the store, so only they leave the event loop
+        if self.persist:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, self.lookup, keys)
+        return self.lookup(keys)
+
+    async def store_async(self, results: dict):
+        if self.persist:
+            await asyncio.get_running_loop().run_in_executor(self.executor, self.store, results)
+        else:
+            self.store(results)
+
+
+def memoize(cache, ttl=None, key=None, persist=False, executor=None):
+    """Decorator caching a sync or async function's results in `cache`, see Memoizer.
+
+    Concurrent calls with the same arguments share one computation. The wrapper gains
+    invalidate(*args, **kwargs), which drops the result for those arguments.
+    """
+
+    def decorator(func):
+        memoizer = Memoizer(cache, func, ttl, key, persist, executor)
+
+        if inspect.iscoroutinefunction(func):
+            calls = AsyncSingleFlight()
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                cache_key = memoizer.key_for(args, kwargs)
+                found = await memoizer.lookup_async([cache_key])
+                if cache_key in found:
+                    return found[cache_key]
+
+                async def compute():
+                    result = await func(*args, **kwargs)
+                    await memoizer.store_async({cache_key: result})
+                    return result
+
+                return await calls.do(cache_key, compute)
+        else:
+            calls = SingleFlight()
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                cache_key = memoizer.key_for(args, kwargs)
+                found = memoizer.lookup([cache_key])
+                if cache_key in found:
+                    return found[cache_key]
+
+                def compute():
+                    result = func(*args, **kwargs)
+                    memoizer.store({cache_key: result})
+                    return result
+
+                return calls.do(cache_key, compute)
+
+        wrapper.invalidate = lambda *args, **kwargs: memoizer.invalidate([memoizer.key_for(args, kwargs)])
+        return wrapper
+
+    return decorator
+
+
+def memoize_many(cache, ttl=None, key=None, persist=False, executor=None):
+    """Decorator for vectorised functions that take a list of arguments and return their results in order.
+
+    Each argument is cached on its own, as memoize() would for a one-argument function, and only
+    the missing ones are passed to the function, in one call. The wrapper gains
+    invalidate(*arguments).
+    """
+
+    def decorator(func):
+        memoizer = Memoizer(cache, func, ttl, key, persist, executor)
+
+        def split(arguments):
+            arguments = list(arguments)
+            keys = [memoizer.key_for((argument,), {}) for argument in arguments]
+            return arguments, keys
+
+        def missing(arguments, keys, found):
+            # the first argument of each uncached key, so duplicates are computed once
+            pending = {}
+            for argument, cache_key in zip(arguments, keys):
+                if cache_key not in found:
+                    pending.setdefault(cache_key, argument)
+            return pending
+
+        def check(pending, results):
+            results = list(results)
+            if len(results) != len(pending):
+                raise ValueError(f"{memoizer.prefix} returned {len(results)} results for {len(pending)} arguments.")
+            return dict(zip(pending, results))
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(arguments):
+                arguments, keys = split(arguments)
+                found = await memoizer.lookup_async(list(dict.fromkeys(keys)))
+                pending = missing(arguments, keys, found)
+                if pending:
+                    computed = check(pending, await func(list(pending.values())))
+                    await memoizer.store_async(computed)
+                    found.update(computed)
+                return [found[cache_key] for cache_key in keys]
+        else:
+            @functools.wraps(func)
+            def wrapper(arguments):
+                arguments, keys = split(arguments)
+                found = memoizer.lookup(list(dict.fromkeys(keys)))
+                pending = missing(arguments, keys, found)
+                if pending:
+                    computed = check(pending, func(list(pending.values())))
+                    memoizer.store(computed)
+                    found.update(computed)
+                return [found[cache_key] for cache_key in keys]
+
+        wrapper.invalidate = lambda *arguments: memoizer.invalidate(split(arguments)[1])
+        return wrapper
+
+    return decorator
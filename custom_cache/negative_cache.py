@@ -0,0 +1,70 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class NegativeCache:
+    """Bounded, short-lived record of keys the store reported as absent.
+
+    Disabled when ttl is falsy, in which case every check is a cheap no-op. Writes bump a
+    generation, striped by key hash, and a load passes the generation it read before querying
+    the store to add(), so a key written while the store was being read is never recorded as
+    absent. Keys sharing a stripe only make that check more cautious.
+    """
+
+    GENERATION_STRIPES = 1024
+
+    def __init__(self, ttl=None, capacity=1024):
+        self.ttl = ttl
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.generations = [0] * self.GENERATION_STRIPES
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def enabled(self):
+        return bool(self.ttl)
+
+    def contains(self, key):
+        if not self.entries:
+            return False
+        with self.lock:
+            expires_at = self.entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.time():
+                del self.entries[key]
+                return False
+            return True
+
+    def generation(self, key):
+        return self.generations[hash(key) % self.GENERATION_STRIPES]
+
+    def add(self, key, generation):
+        if not self.ttl:
+            return
+        with self.lock:
+            if self.generation(key) != generation:
+                return
+            self.entries[key] = time.time() + self.ttl
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        if self.ttl:
+            with self.lock:
+                self._discard(key)
+
+    def discard_many(self, keys):
+        if self.ttl:
+            with self.lock:
+                for key in keys:
+                    self._discard(key)
+
+    def _discard(self, key):
+        self.generations[hash(key) % self.GENERATION_STRIPES] += 1
+        self.entries.pop(key, None)
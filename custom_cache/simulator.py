@@ -0,0 +1,275 @@
+import argparse
+import codecs
+import inspect
+import json
+import threading
+from collections import Counter
+from functools import wraps
+
+from custom_cache.cache_enum import EvictionCause, EvictionPolicy
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.storage_service import StorageService
+
+# trace lines are "<op>\t<key>"; keys are escaped so tabs and newlines survive the round trip
+TRACE_OPERATIONS = ('get', 'put', 'remove')
+
+
+def _escape(key):
+    return codecs.encode(str(key), 'unicode_escape').decode('ascii')
+
+
+def _unescape(key):
+    return codecs.decode(key, 'unicode_escape')
+
+
+def read_trace(path):
+    """Stream (op, key) pairs from a trace file; a line holding only a key counts as a get."""
+    with open(path, encoding='ascii') as trace:
+        for line in trace:
+            line = line.rstrip('\n')
+            if not line or line.startswith('#'):
+                continue
+            operation, separator, key = line.partition('\t')
+            if not separator:
+                operation, key = 'get', operation
+            elif operation not in TRACE_OPERATIONS:
+                raise ValueError(f"Unknown trace operation: {operation}")
+            yield operation, _unescape(key)
+
+
+class NullStorage(StorageService):
+    """A store that holds nothing and accepts every write, so replays never touch I/O."""
+
+    def __init__(self):
+        super().__init__(None)
+
+    def get_entry_from_storage(self, key):
+        return None
+
+    def get_entries_from_storage(self, keys):
+        return {}
+
+    def insert_entry_in_storage(self, key, value):
+        pass
+
+    def insert_entries_in_storage(self, items):
+        pass
+
+
+def simulate(trace, eviction_policy, capacity, **options):
+    """Replay (op, key) pairs through one policy's eviction logic.
+
+    Every get or put is a request and counts as a hit when the key is already resident. A
+    missed get is filled on demand, as a read-through cache would be, with no storage or
+    write-policy I/O on the way.
+    """
+    cache = CacheFactory.create_cache(eviction_policy, capacity, NullStorage(), refresh_check=1, **options)
+    resident, lookup, insert = cache.cache, cache._lookup, cache._insert
+    requests = hits = 0
+    for operation, key in trace:
+        if operation == 'remove':
+            if key in resident:
+                cache._remove_entry(key, EvictionCause.EXPLICIT)
+            continue
+        requests += 1
+        if key in resident and operation == 'get':
+            hits += 1
+            # no ttl is set, so the clock passed to the lookup is never consulted
+            lookup(key, 0)
+        else:
+            hits += key in resident
+            insert(key, True)
+    cache.close()
+    return {
+        'policy': eviction_policy.value,
+        'capacity': capacity,
+        'requests': requests,
+        'hits': hits,
+        'hit_ratio': hits / requests if requests else 0.0,
+    }
+
+
+class _FenwickTree:
+
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, position, delta):
+        tree = self.tree
+        while position <= self.size:
+            tree[position] += delta
+            position += position & -position
+
+    def prefix_sum(self, position):
+        tree = self.tree
+        total = 0
+        while position > 0:
+            total += tree[position]
+            position -= position & -position
+        return total
+
+
+def lru_miss_ratio_curve(trace, capacities=None):
+    """Exact LRU hit ratios for every capacity from one pass over the trace (Mattson et al.).
+
+    A request's stack distance is the number of distinct keys touched since the previous
+    request for the same key. It hits in an LRU cache of capacity C exactly when that distance
+    is at most C. Distances come from a Fenwick tree over request times that marks each key's
+    latest request. The tree is renumbered whenever it fills up, so memory follows the number
+    of distinct keys rather than the trace length. Returns one point per capacity, or per
+    distinct distance when `capacities` is None.
+
+    The curve is exact for get/put traces. A remove drops the key from the stack, while a real
+    cache does not get back the key it evicted earlier, so removals can slightly overstate hits.
+    """
+    last_seen = {}
+    distances = Counter()
+    requests = 0
+    tree = _FenwickTree(1024)
+    clock = 0
+    for operation, key in trace:
+        previous = last_seen.pop(key, None)
+        if previous is not None:
+            tree.add(previous, -1)
+        if operation == 'remove':
+            continue
+        requests += 1
+        if previous is not None:
+            # keys marked after the previous request, plus the key itself
+            distances[tree.prefix_sum(clock) - tree.prefix_sum(previous) + 1] += 1
+        if clock == tree.size:
+            tree, clock = _renumber(last_seen)
+        clock += 1
+        tree.add(clock, 1)
+        last_seen[key] = clock
+
+    if capacities is None:
+        capacities = sorted(distances)
+    curve = []
+    cumulative = 0
+    ordered = sorted(distances.items())
+    index = 0
+    for capacity in sorted(capacities):
+        while index < len(ordered) and ordered[index][0] <= capacity:
+            cumulative += ordered[index][1]
+            index += 1
+        hit_ratio = cumulative / requests if requests else 0.0
+        curve.append({'capacity': capacity, 'hit_ratio': hit_ratio, 'miss_ratio': 1 - hit_ratio})
+    return curve
+
+
+def _renumber(last_seen):
+    # keep the recency order of live keys but pack them into 1..n, leaving room to grow
+    tree = _FenwickTree(max(1024, 2 * len(last_seen)))
+    clock = 0
+    for key in sorted(last_seen, key=last_seen.get):
+        clock += 1
+        last_seen[key] = clock
+        tree.add(clock, 1)
+    return tree, clock
+
+
+class TraceRecorder:
+    """Appends the keys a live cache is asked for to a trace that read_trace can replay.
+
+    attach() wraps the public operations of a Cache, ShardedCache or AsyncCache instance and
+    detach() restores them. Only the operation and key are written, never values, and keys are
+    replayed as strings.
+    """
+
+    OPERATIONS = {
+        'get': ('get', False), 'put': ('put', False), 'remove': ('remove', False),
+        'get_many': ('get', True), 'put_many': ('put', True), 'remove_many': ('remove', True),
+    }
+
+    def __init__(self, path):
+        self.file = open(path, 'a', encoding='ascii')
+        self.lock = threading.Lock()
+        # id(cache) -> (cache, the instance attributes the wrappers replaced)
+        self.attached = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def record(self, operation, keys):
+        lines = ''.join(f"{operation}\t{_escape(key)}\n" for key in keys)
+        with self.lock:
+            self.file.write(lines)
+
+    def attach(self, cache):
+        replaced = {}
+        for name, (operation, many) in self.OPERATIONS.items():
+            method = getattr(cache, name, None)
+            if method is not None:
+                # latency histograms install their own wrappers as instance attributes
+                replaced[name] = cache.__dict__.get(name)
+                setattr(cache, name, self._wrap(method, operation, many))
+        self.attached[id(cache)] = (cache, replaced)
+        return cache
+
+    def detach(self, cache):
+        _, replaced = self.attached.pop(id(cache))
+        for name, previous in replaced.items():
+            if previous is None:
+                del cache.__dict__[name]
+            else:
+                setattr(cache, name, previous)
+
+    def close(self):
+        for cache, _ in list(self.attached.values()):
+            self.detach(cache)
+        with self.lock:
+            self.file.close()
+
+    def _wrap(self, method, operation, many):
+        if inspect.iscoroutinefunction(method):
+            @wraps(method)
+            async def async_wrapper(*args, **kwargs):
+                args = self._record_call(operation, many, args)
+                return await method(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            args = self._record_call(operation, many, args)
+            return method(*args, **kwargs)
+        return wrapper
+
+    def _record_call(self, operation, many, args):
+        if not many:
+            self.record(operation, (args[0],))
+            return args
+        # materialise one-shot iterables so both the trace and the cache see every key
+        items = args[0]
+        if operation == 'put':
+            items = list(items.items() if isinstance(items, dict) else items)
+            self.record(operation, [key for key, _ in items])
+        else:
+            items = list(items)
+            self.record(operation, items)
+        return (items,) + args[1:]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m custom_cache.simulator',
+                                     description="Replay a key trace and report hit ratios per policy and capacity.")
+    parser.add_argument('trace')
+    parser.add_argument('--capacities', nargs='+', type=int, required=True)
+    parser.add_argument('--policies', nargs='+', default=[policy.value for policy in EvictionPolicy],
+                        choices=[policy.value for policy in EvictionPolicy])
+    parser.add_argument('--mrc', action='store_true', help="also compute the exact LRU curve in one pass")
+    args = parser.parse_args(argv)
+
+    report = {'results': [simulate(read_trace(args.trace), EvictionPolicy(policy), capacity)
+                          for policy in args.policies for capacity in args.capacities]}
+    if args.mrc:
+        report['lru_miss_ratio_curve'] = lru_miss_ratio_curve(read_trace(args.trace), args.capacities)
+    print(json.dumps(report, indent=1, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one loader per key at a time; concurrent callers share its result or error."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def __len__(self):
+        return len(self.calls)
+
+    def do(self, key, loader):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = loader()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.event.set()
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight; the loader is a coroutine function."""
+
+    def __init__(self):
+        self.calls = {}
+
+    def __len__(self):
+        return len(self.calls)
+
+    async def do(self, key, loader):
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(loader())
+            self.calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        # shield so one cancelled caller does not cancel the load for everyone else
+        return await asyncio.shield(task)
+
+    def _forget(self, key, task):
+        if self.calls.get(key) is task:
+            del self.calls[key]
@@ -0,0 +1,83 @@
+import os
+import pickle
+import struct
+
+MAGIC = b'CCSNAP'
+VERSION = 2
+HEADER = struct.Struct('<6sH')
+FRAME = struct.Struct('<Q')
+# records are pickled in frames, so a load never holds more than one frame of raw bytes
+RECORDS_PER_FRAME = 4096
+
+
+def write_snapshot(path, header, records):
+    """Write a snapshot file: a header frame, then frames of records, then an empty end frame.
+
+    Each record is a (key, value, timestamp, segment, count, dirty, ttl_ms) tuple, where ttl_ms
+    is the key's own ttl or None. The file is written next to `path` and renamed into place,
+    so a crash mid-write never leaves a torn snapshot.
+    """
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'wb') as snapshot:
+        snapshot.write(HEADER.pack(MAGIC, VERSION))
+        _write_frame(snapshot, header)
+        for start in range(0, len(records), RECORDS_PER_FRAME):
+            _write_frame(snapshot, records[start:start + RECORDS_PER_FRAME])
+        snapshot.write(FRAME.pack(0))
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(temporary_path, path)
+
+
+class SnapshotReader:
+    """Streams a snapshot written by write_snapshot one frame at a time.
+
+    Frames are pickled, so only load snapshots this cache wrote itself.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            magic, version = HEADER.unpack(self._read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a cache snapshot.")
+            if version != VERSION:
+                raise ValueError(f"Unsupported snapshot version {version}.")
+            self.header = self._read_frame()
+        except Exception:
+            self.file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def batches(self):
+        while True:
+            batch = self._read_frame()
+            if batch is None:
+                return
+            yield batch
+
+    def close(self):
+        self.file.close()
+
+    def _read_frame(self):
+        length, = FRAME.unpack(self._read(FRAME.size))
+        if not length:
+            return None
+        return pickle.loads(self._read(length))
+
+    def _read(self, size):
+        data = self.file.read(size)
+        if len(data) != size:
+            raise ValueError("Snapshot is truncated.")
+        return data
+
+
+def _write_frame(snapshot, payload):
+    data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    snapshot.write(FRAME.pack(len(data)))
+    snapshot.write(data)
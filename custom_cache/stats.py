@@ -0,0 +1,156 @@
+import threading
+import time
+from functools import wraps
+
+from custom_cache.cache_enum import EvictionCause
+
+
+class LatencyHistogram:
+    """Nanosecond latencies in log-linear buckets: four per power of two.
+
+    Recording is a bit_length(), a shift and one list increment. Percentiles are reported as
+    the upper bound of their bucket, which is at most 25% above any latency in it.
+    """
+
+    BUCKETS = 256
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    @staticmethod
+    def bucket(elapsed_ns):
+        # below 8ns every latency gets its own bucket
+        if elapsed_ns < 8:
+            return elapsed_ns
+        # log-linear: the leading bit picks the power of two and the next two bits pick one of
+        # its four buckets
+        shift = elapsed_ns.bit_length() - 3
+        return (shift << 2) + (elapsed_ns >> shift)
+
+    @staticmethod
+    def upper_bound(bucket):
+        if bucket < 8:
+            return bucket
+        shift = (bucket >> 2) - 1
+        return ((bucket - (shift << 2) + 1) << shift) - 1
+
+    def record(self, elapsed_ns):
+        self.counts[self.bucket(elapsed_ns)] += 1
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def merge(self, other):
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0
+        rank = fraction * self.count
+        seen = 0
+        for bucket, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self.upper_bound(bucket), self.max_ns)
+        return self.max_ns
+
+    def snapshot(self):
+        return {
+            'count': self.count,
+            'mean_us': self.total_ns / self.count / 1000 if self.count else 0.0,
+            'p50_us': self.percentile(0.5) / 1000,
+            'p99_us': self.percentile(0.99) / 1000,
+            'p999_us': self.percentile(0.999) / 1000,
+            'max_us': self.max_ns / 1000,
+        }
+
+
+class CacheStats:
+    """Counters for one Cache.
+
+    Hit, miss, eviction and refresh counters are plain ints bumped while the cache lock is
+    already held. Storage reads and the optional per-operation histograms are recorded outside
+    that lock, so they take a small lock of their own.
+    """
+
+    def __init__(self, latency_histograms=False):
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.loaded_keys = 0
+        self.load_failures = 0
+        self.load = LatencyHistogram()
+        self.evictions = dict.fromkeys(EvictionCause, 0)
+        self.refreshes = 0
+        self.latency = {} if latency_histograms else None
+        self.lock = threading.Lock()
+
+    @classmethod
+    def combine(cls, stats):
+        combined = cls()
+        for other in stats:
+            combined.hits += other.hits
+            combined.misses += other.misses
+            combined.loads += other.loads
+            combined.loaded_keys += other.loaded_keys
+            combined.load_failures += other.load_failures
+            combined.load.merge(other.load)
+            for cause, count in other.evictions.items():
+                combined.evictions[cause] += count
+            combined.refreshes += other.refreshes
+            if other.latency is not None:
+                if combined.latency is None:
+                    combined.latency = {}
+                for operation, histogram in other.latency.items():
+                    combined.latency.setdefault(operation, LatencyHistogram()).merge(histogram)
+        return combined
+
+    def record_load(self, keys, elapsed_ns, failed=False):
+        with self.lock:
+            self.loads += 1
+            self.loaded_keys += keys
+            self.load_failures += failed
+            self.load.record(elapsed_ns)
+
+    def record_latency(self, operation, elapsed_ns):
+        with self.lock:
+            histogram = self.latency.get(operation)
+            if histogram is None:
+                histogram = self.latency[operation] = LatencyHistogram()
+            histogram.record(elapsed_ns)
+
+    def timed(self, operation, func):
+        # installed over a bound method only when histograms are on, so the default path pays nothing
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record_latency(operation, time.perf_counter_ns() - start)
+        return wrapper
+
+    def snapshot(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            snapshot = {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'loads': self.loads,
+                'loaded_keys': self.loaded_keys,
+                'load_failures': self.load_failures,
+                'load_latency': self.load.snapshot(),
+                'evictions': {cause.value: count for cause, count in self.evictions.items()},
+                'refreshes': self.refreshes,
+            }
+            if self.latency is not None:
+                snapshot['latency'] = {operation: histogram.snapshot() for operation, histogram in self.latency.items()}
+            return snapshot
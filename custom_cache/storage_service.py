@@ -1,6 +1,8 @@
 import logging
 import sqlite3
+import sys
 
+from custom_cache.bloom_filter import BloomFilter
 from custom_cache.exceptions import *
 
 
@@ -8,18 +10,62 @@ class StorageService:
     def __init__(self, db_handler):
         self.db_handler = db_handler
 
+    def might_contain(self, key):
+        return True
+
+    def pop_promoted(self, key):
+        # (written_at, ttl_ms) of a value just handed back by a lower cache tier, for services that have one
+        return None
+
 
 class SqliteService(StorageService):
-    def __init__(self, db_handler):
+    """The cache_storage table. With a codec, values are encoded to BLOBs on write and decoded on read;
+    without one they are handed to sqlite3 as they are."""
+
+    # SQLITE_MAX_VARIABLE_NUMBER on builds older than 3.32
+    MAX_QUERY_PARAMETERS = 999
+
+    def __init__(self, db_handler, codec=None):
         super().__init__(db_handler)
+        self.codec = codec
+        # optional filter over the stored keys; only keys written through this service are added
+        self.bloom_filter = None
+        self.building_bloom_filter = None
 
-    def create_cache_storage_table(self):
+    def might_contain(self, key):
+        return self.bloom_filter is None or key in self.bloom_filter
+
+    def build_bloom_filter(self, expected_items=None, false_positive_rate=0.01):
         try:
+            with self.db_handler.lock:
+                cursor = self.db_handler.connection.cursor()
+                count = cursor.execute('SELECT COUNT(*) FROM cache_storage;').fetchone()[0]
+                # leave headroom for keys inserted after start-up
+                bloom_filter = BloomFilter(max(expected_items or 0, count * 2, 1024), false_positive_rate)
+                self.building_bloom_filter = bloom_filter
+                for (key,) in cursor.execute('SELECT key FROM cache_storage;'):
+                    bloom_filter.add(key)
+                self.bloom_filter = bloom_filter
+                self.building_bloom_filter = None
+            return bloom_filter
 
-            self.db_handler.cursor.execute('''
-                CREATE TABLE IF NOT EXISTS cache_storage (key TEXT PRIMARY KEY, value TEXT )
-                ''')
-            self.db_handler.connection.commit()
+        except Exception as e:
+            self.building_bloom_filter = None
+            logging.error(f"Unexpected error: {e}")
+            raise StorageException("An unexpected error occurred while building the bloom filter from storage.")
+
+    def _track_keys(self, keys):
+        for bloom_filter in (self.bloom_filter, self.building_bloom_filter):
+            if bloom_filter is not None:
+                bloom_filter.update(keys)
+
+    def create_cache_storage_table(self):
+        try:
+            with self.db_handler.lock:
+                self.db_handler.cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS cache_storage (key TEXT PRIMARY KEY, value %s )
+                    ''' % ('BLOB' if self.codec else 'TEXT'))
+                self.db_handler.connection.commit()
 
         except sqlite3.OperationalError as e:
             logging.error(f"Operational error creating cache table: {e}")
@@ -30,36 +76,157 @@ class SqliteService(StorageService):
 
     def insert_entry_in_storage(self, key, value):
         try:
-
-            self.db_handler.cursor.execute('INSERT OR REPLACE INTO cache_storage (key, value) VALUES (?, ?);', (key, value))
-            self.db_handler.connection.commit()
+            with self.db_handler.lock:
+                self.db_handler.cursor.execute('INSERT OR REPLACE INTO cache_storage (key, value) VALUES (?, ?);',
+                                               (key, self._encode(value)))
+                self.db_handler.connection.commit()
+            self._track_keys((key,))
 
         except Exception:
             raise StorageException(f"An unexpected error occurred while writing to the storage: {key}-{value}")
 
-    def get_entry_from_storage(self, key):
+    def insert_entries_in_storage(self, entries):
         try:
+            with self.db_handler.lock:
+                with self.db_handler.connection:
+                    self.db_handler.cursor.executemany('INSERT OR REPLACE INTO cache_storage (key, value) VALUES (?, ?);',
+                                                       [(key, self._encode(value)) for key, value in entries])
+            self._track_keys(key for key, _ in entries)
 
-            self.db_handler.cursor.execute("SELECT value FROM cache_storage WHERE KEY=?;", (key,))
-            result = self.db_handler.cursor.fetchone()
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            raise StorageException(f"An unexpected error occurred while writing {len(entries)} entries to the storage.")
 
-            if result:
-                return result[0]
-            return None
+    def delete_entries_from_storage(self, keys):
+        try:
+            keys = list(keys)
+            with self.db_handler.lock:
+                with self.db_handler.connection:
+                    self.db_handler.cursor.executemany('DELETE FROM cache_storage WHERE key = ?;', [(key,) for key in keys])
+
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            raise StorageException(f"An unexpected error occurred while deleting {len(keys)} keys from the storage.")
+
+    def get_entry_from_storage(self, key):
+        try:
+            with self.db_handler.lock:
+                self.db_handler.cursor.execute("SELECT value FROM cache_storage WHERE KEY=?;", (key,))
+                result = self.db_handler.cursor.fetchone()
+
+                if result:
+                    return self._decode(result[0])
+                return None
 
         except Exception as e:
             logging.error(f"Unexpected error: {e}")
             raise StorageException(f"An unexpected error occurred while reading key '{key}' from storage.")
 
-    def fetch_all_keys_from_storage(self):
+    def get_entries_from_storage(self, keys):
         try:
+            with self.db_handler.lock:
+                keys = list(keys)
+                results = {}
+                for start in range(0, len(keys), self.MAX_QUERY_PARAMETERS):
+                    chunk = self._pad_parameters(keys[start:start + self.MAX_QUERY_PARAMETERS])
+                    placeholders = ', '.join('?' * len(chunk))
+                    self.db_handler.cursor.execute(f"SELECT key, value FROM cache_storage WHERE KEY IN ({placeholders});",
+                                                   chunk)
+                    results.update((key, self._decode(value)) for key, value in self.db_handler.cursor.fetchall())
+                return results
+
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            raise StorageException(f"An unexpected error occurred while reading {len(keys)} keys from storage.")
+
+    def iter_keys(self, prefix=None, start=None, stop=None, page_size=1000):
+        # keys in order, from start (inclusive) to stop (exclusive) and/or starting with prefix
+        for page in self._iter_pages('key', prefix, start, stop, page_size):
+            yield from (key for key, in page)
+
+    def iter_items(self, prefix=None, start=None, stop=None, page_size=1000):
+        for page in self._iter_pages('key, value', prefix, start, stop, page_size):
+            yield from ((key, self._decode(value)) for key, value in page)
+
+    def _iter_pages(self, columns, prefix, start, stop, page_size):
+        # keyset pagination: each page seeks past the last key of the one before through the primary
+        # key index, so every page costs the same and the lock is only held while a page is read
+        if page_size < 1:
+            raise ValueError("Please provide a valid page_size.")
+        if prefix:
+            start = prefix if start is None else max(start, prefix)
+            prefix_stop = self._prefix_stop(prefix)
+            if prefix_stop is not None:
+                stop = prefix_stop if stop is None else min(stop, prefix_stop)
+        conditions, bounds = [], []
+        if start is not None:
+            conditions.append('key >= ?')
+            bounds.append(start)
+        if stop is not None:
+            conditions.append('key < ?')
+            bounds.append(stop)
+
+        last_key = None
+        while True:
+            where, parameters = list(conditions), list(bounds)
+            if last_key is not None:
+                where.append('key > ?')
+                parameters.append(last_key)
+            clause = f"WHERE {' AND '.join(where)} " if where else ''
+            try:
+                with self.db_handler.lock:
+                    self.db_handler.cursor.execute(f"SELECT {columns} FROM cache_storage {clause}ORDER BY key LIMIT ?;",
+                                                   parameters + [page_size])
+                    page = self.db_handler.cursor.fetchall()
+            except Exception as e:
+                logging.error(f"Unexpected error: {e}")
+                raise StorageException(f"An unexpected error occurred while reading a page of keys from storage.")
+
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            last_key = page[-1][0]
+
+    @staticmethod
+    def _prefix_stop(prefix):
+        # the smallest string above every key starting with prefix, None if there is none
+        prefix = prefix.rstrip(chr(sys.maxunicode))
+        if not prefix:
+            return None
+        following = ord(prefix[-1]) + 1
+        # surrogates cannot be encoded for sqlite, and no key holds one
+        if 0xD800 <= following <= 0xDFFF:
+            following = 0xE000
+        return prefix[:-1] + chr(following)
+
+    def _encode(self, value):
+        return value if self.codec is None else self.codec.encode(value)
+
+    def _decode(self, data):
+        # rows written before the codec was configured are still plain TEXT
+        if self.codec is None or not isinstance(data, bytes):
+            return data
+        return self.codec.decode(data)
+
+    def _pad_parameters(self, chunk):
+        # round the IN list up to a power of two so a handful of statement shapes stay in the
+        # connection's prepared-statement cache; repeating a key does not change the result
+        size = 1
+        while size < len(chunk):
+            size *= 2
+        size = min(size, self.MAX_QUERY_PARAMETERS)
+        return chunk + [chunk[-1]] * (size - len(chunk))
 
-            self.db_handler.cursor.execute('SELECT * FROM cache_storage;')
-            result = self.db_handler.cursor.fetchall()
+    def fetch_all_keys_from_storage(self):
+        try:
+            with self.db_handler.lock:
+                self.db_handler.cursor.execute('SELECT * FROM cache_storage;')
+                result = self.db_handler.cursor.fetchall()
 
-            if result is None:
-                raise KeyNotFoundException(f"Data not found in the storage.")
-            return result
+                if result is None:
+                    raise KeyNotFoundException(f"Data not found in the storage.")
+                return [(key, self._decode(value)) for key, value in result]
 
         except KeyNotFoundException as e:
             logging.warning(e)
@@ -0,0 +1,102 @@
+import json
+import pickle
+import zlib
+
+from custom_cache.exceptions import InvalidValueException
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+class Codec:
+    """Turns a value into bytes and back.
+
+    decode() accepts any bytes-like object, including a memoryview over a larger buffer, so
+    codecs can be stacked without copying the payload between them.
+    """
+
+    def encode(self, value) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data):
+        raise NotImplementedError
+
+
+class PickleCodec(Codec):
+    # any picklable value; only decode data this process family wrote itself
+
+    def encode(self, value) -> bytes:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def decode(self, data):
+        return pickle.loads(data)
+
+
+class JsonCodec(Codec):
+    # JSON-compatible values; tuples come back as lists
+
+    def encode(self, value) -> bytes:
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode()
+
+    def decode(self, data):
+        return json.loads(str(data, 'utf-8'))
+
+
+class MsgpackCodec(Codec):
+    """Compact binary encoding of JSON-like values, needs the optional msgpack package."""
+
+    def __init__(self):
+        if msgpack is None:
+            raise ImportError("MsgpackCodec needs the msgpack package: pip install msgpack")
+
+    def encode(self, value) -> bytes:
+        return msgpack.packb(value, use_bin_type=True)
+
+    def decode(self, data):
+        return msgpack.unpackb(data, raw=False)
+
+
+class RawCodec(Codec):
+    # bytes values stored as they are
+
+    def encode(self, value) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        if isinstance(value, (bytearray, memoryview)):
+            return bytes(value)
+        raise InvalidValueException(f"RawCodec stores bytes values, not {type(value).__name__}.")
+
+    def decode(self, data):
+        return data if isinstance(data, bytes) else bytes(data)
+
+
+class CompressingCodec(Codec):
+    """Wraps another codec and zlib-compresses its output once it reaches `threshold` bytes.
+
+    Encoded data starts with one flag byte. Output that does not shrink is kept as it is, so
+    incompressible values cost only the flag.
+    """
+
+    PLAIN, ZLIB = b'\x00', b'\x01'
+
+    def __init__(self, codec=None, threshold=1024, level=6):
+        self.codec = codec or PickleCodec()
+        self.threshold = threshold
+        self.level = level
+
+    def encode(self, value) -> bytes:
+        data = self.codec.encode(value)
+        if len(data) >= self.threshold:
+            compressed = zlib.compress(data, self.level)
+            if len(compressed) < len(data):
+                return self.ZLIB + compressed
+        return self.PLAIN + data
+
+    def decode(self, data):
+        view = memoryview(data)
+        # slicing a memoryview shares the buffer, so the payload is never copied to drop the flag
+        if view[:1] == self.ZLIB:
+            return self.codec.decode(zlib.decompress(view[1:]))
+        return self.codec.decode(view[1:])
@@ -1,56 +1,219 @@
+import logging
+import threading
 from abc import ABC, abstractmethod
 
 from custom_cache import WritePolicy
 from custom_cache.exceptions import CacheException
+from custom_cache.group_commit import GroupCommitWriter
+
+# distinguishes a missing dirty entry from a dirty entry whose value is None
+MISSING = object()
 
 
 class WritePolicyBase(ABC):
 
-    def __init__(self, write_callback):
+    def __init__(self, write_callback, write_many_callback=None):
         self.write_callback = write_callback
+        self.write_many_callback = write_many_callback
 
     @abstractmethod
     def write(self, key, value):
         pass
 
+    def write_many(self, items):
+        for key, value in items:
+            self.write(key, value)
+
+    def evict_many(self, items):
+        for key, value in items:
+            self.evict(key, value)
+
+    def reserve(self, keys):
+        # called before the cache lock is taken, so a policy can throttle writers without stalling readers
+        pass
+
+    def _write_batch(self, items):
+        if not items:
+            return
+        if self.write_many_callback and len(items) > 1:
+            self.write_many_callback(items)
+        else:
+            for key, value in items:
+                self.write_callback(key, value)
+
 
 class WriteThroughPolicy(WritePolicyBase):
 
+    def __init__(self, write_callback, write_many_callback=None, commit_writer=None):
+        super().__init__(write_callback, write_many_callback)
+        # writes are queued under the cache lock, which keeps them in the order the cache applied them,
+        # and the returned commit is awaited by the caller once the lock is released, so readers never
+        # wait on the store. Without a shared GroupCommitWriter every caller's rows go in a write of their own.
+        self.commit_writer = commit_writer or GroupCommitWriter(self._write_batch, max_batch=1)
+
     def write(self, key, value):
-        self.write_callback(key, value)
+        return self.commit_writer.submit([(key, value)])
+
+    def write_many(self, items):
+        return self.commit_writer.submit(items)
 
     def evict(self, key, value):
         pass
 
+    def evict_many(self, items):
+        pass
+
+    def is_dirty(self, key):
+        return False
+
+    @property
+    def pending(self):
+        return 0
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
 
 class WriteBackPolicy(WritePolicyBase):
 
-    def __init__(self, write_callback):
-        super().__init__(write_callback)
-        self.dirty = set()
+    def __init__(self, write_callback, write_many_callback=None, flush_interval=None, flush_threshold=1000,
+                 max_dirty=None):
+        super().__init__(write_callback, write_many_callback)
+        # latest value per dirty key, so repeated writes to a key coalesce into one store write
+        self.dirty = {}
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.max_dirty = max_dirty
+        self.condition = threading.Condition()
+        # held across store writes so an older batch can never land after a newer one
+        self.write_lock = threading.Lock()
+        self.flusher = None
+        self.closed = False
+
+    def reserve(self, keys):
+        # backpressure: writers wait for the flusher to make room below the high-water mark. Concurrent
+        # writers can each pass before either enqueues, so the mark may be overshot by their keys.
+        if not self.max_dirty:
+            return
+        keys = set(keys)
+        with self.condition:
+            while self.dirty and not self.closed and len(self.dirty) + len(keys - self.dirty.keys()) > self.max_dirty:
+                self._start_flusher()
+                self.condition.notify_all()
+                self.condition.wait()
 
     def write(self, key, value):
-        self.dirty.add(key)
+        with self.condition:
+            self.dirty[key] = value
+            self._notify_flusher()
 
-    def evict(self, key, value):
-        if key in self.dirty:
-            self.write_callback(key, value)
-            self.dirty.remove(key)
+    def write_many(self, items):
+        with self.condition:
+            for key, value in items:
+                self.dirty[key] = value
+            self._notify_flusher()
 
-    def flush(self, cache):
-        for key in list(self.dirty):
-            value, _ = cache.cache[key]
+    def evict(self, key, value):
+        with self.condition:
+            if self.dirty.pop(key, MISSING) is MISSING:
+                return
+            self.condition.notify_all()
+            self.write_lock.acquire()
+        try:
             self.write_callback(key, value)
-            self.dirty.remove(key)
+        finally:
+            self.write_lock.release()
+
+    def evict_many(self, items):
+        with self.condition:
+            dirty_items = [(key, value) for key, value in items if self.dirty.pop(key, MISSING) is not MISSING]
+            self.condition.notify_all()
+            self.write_lock.acquire()
+        try:
+            self._write_batch(dirty_items)
+        finally:
+            self.write_lock.release()
+
+    def is_dirty(self, key):
+        return key in self.dirty
+
+    @property
+    def pending(self):
+        # write-back queue depth: dirty keys not yet handed to the store
+        return len(self.dirty)
+
+    def flush(self):
+        with self.condition:
+            batch = self._take_batch()
+        self._persist(batch)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        if self.flusher and self.flusher is not threading.current_thread():
+            self.flusher.join()
+        self.flush()
+
+    def _notify_flusher(self):
+        if self.flush_interval or self.flush_threshold or self.max_dirty:
+            self._start_flusher()
+        if self.flush_threshold and len(self.dirty) >= self.flush_threshold:
+            self.condition.notify_all()
+
+    def _start_flusher(self):
+        if self.flusher is None and not self.closed:
+            self.flusher = threading.Thread(target=self._run_flusher, name="write-back-flusher", daemon=True)
+            self.flusher.start()
+
+    def _should_flush(self):
+        if self.closed:
+            return True
+        if self.flush_threshold and len(self.dirty) >= self.flush_threshold:
+            return True
+        return bool(self.max_dirty) and len(self.dirty) >= self.max_dirty
+
+    def _run_flusher(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(self._should_flush, timeout=self.flush_interval)
+                if self.closed:
+                    return
+                batch = self._take_batch()
+            try:
+                self._persist(batch)
+            except Exception as e:
+                logging.error(f"Background flush of {len(batch)} dirty keys failed: {e}")
+                with self.condition:
+                    # keep newer writes that arrived while the batch was in flight
+                    for key, value in batch.items():
+                        self.dirty.setdefault(key, value)
+
+    def _take_batch(self):
+        # called with the condition held; the write lock is released by _persist
+        batch, self.dirty = self.dirty, {}
+        self.condition.notify_all()
+        self.write_lock.acquire()
+        return batch
+
+    def _persist(self, batch):
+        try:
+            self._write_batch(list(batch.items()))
+        finally:
+            self.write_lock.release()
 
 
 class WritePolicyFactory:
 
     @staticmethod
-    def get_write_policy(write_policy_type, write_callback):
+    def get_write_policy(write_policy_type, write_callback, write_many_callback=None, commit_writer=None,
+                         **options):
         if write_policy_type == WritePolicy.WRITE_THROUGH:
-            return WriteThroughPolicy(write_callback)
+            return WriteThroughPolicy(write_callback, write_many_callback, commit_writer)
         elif write_policy_type == WritePolicy.WRITE_BACK:
-            return WriteBackPolicy(write_callback)
+            return WriteBackPolicy(write_callback, write_many_callback, **options)
         else:
             raise CacheException("Invalid Write Policy")
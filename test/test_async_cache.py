@@ -0,0 +1,111 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from custom_cache.AsyncCache import AsyncCache
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+
+class TestCache(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    async def asyncSetUp(self):
+        self.async_cache = CacheFactory.create_async_cache(eviction_policy=EvictionPolicy.LFU, capacity=4,
+                                                           db_service=self.sqlite_service, ttl=12,
+                                                           write_policy=WritePolicy.WRITE_THROUGH,
+                                                           refresh_interval=3, refresh_check=3)
+
+    async def asyncTearDown(self):
+        await self.async_cache.close()
+
+    async def test_async_add_and_retrieve(self):
+        self.assertIsInstance(self.async_cache, AsyncCache)
+        await self.async_cache.put('key1', 'value1')
+        self.assertEqual(await self.async_cache.get('key1'), 'value1')
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('key1'), 'value1')
+
+    async def test_async_miss_reads_storage_off_the_event_loop(self):
+        loop_thread = threading.current_thread()
+        reader_threads = []
+
+        def slow_read(key):
+            reader_threads.append(threading.current_thread())
+            time.sleep(0.1)
+            return 'loaded'
+
+        with patch.object(self.sqlite_service, 'get_entry_from_storage', side_effect=slow_read) as mock_storage:
+            results = await asyncio.gather(*(self.async_cache.get('hot') for _ in range(5)))
+            mock_storage.assert_called_once_with('hot')
+        self.assertEqual(results, ['loaded'] * 5)
+        self.assertNotIn(loop_thread, reader_threads)
+
+    async def test_async_get_many(self):
+        self.sqlite_service.insert_entries_in_storage([('stored1', 'value1'), ('stored2', 'value2')])
+        await self.async_cache.put('cached1', 'value0')
+        values = await self.async_cache.get_many(['cached1', 'stored1', 'stored2', 'absent'])
+        self.assertEqual(values, {'cached1': 'value0', 'stored1': 'value1', 'stored2': 'value2'})
+
+    async def test_hits_do_not_wait_for_a_write_through_put(self):
+        await self.async_cache.put('resident', 'value')
+        writing = threading.Event()
+        release = threading.Event()
+        insert = self.sqlite_service.insert_entry_in_storage
+
+        def slow_insert(key, value):
+            writing.set()
+            release.wait(timeout=10)
+            insert(key, value)
+
+        with patch.object(self.sqlite_service, 'insert_entry_in_storage', side_effect=slow_insert):
+            put = asyncio.ensure_future(self.async_cache.put('slow', 'value'))
+            self.assertTrue(await asyncio.to_thread(writing.wait, 10))
+            started = time.perf_counter()
+            self.assertEqual(await self.async_cache.get('resident'), 'value')
+            self.assertLess(time.perf_counter() - started, 0.1)
+            release.set()
+            await put
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('slow'), 'value')
+
+    async def test_persisted_memoize_uses_the_cache_executor(self):
+        threads = []
+
+        @self.async_cache.memoize(persist=True)
+        async def echo(word):
+            return word
+
+        def record_thread(*args):
+            threads.append(threading.current_thread().name)
+            return {}
+
+        # this store cannot hold the pickled results, so the cache reads and writes are stubbed
+        with patch.object(self.async_cache.cache, 'get_many', side_effect=record_thread), \
+                patch.object(self.async_cache.cache, 'put_many', side_effect=record_thread):
+            self.assertEqual(await echo('word'), 'word')
+        self.assertEqual(len(threads), 2)
+        self.assertTrue(threads)
+        self.assertTrue(all(name.startswith('cache-storage') for name in threads))
+
+    async def test_async_remove(self):
+        await self.async_cache.put('key2', 'value2')
+        await self.async_cache.remove('key2')
+        self.assertNotIn('key2', self.async_cache.cache.cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
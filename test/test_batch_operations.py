@@ -0,0 +1,68 @@
+import unittest
+from unittest.mock import patch
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+
+class TestCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        self.lru_cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=4,
+                                                   db_service=self.sqlite_service, ttl=12,
+                                                   write_policy=WritePolicy.WRITE_THROUGH, refresh_interval=3,
+                                                   refresh_check=3)
+        self.lfu_cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LFU, capacity=4,
+                                                   db_service=self.sqlite_service, ttl=12,
+                                                   write_policy=WritePolicy.WRITE_BACK, refresh_interval=3,
+                                                   refresh_check=3)
+
+    def test_put_many_writes_through_in_one_batch(self):
+        with patch.object(self.sqlite_service, 'insert_entries_in_storage',
+                          wraps=self.sqlite_service.insert_entries_in_storage) as mock_storage:
+            self.lru_cache.put_many({'batch1': 'value1', 'batch2': 'value2'})
+            mock_storage.assert_called_once()
+        self.assertEqual(self.sqlite_service.get_entries_from_storage(['batch1', 'batch2']),
+                         {'batch1': 'value1', 'batch2': 'value2'})
+
+    def test_get_many_resolves_misses_with_one_query(self):
+        self.sqlite_service.insert_entries_in_storage([('stored1', 'value1'), ('stored2', 'value2')])
+        self.lru_cache.put('cached1', 'value0')
+        with patch.object(self.sqlite_service, 'get_entries_from_storage',
+                          wraps=self.sqlite_service.get_entries_from_storage) as mock_storage:
+            values = self.lru_cache.get_many(['cached1', 'stored1', 'stored2', 'absent'])
+            mock_storage.assert_called_once_with(['stored1', 'stored2', 'absent'])
+        self.assertEqual(values, {'cached1': 'value0', 'stored1': 'value1', 'stored2': 'value2'})
+        self.assertIn('stored1', self.lru_cache.cache)
+
+    def test_remove_many_flushes_dirty_entries(self):
+        self.lfu_cache.put_many([('dirty1', 'value1'), ('dirty2', 'value2')])
+        self.assertEqual(self.sqlite_service.get_entries_from_storage(['dirty1', 'dirty2']), {})
+        self.assertEqual(self.lfu_cache.remove_many(['dirty1', 'dirty2', 'absent']), ['dirty1', 'dirty2'])
+        self.assertEqual(self.sqlite_service.get_entries_from_storage(['dirty1', 'dirty2']),
+                         {'dirty1': 'value1', 'dirty2': 'value2'})
+        self.assertEqual(len(self.lfu_cache.cache), 0)
+
+    def test_storage_reads_are_chunked_to_parameter_limit(self):
+        keys = [f'chunk{i}' for i in range(SqliteService.MAX_QUERY_PARAMETERS * 2 + 5)]
+        self.sqlite_service.insert_entries_in_storage([(key, key) for key in keys])
+        values = self.sqlite_service.get_entries_from_storage(keys)
+        self.assertEqual(len(values), len(keys))
+
+
+if __name__ == '__main__':
+    unittest.main()
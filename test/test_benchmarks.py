@@ -0,0 +1,53 @@
+import json
+import unittest
+from collections import Counter
+
+from benchmarks.runner import run_suite
+from benchmarks.workloads import operations
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def key_counts(self, workload, **options):
+        return Counter(key for _, key in operations(workload, 1000, 20000, **options))
+
+    def test_zipf_is_skewed_and_uniform_is_flat(self):
+        zipf = self.key_counts('zipf')
+        uniform = self.key_counts('uniform')
+        self.assertGreater(zipf['key0'], 10 * zipf['key500'] + 1)
+        self.assertLess(max(uniform.values()), 5 * 20000 / 1000)
+
+    def test_scan_walks_consecutive_keys(self):
+        keys = [int(key[3:]) for _, key in operations('scan', 1000, 20000, scan_fraction=0.5, scan_length=100)]
+        sequential = sum(1 for previous, key in zip(keys, keys[1:]) if key == (previous + 1) % 1000)
+        self.assertGreater(sequential, 20000 * 0.4)
+
+    def test_hotspot_moves(self):
+        stream = operations('hotspot', 1000, 20000, shift_every=10000)
+        first = Counter(key for _, key in stream[:10000]).most_common(50)
+        second = Counter(key for _, key in stream[10000:]).most_common(50)
+        self.assertLess(len({key for key, _ in first} & {key for key, _ in second}), 25)
+
+    def test_read_ratio_and_determinism(self):
+        stream = operations('zipf', 1000, 10000, read_ratio=0.8, seed=3)
+        reads = sum(1 for operation, _ in stream if operation == 'get')
+        self.assertAlmostEqual(reads / len(stream), 0.8, delta=0.03)
+        self.assertEqual(stream, operations('zipf', 1000, 10000, read_ratio=0.8, seed=3))
+
+    def test_suite_reports_every_combination_as_json(self):
+        report = run_suite(policies=[EvictionPolicy.LRU, EvictionPolicy.LFU],
+                           write_policies=[WritePolicy.WRITE_THROUGH, WritePolicy.WRITE_BACK],
+                           workloads=['zipf'], thread_counts=[1, 2], capacity=50, key_count=200,
+                           operation_count=1000)
+        results = json.loads(json.dumps(report))['results']
+        self.assertEqual(len(results), 8)
+        for result in results:
+            self.assertEqual(result['operations'], 1000)
+            self.assertGreater(result['ops_per_sec'], 0)
+            self.assertLessEqual(result['p50_us'], result['p99_us'])
+            self.assertTrue(0 < result['hit_ratio'] < 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import sys
+import time
+import unittest
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.entry import CacheEntry, now_ms
+from custom_cache.storage_service import SqliteService
+
+
+class TestCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        self.lru_cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=10,
+                                                   db_service=self.sqlite_service, ttl=12,
+                                                   write_policy=WritePolicy.WRITE_THROUGH, refresh_interval=3,
+                                                   refresh_check=3)
+
+    def test_entry_is_smaller_than_value_timestamp_tuple(self):
+        entry = CacheEntry('value', now_ms())
+        self.assertFalse(hasattr(entry, '__dict__'))
+        self.assertLess(sys.getsizeof(entry), sys.getsizeof(('value', time.time())) + sys.getsizeof(time.time()))
+
+    def test_entries_written_together_share_timestamp_and_deadline_bucket(self):
+        self.lru_cache.put_many({'key1': 'value1', 'key2': 'value2'})
+        entry1, entry2 = self.lru_cache.cache['key1'], self.lru_cache.cache['key2']
+        self.assertIsInstance(entry1.timestamp, int)
+        if entry1.timestamp == entry2.timestamp:
+            self.assertIs(entry1.timestamp, entry2.timestamp)
+        self.assertLessEqual(len(self.lru_cache.expiry_index.heap), 2)
+
+    def test_expired_entries_are_not_served(self):
+        self.lru_cache.put('key3', 'value3')
+        self.lru_cache.expiry_index.schedule('key3', now_ms() - 1000)
+        results, missing = self.lru_cache._get_cached_many(['key3'])
+        self.assertEqual((results, missing), ({}, ['key3']))
+        self.assertNotIn('key3', self.lru_cache.cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.exceptions import CacheException
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+
+class TestCacheSnapshot(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache.snapshot')
+
+    def create_cache(self, eviction_policy=EvictionPolicy.LRU, capacity=4, **options):
+        cache = CacheFactory.create_cache(eviction_policy=eviction_policy, capacity=capacity,
+                                          db_service=self.sqlite_service, refresh_check=3, **options)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_lru_order_survives_a_restart(self):
+        cache = self.create_cache()
+        for key in ['lru1', 'lru2', 'lru3']:
+            cache.put(key, f'value-{key}')
+        cache.get('lru1')
+        self.assertEqual(cache.save_snapshot(self.path), 3)
+
+        restored = self.create_cache(capacity=3)
+        self.assertEqual(restored.load_snapshot(self.path), 3)
+        self.assertEqual(list(restored.cache), ['lru2', 'lru3', 'lru1'])
+        self.assertEqual(restored.cache['lru1'].timestamp, cache.cache['lru1'].timestamp)
+        restored.put('lru4', 'value-lru4')
+        self.assertNotIn('lru2', restored.cache)
+
+    def test_policy_metadata_survives_a_restart(self):
+        for policy in EvictionPolicy:
+            with self.subTest(policy=policy):
+                cache = self.create_cache(policy, capacity=8)
+                for round_trip in range(3):
+                    for index in range(12):
+                        if index % (round_trip + 1) == 0:
+                            cache.put(f'{policy.value}-meta{index}', index)
+                            cache.get(f'{policy.value}-meta{index}')
+                cache.save_snapshot(self.path)
+
+                restored = self.create_cache(policy, capacity=8)
+                restored.load_snapshot(self.path)
+                self.assertEqual(list(restored._snapshot_order()), list(cache._snapshot_order()))
+                self.assertEqual(restored._snapshot_state(), cache._snapshot_state())
+
+    def test_other_policies_load_the_entries(self):
+        cache = self.create_cache(EvictionPolicy.ARC)
+        cache.put_many({'cross1': 'value1', 'cross2': 'value2'})
+        cache.save_snapshot(self.path)
+
+        restored = self.create_cache(EvictionPolicy.LFU)
+        self.assertEqual(restored.load_snapshot(self.path), 2)
+        self.assertEqual(restored.get_many(['cross1', 'cross2']), {'cross1': 'value1', 'cross2': 'value2'})
+
+    def test_smaller_cache_keeps_the_last_entries_to_be_evicted(self):
+        cache = self.create_cache(capacity=4)
+        for index in range(4):
+            cache.put(f'small{index}', index)
+        cache.save_snapshot(self.path)
+
+        restored = self.create_cache(capacity=2)
+        restored.load_snapshot(self.path)
+        self.assertEqual(list(restored.cache), ['small2', 'small3'])
+
+    def test_expired_entries_are_dropped(self):
+        cache = self.create_cache(ttl=12)
+        cache.put('ttl1', 'value1')
+        cache.save_snapshot(self.path)
+
+        restored = self.create_cache(ttl=12)
+        with patch('custom_cache.cache.now_ms', return_value=int(time.time() * 1000) + 13000):
+            self.assertEqual(restored.load_snapshot(self.path), 0)
+        self.assertEqual(len(restored), 0)
+
+    def test_per_key_ttls_survive_a_restart(self):
+        cache = self.create_cache()
+        cache.put('key-ttl-short', 'value', ttl=0.2)
+        cache.put('key-ttl-long', 'value', ttl=30)
+        cache.put('key-ttl-none', 'value')
+        cache.save_snapshot(self.path)
+
+        later = self.create_cache()
+        with patch('custom_cache.cache.now_ms', return_value=int(time.time() * 1000) + 1000):
+            self.assertEqual(later.load_snapshot(self.path), 2)
+        self.assertEqual(later.key_ttls, {'key-ttl-long': 30000})
+
+        restored = self.create_cache()
+        self.assertEqual(restored.load_snapshot(self.path), 3)
+        time.sleep(0.25)
+        self.assertEqual(restored._get_cached_many(['key-ttl-short', 'key-ttl-long', 'key-ttl-none']),
+                         ({'key-ttl-long': 'value', 'key-ttl-none': 'value'}, ['key-ttl-short']))
+
+    def test_resident_keys_keep_their_value(self):
+        cache = self.create_cache()
+        cache.put('resident1', 'old')
+        cache.save_snapshot(self.path)
+
+        restored = self.create_cache()
+        restored.put('resident1', 'new')
+        self.assertEqual(restored.load_snapshot(self.path), 0)
+        self.assertEqual(restored.get('resident1'), 'new')
+
+    def test_dirty_entries_are_carried_over(self):
+        cache = self.create_cache(write_policy=WritePolicy.WRITE_BACK)
+        cache.put('dirty1', 'value1')
+        cache.save_snapshot(self.path)
+        # the process goes away before its dirty entries are flushed
+        cache.write_policy_obj.dirty.clear()
+
+        restored = self.create_cache(write_policy=WritePolicy.WRITE_BACK)
+        restored.load_snapshot(self.path)
+        self.assertEqual(restored.stats()['dirty'], 1)
+        self.assertIsNone(self.sqlite_service.get_entry_from_storage('dirty1'))
+        restored.flush()
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('dirty1'), 'value1')
+
+    def test_dirty_entries_are_written_through_on_load(self):
+        cache = self.create_cache(write_policy=WritePolicy.WRITE_BACK)
+        cache.put_many({'through1': 'value1', 'through2': 'value2'})
+        cache.save_snapshot(self.path)
+        cache.write_policy_obj.dirty.clear()
+
+        for options in ({}, {'group_commit': True}):
+            with self.subTest(**options):
+                self.sqlite_service.delete_entries_from_storage(['through1', 'through2'])
+                restored = self.create_cache(**options)
+                self.assertEqual(restored.load_snapshot(self.path), 2)
+                self.assertEqual(self.sqlite_service.get_entries_from_storage(['through1', 'through2']),
+                                 {'through1': 'value1', 'through2': 'value2'})
+
+    def test_flush_before_saving(self):
+        cache = self.create_cache(write_policy=WritePolicy.WRITE_BACK)
+        cache.put('flushed1', 'value1')
+        cache.save_snapshot(self.path, flush=True)
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('flushed1'), 'value1')
+
+        restored = self.create_cache(write_policy=WritePolicy.WRITE_BACK)
+        restored.load_snapshot(self.path)
+        self.assertEqual(restored.stats()['dirty'], 0)
+
+    def test_sharded_snapshot_is_rerouted(self):
+        # room for every key in any one shard, whatever the hash seed
+        cache = self.create_cache(capacity=80, shards=4)
+        cache.put_many({f'shard{index}': index for index in range(20)})
+        cache.save_snapshot(self.path)
+
+        restored = self.create_cache(capacity=60, shards=3)
+        self.assertEqual(restored.load_snapshot(self.path), 20)
+        for shard in restored.shards:
+            self.assertTrue(all(restored.shard_for(key) is shard for key in shard.cache))
+        self.assertEqual(restored.get('shard7'), 7)
+
+    def test_invalid_snapshot(self):
+        with open(self.path, 'wb') as snapshot:
+            snapshot.write(b'not a snapshot')
+        with self.assertRaises(CacheException):
+            self.create_cache().load_snapshot(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.entry import now_ms
+from custom_cache.stats import LatencyHistogram
+from custom_cache.storage_service import SqliteService
+
+
+class TestCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        self.lru_cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=2,
+                                                   db_service=self.sqlite_service, ttl=12,
+                                                   write_policy=WritePolicy.WRITE_BACK, refresh_interval=3,
+                                                   refresh_check=3, flush_threshold=None)
+
+    def test_hits_misses_and_loads(self):
+        self.sqlite_service.insert_entry_in_storage('stored1', 'value1')
+        self.lru_cache.put('key1', 'value1')
+        self.lru_cache.get('key1')
+        self.lru_cache.get('stored1')
+        self.lru_cache.get_many(['key1', 'stored1', 'absent1'])
+        stats = self.lru_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (3, 2))
+        self.assertAlmostEqual(stats['hit_ratio'], 0.6)
+        self.assertEqual((stats['loads'], stats['loaded_keys'], stats['load_failures']), (2, 2, 0))
+        self.assertEqual(stats['load_latency']['count'], 2)
+        self.assertGreater(stats['load_latency']['max_us'], 0)
+        self.assertNotIn('latency', stats)
+
+    def test_evictions_are_counted_by_cause(self):
+        self.lru_cache.put_many({'key1': 'value1', 'key2': 'value2', 'key3': 'value3'})
+        self.lru_cache.remove('key3')
+        self.lru_cache.expiry_index.schedule('key2', now_ms() - 1000)
+        self.assertIsNone(self.lru_cache._get_cached_many(['key2'])[0].get('key2'))
+        self.assertEqual(self.lru_cache.stats()['evictions'], {'size': 1, 'ttl': 1, 'explicit': 1})
+
+    def test_refreshes_and_write_back_queue_depth(self):
+        self.lru_cache.put('key4', 'value4')
+        self.lru_cache.flush()
+        self.lru_cache.put('key5', 'value5')
+        self.assertEqual(self.lru_cache.stats()['dirty'], 1)
+        self.sqlite_service.insert_entry_in_storage('key4', 'fresh4')
+        self.lru_cache.refresh_index.schedule('key4', now_ms() - 1000)
+        self.lru_cache._refresh_cache()
+        stats = self.lru_cache.stats()
+        self.assertEqual(stats['refreshes'], 1)
+        self.assertEqual(stats['dirty'], 1)
+
+    def test_latency_histograms_are_opt_in(self):
+        cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LFU, capacity=10,
+                                          db_service=self.sqlite_service, refresh_check=3,
+                                          latency_histograms=True)
+        for i in range(5):
+            cache.put(f'key{i}', 'value')
+            cache.get(f'key{i}')
+        latency = cache.stats()['latency']
+        self.assertEqual(latency['get']['count'], 5)
+        self.assertEqual(latency['put']['count'], 5)
+        self.assertLessEqual(latency['get']['p50_us'], latency['get']['max_us'])
+
+    def test_sharded_stats_combine_shards(self):
+        cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=40,
+                                          db_service=self.sqlite_service, refresh_check=3,
+                                          shards=4, latency_histograms=True)
+        items = {f'key{i}': 'value' for i in range(8)}
+        cache.put_many(items)
+        cache.get_many([f'key{i}' for i in range(10)])
+        stats = cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (8, 2))
+        self.assertEqual(stats['loads'], 1)
+        # each shard that received keys records one put_many
+        self.assertEqual(stats['latency']['put_many']['count'], len({cache.shard_for(key) for key in items}))
+
+    def test_histogram_percentiles_stay_within_a_quarter(self):
+        histogram = LatencyHistogram()
+        for elapsed_ns in range(1, 1001):
+            histogram.record(elapsed_ns * 1000)
+        self.assertLessEqual(500_000, histogram.percentile(0.5))
+        self.assertLessEqual(histogram.percentile(0.5), 625_000)
+        self.assertEqual(histogram.percentile(1.0), 1_000_000)
+
+
+if __name__ == '__main__':
+    unittest.main()
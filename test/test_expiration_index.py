@@ -0,0 +1,48 @@
+import unittest
+
+from custom_cache.expiration import ExpirationIndex
+
+
+class TestExpirationIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ExpirationIndex()
+
+    def test_pop_due_returns_only_due_keys_in_deadline_order(self):
+        self.index.schedule('key1', 30)
+        self.index.schedule('key2', 10)
+        self.index.schedule('key3', 20)
+        self.assertEqual(self.index.pop_due(25), ['key2', 'key3'])
+        self.assertEqual(len(self.index), 1)
+        self.assertEqual(self.index.pop_due(25), [])
+
+    def test_reschedule_replaces_previous_deadline(self):
+        self.index.schedule('key1', 10)
+        self.index.schedule('key1', 50)
+        self.assertEqual(self.index.pop_due(20), [])
+        self.assertEqual(self.index.pop_due(60), ['key1'])
+
+    def test_discarded_keys_are_never_returned(self):
+        self.index.schedule('key1', 10)
+        self.index.discard('key1')
+        self.assertNotIn('key1', self.index)
+        self.assertEqual(self.index.pop_due(20), [])
+
+    def test_heap_is_compacted_on_repeated_reschedule(self):
+        for deadline in range(10000):
+            self.index.schedule('key1', deadline)
+        self.assertLessEqual(len(self.index.heap), 2 + ExpirationIndex.COMPACTION_SLACK + 1)
+        self.assertEqual(self.index.pop_due(10000), ['key1'])
+
+    def test_deadlines_within_resolution_share_a_bucket(self):
+        index = ExpirationIndex(resolution=10)
+        for key, deadline in (('key1', 11), ('key2', 15), ('key3', 20), ('key4', 21)):
+            index.schedule(key, deadline)
+        self.assertEqual(index.deadline('key1'), 20)
+        self.assertEqual(len(index.heap), 2)
+        self.assertEqual(index.pop_due(21), ['key1', 'key2', 'key3'])
+        self.assertEqual(index.pop_due(31), ['key4'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.exceptions import CacheException, StorageException
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.group_commit import GroupCommitWriter
+from custom_cache.storage_service import SqliteService
+
+
+class TestGroupCommit(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def create_cache(self, **options):
+        return CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=100,
+                                         db_service=self.sqlite_service, refresh_check=3, group_commit=True, **options)
+
+    def run_writers(self, count, write):
+        threads = [threading.Thread(target=write, args=(index,)) for index in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+
+    def test_concurrent_writes_share_a_transaction(self):
+        batches = []
+
+        def write_many(rows):
+            time.sleep(0.02)
+            batches.append(rows)
+
+        writer = GroupCommitWriter(write_many)
+        self.run_writers(8, lambda index: writer.write([(f'group{index}', index)]))
+        self.assertEqual(sorted(key for batch in batches for key, _ in batch), [f'group{index}' for index in range(8)])
+        self.assertLess(len(batches), 8)
+        self.assertEqual((writer.batches, writer.rows), (len(batches), 8))
+
+    def test_the_last_value_of_a_key_wins(self):
+        written = []
+        writer = GroupCommitWriter(written.extend, max_batch=3)
+        commits = [writer.submit([('same', index)]) for index in range(5)]
+        commits[0].wait()
+        for commit in commits:
+            commit.wait()
+        self.assertEqual(written, [('same', 2), ('same', 4)])
+        self.assertEqual(writer.batches, 2)
+
+    def test_a_failed_batch_fails_every_caller_in_it(self):
+        writer = GroupCommitWriter(self.sqlite_service.insert_entries_in_storage)
+        commits = [writer.submit([('failed', object())]), writer.submit([('carried', 'value')])]
+        for commit in commits:
+            with self.assertRaises(StorageException):
+                commit.wait()
+        writer.write([('recovered', 'value')])
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('recovered'), 'value')
+
+    def test_put_waits_for_its_commit_without_holding_the_cache_lock(self):
+        cache = self.create_cache()
+        cache.put('resident', 'value')
+        committing = threading.Event()
+        release = threading.Event()
+        insert = self.sqlite_service.insert_entries_in_storage
+
+        def blocking_insert(rows):
+            committing.set()
+            release.wait(timeout=10)
+            insert(rows)
+
+        with patch.object(cache.commit_writer, 'write_many', side_effect=blocking_insert):
+            writer = threading.Thread(target=cache.put, args=('blocked', 'value'))
+            writer.start()
+            self.assertTrue(committing.wait(timeout=10))
+            self.assertEqual(cache.get('resident'), 'value')
+            self.assertTrue(writer.is_alive())
+            release.set()
+            writer.join(timeout=10)
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('blocked'), 'value')
+
+    def test_shards_share_one_writer(self):
+        cache = self.create_cache(shards=4)
+        self.assertTrue(all(shard.commit_writer is cache.shards[0].commit_writer for shard in cache.shards))
+        self.run_writers(4, lambda index: cache.put_many({f'shared{index}-{item}': 'value' for item in range(10)}))
+        self.assertEqual(len(self.sqlite_service.get_entries_from_storage(
+            f'shared{index}-{item}' for index in range(4) for item in range(10))), 40)
+
+    def test_write_back_is_rejected(self):
+        with self.assertRaises(CacheException):
+            self.create_cache(write_policy=WritePolicy.WRITE_BACK)
+
+
+if __name__ == '__main__':
+    unittest.main()
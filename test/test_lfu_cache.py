@@ -66,6 +66,27 @@ class TestCache(unittest.TestCase):
 
             self.assertEqual(self.lfu_cache.get('key1'), 'mock1')
 
+    def test_lfu_evicts_least_recent_on_frequency_tie(self):
+        self.lfu_cache.put('key1', 'value1')
+        self.lfu_cache.put('key2', 'value2')
+        self.lfu_cache.get('key1')
+        self.lfu_cache.get('key2')
+        self.lfu_cache.put('key3', 'value3')
+        self.assertNotIn('key1', self.lfu_cache.cache)
+        self.assertIn('key2', self.lfu_cache.cache)
+        self.assertIn('key3', self.lfu_cache.cache)
+
+    def test_lfu_frequency_buckets_stay_consistent(self):
+        self.lfu_cache.put('key1', 'value1')
+        self.lfu_cache.put('key2', 'value2')
+        self.lfu_cache.get('key1')
+        self.lfu_cache.remove('key2')
+        self.lfu_cache.put('key3', 'value3')
+        self.lfu_cache.put('key4', 'value4')
+        self.assertEqual(self.lfu_cache.frequency.frequency('key1'), 2)
+        self.assertNotIn('key3', self.lfu_cache.frequency)
+        self.assertEqual(len(self.lfu_cache.frequency), len(self.lfu_cache.cache))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,90 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+
+class TestCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        self.lru_cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=4,
+                                                   db_service=self.sqlite_service, ttl=12,
+                                                   write_policy=WritePolicy.WRITE_BACK, refresh_interval=0.1,
+                                                   refresh_check=3)
+
+    def make_stale(self, items):
+        self.lru_cache.put_many(items)
+        self.lru_cache.flush()
+        self.sqlite_service.insert_entries_in_storage([(key, f'fresh-{value}') for key, value in items])
+        time.sleep(0.2)
+
+    def test_stale_keys_are_fetched_in_one_query(self):
+        self.make_stale([('key1', 'value1'), ('key2', 'value2'), ('key3', 'value3')])
+        with patch.object(self.sqlite_service, 'get_entries_from_storage',
+                          wraps=self.sqlite_service.get_entries_from_storage) as mock_storage:
+            self.lru_cache._refresh_cache()
+            mock_storage.assert_called_once()
+        self.assertEqual(self.lru_cache.get_many(['key1', 'key2', 'key3']),
+                         {'key1': 'fresh-value1', 'key2': 'fresh-value2', 'key3': 'fresh-value3'})
+
+    def test_readers_are_served_while_storage_is_queried(self):
+        self.make_stale([('key1', 'value1')])
+        observed = []
+
+        def read_during_refresh(keys):
+            # the cache lock must be free while the store is being read
+            observed.append(self.lru_cache.lock.acquire(blocking=False))
+            self.lru_cache.lock.release()
+            observed.append(self.lru_cache.get('key1'))
+            return {'key1': 'fresh-value1'}
+
+        with patch.object(self.sqlite_service, 'get_entries_from_storage', side_effect=read_during_refresh):
+            self.lru_cache._refresh_cache()
+        self.assertEqual(observed, [True, 'value1'])
+        self.assertEqual(self.lru_cache.get('key1'), 'fresh-value1')
+
+    def test_concurrent_put_is_not_overwritten(self):
+        self.make_stale([('key1', 'value1')])
+
+        def write_during_refresh(keys):
+            self.lru_cache.put('key1', 'written')
+            return {'key1': 'fresh-value1'}
+
+        with patch.object(self.sqlite_service, 'get_entries_from_storage', side_effect=write_during_refresh):
+            self.lru_cache._refresh_cache()
+        self.assertEqual(self.lru_cache.get('key1'), 'written')
+        self.assertTrue(self.lru_cache.write_policy_obj.is_dirty('key1'))
+
+    def test_unflushed_put_survives_a_refresh(self):
+        self.sqlite_service.insert_entries_in_storage([('key1', 'old')])
+        self.lru_cache.put('key1', 'new')
+        time.sleep(0.2)
+        self.lru_cache._refresh_cache()
+        self.assertEqual(self.lru_cache.get('key1'), 'new')
+        self.lru_cache.flush()
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('key1'), 'new')
+        # once flushed the key is refreshed again
+        self.sqlite_service.insert_entries_in_storage([('key1', 'newer')])
+        time.sleep(0.2)
+        self.lru_cache._refresh_cache()
+        self.assertEqual(self.lru_cache.get('key1'), 'newer')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -31,6 +31,8 @@ class TestCache(unittest.TestCase):
 
     def test_refresh_policy(self):
         self.lru_cache.put('key1', 'value1')
+        # dirty keys are not refreshed until they are flushed
+        self.lru_cache.flush()
         self.sqlite_service.insert_entry_in_storage('key1', 'value2')
         self.assertEqual(self.lru_cache.get('key1'), 'value1')
         time.sleep(5)
@@ -0,0 +1,101 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+
+class TestCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def create_cache(self, **options):
+        cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=10,
+                                          db_service=self.sqlite_service, ttl=12,
+                                          write_policy=WritePolicy.WRITE_BACK, refresh_interval=3,
+                                          refresh_check=3, **options)
+        self.addCleanup(cache.close)
+        return cache
+
+    def wait_for_storage(self, key, expected, timeout=2):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.sqlite_service.get_entry_from_storage(key) == expected:
+                return True
+            time.sleep(0.02)
+        return False
+
+    def test_flush_coalesces_repeated_writes(self):
+        cache = self.create_cache()
+        cache.put('coalesce1', 'value1')
+        cache.put('coalesce1', 'value2')
+        cache.put('coalesce2', 'value3')
+        with patch.object(self.sqlite_service, 'insert_entries_in_storage',
+                          wraps=self.sqlite_service.insert_entries_in_storage) as mock_storage:
+            cache.flush()
+            mock_storage.assert_called_once_with([('coalesce1', 'value2'), ('coalesce2', 'value3')])
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('coalesce1'), 'value2')
+
+    def test_background_flush_on_size_threshold(self):
+        cache = self.create_cache(flush_threshold=3)
+        cache.put_many([('size1', 'value1'), ('size2', 'value2')])
+        self.assertIsNone(self.sqlite_service.get_entry_from_storage('size1'))
+        cache.put('size3', 'value3')
+        self.assertTrue(self.wait_for_storage('size3', 'value3'))
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('size1'), 'value1')
+
+    def test_background_flush_on_interval(self):
+        cache = self.create_cache(flush_interval=0.1)
+        cache.put('interval1', 'value1')
+        self.assertTrue(self.wait_for_storage('interval1', 'value1'))
+
+    def test_high_water_mark_bounds_dirty_set(self):
+        cache = self.create_cache(flush_threshold=None, max_dirty=2)
+        for i in range(6):
+            cache.put(f'bounded{i}', f'value{i}')
+            self.assertLessEqual(len(cache.write_policy_obj.dirty), 2)
+        cache.close()
+        for i in range(6):
+            self.assertEqual(self.sqlite_service.get_entry_from_storage(f'bounded{i}'), f'value{i}')
+
+    def test_throttled_writers_do_not_block_readers(self):
+        cache = self.create_cache(flush_threshold=None, max_dirty=1)
+        # without a flusher the dirty set stays full until flush() is called
+        with patch.object(cache.write_policy_obj, '_start_flusher'):
+            cache.put('resident', 'value')
+            writer = threading.Thread(target=cache.put, args=('throttled', 'value'))
+            writer.start()
+            writer.join(timeout=0.1)
+            self.assertTrue(writer.is_alive())
+            self.assertTrue(cache.lock.acquire(timeout=1))
+            cache.lock.release()
+            self.assertEqual(cache.get('resident'), 'value')
+            self.assertNotIn('throttled', cache.cache)
+            cache.flush()
+            writer.join(timeout=10)
+        self.assertFalse(writer.is_alive())
+        self.assertEqual(cache.get('throttled'), 'value')
+
+    def test_close_flushes_dirty_keys(self):
+        cache = self.create_cache()
+        cache.put('close1', 'value1')
+        cache.close()
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('close1'), 'value1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+import unittest
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import EvictionPolicy
+from custom_cache.storage_service import SqliteService
+from custom_cache.value_codecs import PickleCodec
+
+
+class TestMemoize(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler, codec=PickleCodec())
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        self.cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=100,
+                                               db_service=self.sqlite_service, refresh_check=3)
+        self.calls = []
+
+    def run_async(self, coroutine):
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        return loop.run_until_complete(coroutine)
+
+    def test_results_are_cached_per_arguments(self):
+        @self.cache.memoize()
+        def square(number, offset=0):
+            self.calls.append(number)
+            return number * number + offset if number else None
+
+        self.assertEqual([square(3), square(3), square(3, offset=1), square(0), square(0)], [9, 9, 10, None, None])
+        self.assertEqual(self.calls, [3, 3, 0])
+        self.assertEqual(square.__name__, 'square')
+        key = next(iter(self.cache.cache))
+        self.assertTrue(key.startswith(f'{__name__}.{square.__qualname__}:'))
+        self.assertEqual(len(key.rsplit(':', 1)[1]), 32)
+        # in-memory results never reach the store
+        self.assertIsNone(self.sqlite_service.get_entry_from_storage(key))
+
+    def test_ttl_key_and_invalidate(self):
+        @self.cache.memoize(ttl=0.05, key=lambda user, **options: user)
+        def profile(user, verbose=False):
+            self.calls.append(user)
+            return {'user': user}
+
+        profile('ada')
+        profile('ada', verbose=True)
+        self.assertEqual(list(self.cache.cache), [f'{__name__}.{profile.__qualname__}:ada'])
+        time.sleep(0.06)
+        profile('ada')
+        profile.invalidate('ada')
+        profile('ada')
+        self.assertEqual(self.calls, ['ada', 'ada', 'ada'])
+
+    def test_concurrent_calls_share_one_computation(self):
+        @self.cache.memoize()
+        def slow(number):
+            self.calls.append(number)
+            time.sleep(0.05)
+            return number
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(slow(7))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        self.assertEqual((results, self.calls), ([7] * 8, [7]))
+
+    def test_persisted_results_survive_the_cache(self):
+        def report(day):
+            self.calls.append(day)
+            return [day, 'report']
+
+        self.cache.memoize(persist=True)(report)('monday')
+        other_cache = CacheFactory.create_cache(EvictionPolicy.LRU, 100, self.sqlite_service, refresh_check=3)
+        persisted = other_cache.memoize(persist=True)(report)
+        self.assertEqual(persisted('monday'), ['monday', 'report'])
+        self.assertEqual(self.calls, ['monday'])
+
+        persisted.invalidate('monday')
+        self.assertEqual(len(other_cache), 0)
+        self.assertEqual(self.sqlite_service.fetch_all_keys_from_storage(), [])
+
+    def test_async_functions(self):
+        @self.cache.memoize()
+        async def fetch(number):
+            self.calls.append(number)
+            await asyncio.sleep(0.01)
+            return number * 2
+
+        async def main():
+            first = await asyncio.gather(*(fetch(4) for _ in range(5)))
+            return first, await fetch(4)
+
+        self.assertEqual(self.run_async(main()), ([8] * 5, 8))
+        self.assertEqual(self.calls, [4])
+
+    def test_memoize_many_computes_only_the_missing_arguments(self):
+        @self.cache.memoize_many()
+        def lengths(words):
+            self.calls.append(words)
+            return [len(word) for word in words]
+
+        self.assertEqual(lengths(['a', 'bb']), [1, 2])
+        self.assertEqual(lengths(['bb', 'ccc', 'a', 'ccc', '']), [2, 3, 1, 3, 0])
+        self.assertEqual(self.calls, [['a', 'bb'], ['ccc', '']])
+        lengths.invalidate('a', 'bb')
+        self.assertEqual(lengths(['a', 'bb', 'ccc']), [1, 2, 3])
+        self.assertEqual(self.calls[-1], ['a', 'bb'])
+
+        @self.cache.memoize_many()
+        def broken(words):
+            return []
+
+        with self.assertRaises(ValueError):
+            broken(['x'])
+
+    def test_async_memoize_many(self):
+        @self.cache.memoize_many(key=str.lower)
+        async def upper(words):
+            self.calls.append(words)
+            return [word.upper() for word in words]
+
+        async def main():
+            return await upper(['a', 'B']), await upper(['b', 'c'])
+
+        self.assertEqual(self.run_async(main()), (['A', 'B'], ['B', 'C']))
+        self.assertEqual(self.calls, [['a', 'B'], ['c']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import time
+import unittest
+from unittest.mock import patch
+
+from custom_cache.bloom_filter import BloomFilter
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+
+class TestCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        self.sqlite_service.bloom_filter = None
+        self.lru_cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=2,
+                                                   db_service=self.sqlite_service, ttl=12,
+                                                   write_policy=WritePolicy.WRITE_THROUGH, refresh_interval=3,
+                                                   refresh_check=3, negative_ttl=0.2, negative_capacity=2)
+
+    def test_absent_key_is_queried_once_within_negative_ttl(self):
+        with patch.object(self.sqlite_service, 'get_entry_from_storage', return_value=None) as mock_storage:
+            self.assertIsNone(self.lru_cache.get('absent1'))
+            self.assertIsNone(self.lru_cache.get('absent1'))
+            mock_storage.assert_called_once_with('absent1')
+            time.sleep(0.3)
+            self.assertIsNone(self.lru_cache.get('absent1'))
+            self.assertEqual(mock_storage.call_count, 2)
+
+    def test_put_clears_negative_entry(self):
+        self.assertIsNone(self.lru_cache.get('absent2'))
+        self.lru_cache.put('absent2', 'value2')
+        self.lru_cache.put('other1', 'value1')
+        self.lru_cache.put('other2', 'value2')
+        self.assertEqual(self.lru_cache.get('absent2'), 'value2')
+
+    def test_put_during_a_miss_is_not_recorded_as_absent(self):
+        # the store is read just before another writer stores the key
+        def read_one(key):
+            self.lru_cache.put(key, 'value')
+            return None
+
+        def read_many(keys):
+            self.lru_cache.put_many({key: 'value' for key in keys})
+            return {}
+
+        with patch.object(self.sqlite_service, 'get_entry_from_storage', side_effect=read_one):
+            self.assertIsNone(self.lru_cache.get('raced1'))
+        with patch.object(self.sqlite_service, 'get_entries_from_storage', side_effect=read_many):
+            self.assertEqual(self.lru_cache.get_many(['raced2']), {})
+        self.lru_cache.put('other1', 'value1')
+        self.lru_cache.put('other2', 'value2')
+        self.assertEqual(self.lru_cache.get_many(['raced1', 'raced2']), {'raced1': 'value', 'raced2': 'value'})
+        self.assertEqual(len(self.lru_cache.negative_cache), 0)
+
+    def test_negative_entries_are_bounded(self):
+        self.lru_cache.get_many(['absent3', 'absent4', 'absent5'])
+        self.assertEqual(len(self.lru_cache.negative_cache), 2)
+
+    def test_bloom_filter_skips_storage_for_unknown_keys(self):
+        self.sqlite_service.insert_entry_in_storage('stored1', 'value1')
+        self.sqlite_service.build_bloom_filter(expected_items=100)
+        self.sqlite_service.insert_entry_in_storage('stored2', 'value2')
+        with patch.object(self.sqlite_service, 'get_entry_from_storage',
+                          wraps=self.sqlite_service.get_entry_from_storage) as mock_storage:
+            self.assertEqual(self.lru_cache.get('stored1'), 'value1')
+            self.assertEqual(self.lru_cache.get('stored2'), 'value2')
+            self.assertIsNone(self.lru_cache.get('never-stored'))
+            self.assertEqual(mock_storage.call_count, 2)
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom_filter = BloomFilter(1000, 0.01)
+        bloom_filter.update(f'key{i}' for i in range(1000))
+        self.assertTrue(all(f'key{i}' in bloom_filter for i in range(1000)))
+        false_positives = sum(f'other{i}' in bloom_filter for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import time
+import unittest
+from unittest.mock import patch
+
+from custom_cache.cache import Cache
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.exceptions import CacheException
+from custom_cache.cache_enum import EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+
+class TestPerKeyTtl(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def create_cache(self, eviction_policy=EvictionPolicy.LRU, **options):
+        options.setdefault('ttl', 12)
+        options.setdefault('refresh_check', 3)
+        return CacheFactory.create_cache(eviction_policy=eviction_policy, capacity=500,
+                                         db_service=self.sqlite_service, **options)
+
+    def test_put_with_its_own_ttl(self):
+        for eviction_policy in EvictionPolicy:
+            with self.subTest(eviction_policy=eviction_policy):
+                cache = self.create_cache(eviction_policy)
+                cache.put('short', 'value', ttl=0.05)
+                cache.put_many({'short-many': 'value'}, ttl=0.05)
+                cache.put('default', 'value')
+                time.sleep(0.06)
+                self.assertEqual(cache._get_cached_many(['short', 'short-many', 'default']),
+                                 ({'default': 'value'}, ['short', 'short-many']))
+                self.assertEqual(cache.key_ttls, {})
+
+    def test_a_put_without_ttl_restores_the_default(self):
+        cache = self.create_cache()
+        cache.put('reset', 'value', ttl=0.05)
+        cache.put('reset', 'value')
+        time.sleep(0.06)
+        self.assertEqual(cache.get('reset'), 'value')
+        self.assertEqual(cache.key_ttls, {})
+
+    def test_reads_and_sweeps_agree(self):
+        previous = asyncio.get_event_loop_policy().get_event_loop()
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.addCleanup(asyncio.set_event_loop, previous)
+        self.addCleanup(loop.close)
+        # no cache-wide ttl, so only the per-key ttls can start the sweep's work
+        cache = self.create_cache(ttl=None, refresh_check=0.05)
+        cache.put_many({f'swept{index}': 'value' for index in range(50)}, ttl=0.05)
+        cache.put('kept', 'value')
+        loop.run_until_complete(asyncio.sleep(0.2))
+        self.assertEqual(list(cache.cache), ['kept'])
+        self.assertEqual(cache.stats()['evictions']['ttl'], 50)
+        tasks = list(cache.background_tasks)
+        cache.close()
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+    def test_loaded_values_use_the_load_ttl(self):
+        self.sqlite_service.insert_entries_in_storage([('loaded-short', 'short'), ('loaded-long', 'long value')])
+        cache = self.create_cache(load_ttl=lambda key, value: 0.05 if len(value) < 6 else None)
+        self.assertEqual(cache.get_many(['loaded-short', 'loaded-long']),
+                         {'loaded-short': 'short', 'loaded-long': 'long value'})
+        time.sleep(0.06)
+        with patch.object(self.sqlite_service, 'get_entry_from_storage', return_value='reloaded') as mock_storage:
+            self.assertEqual(cache.get('loaded-short'), 'reloaded')
+            self.assertEqual(cache.get('loaded-long'), 'long value')
+            mock_storage.assert_called_once_with('loaded-short')
+
+    def test_jitter_spreads_deadlines_below_the_ttl(self):
+        cache = self.create_cache(ttl=10, refresh_interval=4, jitter=0.5, shards=2)
+        cache.put_many({f'jitter{index}': 'value' for index in range(200)})
+        # deadlines are rounded up to the timer resolution
+        slack = Cache.TIMER_RESOLUTION_MS
+        for shard in cache.shards:
+            for key, entry in shard.cache.items():
+                self.assertLessEqual(entry.timestamp + 5000, shard.expiry_index.deadline(key))
+                self.assertLessEqual(shard.expiry_index.deadline(key), entry.timestamp + 10000 + slack)
+                self.assertLessEqual(shard.refresh_index.deadline(key), entry.timestamp + 4000 + slack)
+        deadlines = {shard.expiry_index.deadline(key) for shard in cache.shards for key in shard.cache}
+        self.assertGreater(len(deadlines), 20)
+
+    def test_invalid_ttls(self):
+        cache = self.create_cache()
+        with self.assertRaises(CacheException):
+            cache.put('invalid', 'value', ttl=0)
+        with self.assertRaises(CacheException):
+            self.create_cache(jitter=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.entry import now_ms
+from custom_cache.storage_service import SqliteService
+
+
+class TestCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def create_cache(self, eviction_policy, capacity=8, write_policy=WritePolicy.WRITE_THROUGH):
+        return CacheFactory.create_cache(eviction_policy=eviction_policy, capacity=capacity,
+                                         db_service=self.sqlite_service, ttl=12,
+                                         write_policy=write_policy, refresh_interval=3,
+                                         refresh_check=3)
+
+    def warm_up(self, cache, hot_keys):
+        for key in hot_keys:
+            cache.put(key, f'hot-{key}')
+        # push the hot keys out through 2Q's a1_in so their next reference promotes them
+        for i in range(cache.capacity):
+            cache.put(f'filler{i}', 'filler')
+        for key in hot_keys:
+            cache.get(key)
+            cache.put(key, f'hot-{key}')
+
+    def test_hot_keys_survive_a_scan(self):
+        hot_keys = [f'hot{i}' for i in range(4)]
+        for policy in (EvictionPolicy.ARC, EvictionPolicy.TWO_Q):
+            with self.subTest(policy=policy):
+                cache = self.create_cache(policy)
+                self.warm_up(cache, hot_keys)
+                for i in range(100):
+                    cache.put(f'scan{i}', 'scan')
+                self.assertEqual(len(cache), 8)
+                self.assertTrue(all(key in cache.cache for key in hot_keys))
+
+                # the same scan flushes every hot key out of an LRU cache
+                lru_cache = self.create_cache(EvictionPolicy.LRU)
+                self.warm_up(lru_cache, hot_keys)
+                for i in range(100):
+                    lru_cache.put(f'scan{i}', 'scan')
+                self.assertFalse(any(key in lru_cache.cache for key in hot_keys))
+
+    def test_arc_adapts_towards_recency_on_ghost_hits(self):
+        cache = self.create_cache(EvictionPolicy.ARC, capacity=4)
+        for i in range(4):
+            cache.put(f'key{i}', 'value')
+        cache.get('key3')
+        cache.put('key4', 'value')
+        self.assertIn('key0', cache.b1)
+        cache.put('key0', 'value')
+        self.assertGreater(cache.p, 0)
+        self.assertIn('key0', cache.t2)
+        self.assertLessEqual(len(cache.b1) + len(cache.b2), 4)
+
+    def test_evicted_dirty_entries_are_written_back(self):
+        for policy in (EvictionPolicy.ARC, EvictionPolicy.TWO_Q):
+            with self.subTest(policy=policy):
+                cache = self.create_cache(policy, capacity=2, write_policy=WritePolicy.WRITE_BACK)
+                cache.put(f'{policy.value}-key1', 'value1')
+                cache.put(f'{policy.value}-key2', 'value2')
+                cache.put(f'{policy.value}-key3', 'value3')
+                self.assertEqual(len(cache), 2)
+                self.assertEqual(self.sqlite_service.get_entry_from_storage(f'{policy.value}-key1'), 'value1')
+
+    def test_expired_and_removed_keys_leave_the_policy_lists(self):
+        for policy in (EvictionPolicy.ARC, EvictionPolicy.TWO_Q):
+            with self.subTest(policy=policy):
+                cache = self.create_cache(policy)
+                cache.put('key1', 'value1')
+                cache.put('key2', 'value2')
+                cache.expiry_index.schedule('key1', now_ms() - 1000)
+                cache._evict_expired_entries()
+                cache.remove('key2')
+                self.assertEqual(len(cache), 0)
+                resident = (cache.t1, cache.t2) if policy == EvictionPolicy.ARC else (cache.a1_in, cache.am)
+                self.assertFalse(any(resident))
+
+    def test_refresh_reloads_stale_entries(self):
+        for policy in (EvictionPolicy.ARC, EvictionPolicy.TWO_Q):
+            with self.subTest(policy=policy):
+                cache = self.create_cache(policy)
+                key = f'{policy.value}-refresh'
+                cache.put(key, 'value1')
+                self.sqlite_service.insert_entry_in_storage(key, 'value2')
+                cache.refresh_index.schedule(key, now_ms() - 1000)
+                cache._refresh_cache()
+                self.assertEqual(cache.get(key), 'value2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from custom_cache.ShardedCache import ShardedCache
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+
+class TestCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        self.sharded_cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=10,
+                                                       db_service=self.sqlite_service, ttl=12,
+                                                       write_policy=WritePolicy.WRITE_THROUGH, refresh_interval=3,
+                                                       refresh_check=3, shards=4)
+
+    def test_factory_splits_capacity_across_shards(self):
+        self.assertIsInstance(self.sharded_cache, ShardedCache)
+        self.assertEqual([shard.capacity for shard in self.sharded_cache.shards], [3, 3, 2, 2])
+        self.assertEqual(len({id(shard.lock) for shard in self.sharded_cache.shards}), 4)
+
+    def test_sharded_add_and_retrieve(self):
+        self.sharded_cache.put('key1', 'value1')
+        self.assertEqual(self.sharded_cache.get('key1'), 'value1')
+        self.assertIn('key1', self.sharded_cache.shard_for('key1').cache)
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('key1'), 'value1')
+
+    def test_sharded_get_many_uses_one_storage_query(self):
+        self.sqlite_service.insert_entries_in_storage([(f'stored{i}', f'value{i}') for i in range(8)])
+        with patch.object(self.sqlite_service, 'get_entries_from_storage',
+                          wraps=self.sqlite_service.get_entries_from_storage) as mock_storage:
+            values = self.sharded_cache.get_many([f'stored{i}' for i in range(8)])
+            mock_storage.assert_called_once()
+        self.assertEqual(values, {f'stored{i}': f'value{i}' for i in range(8)})
+
+    def test_stats_aggregate_shards(self):
+        self.sharded_cache.put_many({f'key{i}': f'value{i}' for i in range(6)})
+        stats = self.sharded_cache.stats()
+        self.assertEqual(stats['size'], len(self.sharded_cache))
+        self.assertEqual(stats['capacity'], 10)
+        self.assertEqual(sum(stats['shard_sizes']), stats['size'])
+
+    def test_concurrent_puts_respect_shard_capacity(self):
+        def worker(offset):
+            for i in range(200):
+                self.sharded_cache.put(f'thread{offset}-{i}', i)
+
+        threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for shard in self.sharded_cache.shards:
+            self.assertLessEqual(len(shard), shard.capacity)
+
+
+if __name__ == '__main__':
+    unittest.main()
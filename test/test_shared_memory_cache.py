@@ -0,0 +1,128 @@
+import os
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import unittest
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.exceptions import CacheException
+from custom_cache.cache_enum import CacheBackend, WritePolicy, EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+# a worker that attaches to the same table from another process
+WORKER = textwrap.dedent("""
+    import sys
+    from custom_cache.SharedMemoryCache import SharedMemoryCache
+    from custom_cache.simulator import NullStorage
+
+    path, prefix, count = sys.argv[1], sys.argv[2], int(sys.argv[3])
+    cache = SharedMemoryCache(4096, NullStorage(), path=path)
+    for index in range(count):
+        cache.put(f'{prefix}{index}', f'{prefix}-value{index}'.encode())
+    cache.close()
+""")
+
+
+class TestSharedMemoryCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'shared.cache')
+
+    def create_cache(self, capacity=4096, **options):
+        cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=capacity,
+                                          db_service=self.sqlite_service, backend=CacheBackend.SHARED_MEMORY,
+                                          path=self.path, **options)
+        self.addCleanup(cache.close)
+        return cache
+
+    def test_put_get_and_remove(self):
+        cache = self.create_cache()
+        cache.put('shm1', b'\x00binary')
+        cache.put('shm2', 'text')
+        self.assertEqual(cache.get('shm1'), b'\x00binary')
+        self.assertEqual(cache.get('shm2'), 'text')
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('shm2'), 'text')
+        cache.remove('shm2')
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.remove_many(['shm1', 'shm3']), ['shm1'])
+        self.assertEqual(len(cache), 0)
+
+    def test_processes_share_one_table(self):
+        cache = self.create_cache()
+        workers = [subprocess.Popen([sys.executable, '-c', WORKER, self.path, f'proc{worker}-', '200'],
+                                    cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+                   for worker in range(3)]
+        self.assertEqual([worker.wait(timeout=60) for worker in workers], [0, 0, 0])
+
+        self.assertEqual(cache.get('proc1-150'), b'proc1--value150')
+        resident = cache.get_many(f'proc{worker}-{index}' for worker in range(3) for index in range(200))
+        self.assertEqual(len(resident), len(cache))
+        self.assertGreater(len(cache), 550)
+
+    def test_full_set_evicts_the_least_recently_used_slot(self):
+        cache = self.create_cache(capacity=4, ways=4)
+        for index in range(4):
+            cache.put(f'set{index}', b'value')
+        cache.get('set0')
+        cache.put('set4', b'value')
+        self.assertEqual(len(cache), 4)
+        results, missing = cache._get_cached_many([f'set{index}' for index in range(5)])
+        self.assertEqual(missing, ['set1'])
+        self.assertEqual(cache.stats()['evictions']['size'], 1)
+
+    def test_loaded_values_are_cached_for_other_processes(self):
+        self.sqlite_service.insert_entry_in_storage('shm-loaded', 'stored')
+        self.assertEqual(self.create_cache().get('shm-loaded'), 'stored')
+        other = self.create_cache()
+        self.assertEqual(other._get_cached_many(['shm-loaded']), ({'shm-loaded': 'stored'}, []))
+
+    def test_ttl_is_checked_on_read(self):
+        cache = self.create_cache(ttl=0.05)
+        cache.put('shm-ttl', b'value')
+        time.sleep(0.06)
+        self.assertEqual(cache._get_cached_many(['shm-ttl']), ({}, ['shm-ttl']))
+        self.assertEqual(len(cache), 0)
+
+    def test_oversized_values_are_written_but_not_cached(self):
+        cache = self.create_cache(slot_size=64)
+        cache.put('shm-big', 'small')
+        cache.put('shm-big', 'x' * 100)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.get('shm-big'), 'x' * 100)
+
+    def test_write_back_flushes_evicted_dirty_values(self):
+        cache = self.create_cache(capacity=1, ways=1, write_policy=WritePolicy.WRITE_BACK)
+        cache.put('shm-dirty1', 'value1')
+        cache.put('shm-dirty2', 'value2')
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('shm-dirty1'), 'value1')
+
+    def test_invalid_configurations(self):
+        with self.assertRaises(CacheException):
+            self.create_cache().put('shm-int', 42)
+        with self.assertRaises(CacheException):
+            CacheFactory.create_cache(EvictionPolicy.LFU, 10, self.sqlite_service, backend=CacheBackend.SHARED_MEMORY,
+                                      path=self.path)
+        # the first cache created the table with the default capacity
+        with self.assertRaises(CacheException):
+            self.create_cache(capacity=64)
+
+
+if __name__ == '__main__':
+    unittest.main()
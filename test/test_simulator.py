@@ -0,0 +1,97 @@
+import os
+import random
+import tempfile
+import unittest
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.simulator import TraceRecorder, lru_miss_ratio_curve, read_trace, simulate
+from custom_cache.storage_service import SqliteService
+
+
+class TestSimulator(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.trace_path = os.path.join(directory.name, 'trace.txt')
+        rng = random.Random(5)
+        self.trace = [(rng.choice(['get'] * 8 + ['put', 'remove']), f'key{int(rng.paretovariate(0.8))}')
+                      for _ in range(5000)]
+
+    def test_miss_ratio_curve_matches_lru_replay(self):
+        trace = [(operation, key) for operation, key in self.trace if operation != 'remove']
+        capacities = [1, 5, 20, 100]
+        curve = lru_miss_ratio_curve(iter(trace), capacities)
+        for point in curve:
+            replay = simulate(iter(trace), EvictionPolicy.LRU, point['capacity'])
+            self.assertAlmostEqual(point['hit_ratio'], replay['hit_ratio'])
+        ratios = [point['hit_ratio'] for point in curve]
+        self.assertEqual(ratios, sorted(ratios))
+
+    def test_removals_keep_the_curve_close(self):
+        point, = lru_miss_ratio_curve(iter(self.trace), [20])
+        replay = simulate(iter(self.trace), EvictionPolicy.LRU, 20)
+        self.assertGreaterEqual(point['hit_ratio'], replay['hit_ratio'])
+        self.assertAlmostEqual(point['hit_ratio'], replay['hit_ratio'], delta=0.01)
+
+    def test_every_policy_replays_the_same_requests(self):
+        results = [simulate(iter(self.trace), policy, 20) for policy in EvictionPolicy]
+        self.assertEqual(len({result['requests'] for result in results}), 1)
+        self.assertTrue(all(0 < result['hit_ratio'] < 1 for result in results))
+
+    def test_trace_file_is_streamed(self):
+        with open(self.trace_path, 'w') as trace:
+            trace.write("# recorded trace\nkey1\nput\tkey2\n\nremove\tkey1\nget\ttab\\tkey\n")
+        self.assertEqual(list(read_trace(self.trace_path)),
+                         [('get', 'key1'), ('put', 'key2'), ('remove', 'key1'), ('get', 'tab\tkey')])
+
+    def test_recorder_captures_live_traffic(self):
+        cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=2,
+                                          db_service=self.sqlite_service, write_policy=WritePolicy.WRITE_THROUGH,
+                                          refresh_check=3, latency_histograms=True)
+        timed_get = cache.get
+        with TraceRecorder(self.trace_path) as recorder:
+            recorder.attach(cache)
+            cache.put('key1', 'value1')
+            cache.get('key1')
+            cache.put_many({'key2': 'value2', 'new\nline': 'value3'})
+            cache.get_many(key for key in ['key1', 'key2'])
+            cache.remove('key2')
+        self.assertIs(cache.get, timed_get)
+        cache.get('key1')
+        self.assertEqual(list(read_trace(self.trace_path)), [
+            ('put', 'key1'), ('get', 'key1'), ('put', 'key2'), ('put', 'new\nline'),
+            ('get', 'key1'), ('get', 'key2'), ('remove', 'key2'),
+        ])
+
+    def test_recorder_wraps_coroutine_methods(self):
+        class Store:
+            async def get(self, key):
+                return key.upper()
+
+        store = Store()
+        with TraceRecorder(self.trace_path) as recorder:
+            recorder.attach(store)
+            with self.assertRaises(StopIteration) as result:
+                store.get('key1').send(None)
+        self.assertEqual(result.exception.value, 'KEY1')
+        self.assertNotIn('get', store.__dict__)
+        self.assertEqual(list(read_trace(self.trace_path)), [('get', 'key1')])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.exceptions import StorageException
+from custom_cache.single_flight import AsyncSingleFlight, SingleFlight
+from custom_cache.storage_service import SqliteService
+
+
+class TestCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        self.lru_cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=2,
+                                                   db_service=self.sqlite_service, ttl=12,
+                                                   write_policy=WritePolicy.WRITE_THROUGH, refresh_interval=3,
+                                                   refresh_check=3)
+
+    def run_concurrently(self, target, count=8):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_misses_share_one_storage_read(self):
+        def slow_read(key):
+            time.sleep(0.2)
+            return 'loaded'
+
+        with patch.object(self.sqlite_service, 'get_entry_from_storage', side_effect=slow_read) as mock_storage:
+            results = self.run_concurrently(lambda: self.lru_cache.get('hot'))
+            mock_storage.assert_called_once_with('hot')
+        self.assertEqual(results, ['loaded'] * 8)
+
+    def test_waiters_receive_the_loader_error(self):
+        errors = []
+        started = threading.Event()
+
+        def failing_loader():
+            started.set()
+            time.sleep(0.2)
+            raise StorageException("storage down")
+
+        def call():
+            try:
+                return flight.do('hot', failing_loader)
+            except StorageException as e:
+                errors.append(e)
+
+        flight = SingleFlight()
+        self.run_concurrently(call, count=4)
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(len({id(error) for error in errors}), 1)
+        self.assertEqual(len(flight), 0)
+
+    def test_loaded_value_does_not_overwrite_concurrent_put(self):
+        def read_then_race(key):
+            self.lru_cache.put(key, 'written')
+            return 'stale'
+
+        with patch.object(self.sqlite_service, 'get_entry_from_storage', side_effect=read_then_race):
+            self.assertEqual(self.lru_cache.get('raced'), 'written')
+        self.assertEqual(self.lru_cache.get('raced'), 'written')
+
+    def test_async_single_flight_coalesces_coroutines(self):
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 'loaded'
+
+        async def main():
+            flight = AsyncSingleFlight()
+            results = await asyncio.gather(*(flight.do('hot', loader) for _ in range(5)))
+            return results, len(flight)
+
+        results, in_flight = asyncio.run(main())
+        self.assertEqual(results, ['loaded'] * 5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(in_flight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
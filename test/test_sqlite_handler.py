@@ -0,0 +1,89 @@
+import gc
+import os
+import tempfile
+import threading
+import unittest
+
+from custom_cache.database import DatabaseFactory
+from custom_cache.db_config import DATABASE_CONFIG
+from custom_cache.storage_service import SqliteService
+
+
+class TestSQLiteHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        config = dict(DATABASE_CONFIG['sqlite'], name=os.path.join(self.directory.name, 'cache.db'),
+                      synchronous='FULL', mmap_size=1024 * 1024)
+        self.sqlite_handler = DatabaseFactory.get_database_handler('sqlite', config)
+        self.sqlite_handler.connect()
+        self.sqlite_service = SqliteService(self.sqlite_handler)
+        self.sqlite_service.create_cache_storage_table()
+
+    def tearDown(self):
+        self.sqlite_handler.close()
+        self.directory.cleanup()
+
+    def test_file_database_is_tuned_from_config(self):
+        cursor = self.sqlite_handler.connection.cursor()
+        self.assertEqual(cursor.execute('PRAGMA journal_mode;').fetchone()[0], 'wal')
+        self.assertEqual(cursor.execute('PRAGMA synchronous;').fetchone()[0], 2)
+        self.assertEqual(cursor.execute('PRAGMA mmap_size;').fetchone()[0], 1024 * 1024)
+
+    def test_each_thread_gets_its_own_connection(self):
+        connections = []
+
+        def worker():
+            connections.append(self.sqlite_handler.connection)
+
+        threads = [threading.Thread(target=worker) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        connections.append(self.sqlite_handler.connection)
+        self.assertEqual(len({id(connection) for connection in connections}), 4)
+
+    def test_concurrent_readers_see_committed_writes(self):
+        self.sqlite_service.insert_entries_in_storage([(f'key{i}', f'value{i}') for i in range(50)])
+        results = []
+
+        def reader(offset):
+            results.append(self.sqlite_service.get_entries_from_storage([f'key{i}' for i in range(offset, 50)]))
+
+        threads = [threading.Thread(target=reader, args=(offset,)) for offset in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(len(result) for result in results), [50 - offset for offset in reversed(range(8))])
+
+    def test_connections_are_released_with_their_threads(self):
+        self.sqlite_service.insert_entry_in_storage('churn', 'value')
+        results = []
+
+        def reader():
+            results.append(self.sqlite_service.get_entry_from_storage('churn'))
+
+        for _ in range(200):
+            thread = threading.Thread(target=reader)
+            thread.start()
+            thread.join()
+        del thread
+        gc.collect()
+        self.assertEqual(results, ['value'] * 200)
+        self.assertEqual(self.sqlite_handler.connections, [self.sqlite_handler.connection])
+
+    def test_in_memory_database_shares_one_connection(self):
+        memory_handler = DatabaseFactory.get_database_handler()
+        memory_handler.connect()
+        self.addCleanup(memory_handler.close)
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(memory_handler.connection))
+        thread.start()
+        thread.join()
+        self.assertIs(seen[0], memory_handler.connection)
+
+
+if __name__ == '__main__':
+    unittest.main()
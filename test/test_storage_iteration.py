@@ -0,0 +1,86 @@
+import asyncio
+import unittest
+from unittest.mock import patch
+
+from custom_cache.cache import Cache
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+
+class TestStorageIteration(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+        cls.sqlite_service.insert_entries_in_storage([(f'page{index:02d}', f'value{index}') for index in range(25)]
+                                                     + [('pagf', 'after'), ('pag', 'before')])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def create_cache(self, eviction_policy=EvictionPolicy.LRU, capacity=10, **options):
+        return CacheFactory.create_cache(eviction_policy=eviction_policy, capacity=capacity,
+                                         db_service=self.sqlite_service, refresh_check=3, **options)
+
+    def test_iter_keys_pages_through_the_table_in_order(self):
+        with patch.object(self.sqlite_service, '_iter_pages', wraps=self.sqlite_service._iter_pages) as pages:
+            keys = list(self.sqlite_service.iter_keys(page_size=4))
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(keys), 27)
+        pages.assert_called_once_with('key', None, None, None, 4)
+
+    def test_prefix_and_range(self):
+        self.assertEqual(list(self.sqlite_service.iter_keys(prefix='page1', page_size=3)),
+                         [f'page{index}' for index in range(10, 20)])
+        self.assertEqual(list(self.sqlite_service.iter_items(prefix='page', start='page22', page_size=2)),
+                         [('page22', 'value22'), ('page23', 'value23'), ('page24', 'value24')])
+        self.assertEqual(list(self.sqlite_service.iter_keys(start='page24', stop='pagf')), ['page24'])
+        self.assertEqual(list(self.sqlite_service.iter_keys(prefix='missing')), [])
+        self.assertEqual(SqliteService._prefix_stop('ab'), 'ac')
+
+    def test_preload_fills_up_to_capacity_one_lock_per_page(self):
+        cache = self.create_cache()
+        cache.put('page00', 'newer')
+        with patch.object(Cache, '_preload_page', autospec=True, side_effect=Cache._preload_page) as preload_page:
+            self.assertEqual(cache.preload(prefix='page', page_size=4), 9)
+        self.assertEqual(preload_page.call_count, 3)
+        self.assertEqual(len(cache), 10)
+        self.assertEqual(cache.get('page00'), 'newer')
+        self.assertEqual(cache.stats()['evictions']['size'], 0)
+        self.assertEqual(cache.stats()['loads'], 0)
+
+    def test_preload_sharded_and_tiered(self):
+        sharded = self.create_cache(EvictionPolicy.TINY_LFU, capacity=8, shards=2)
+        self.assertEqual(sharded.preload(page_size=5), 8)
+        self.assertTrue(all(shard._is_full() for shard in sharded.shards))
+
+        tiered = self.create_cache(capacity=4, l2_capacity=10)
+        self.addCleanup(tiered.close)
+        tiered.put_many({'page03': 'value3', 'page04': 'value4', 'page05': 'value5',
+                         'page06': 'value6', 'page07': 'value7'})
+        self.assertEqual(len(tiered.l2), 1)
+        tiered.remove_many(['page04', 'page05', 'page06', 'page07'])
+        self.assertEqual(tiered.preload(prefix='page0'), 4)
+        self.assertEqual(sorted(tiered.l1.cache), ['page00', 'page01', 'page02', 'page03'])
+        self.assertEqual(len(tiered.l2), 0)
+
+    def test_async_preload(self):
+        async def preload():
+            async with CacheFactory.create_async_cache(EvictionPolicy.LFU, 30, self.sqlite_service,
+                                                        refresh_check=3) as cache:
+                return await cache.preload(page_size=10), len(cache.cache)
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        self.assertEqual(loop.run_until_complete(preload()), (27, 27))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,211 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.disk_tier import DiskTier
+from custom_cache.entry import now_ms
+from custom_cache.exceptions import StorageException
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+
+class TestTieredCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.l2_path = os.path.join(directory.name, 'l2.db')
+
+    def create_cache(self, eviction_policy=EvictionPolicy.LRU, capacity=2, l2_capacity=100, **options):
+        cache = CacheFactory.create_cache(eviction_policy=eviction_policy, capacity=capacity,
+                                          db_service=self.sqlite_service, refresh_check=3, l2_capacity=l2_capacity,
+                                          l2_path=self.l2_path, **options)
+        self.addCleanup(cache.close)
+        return cache
+
+    def take(self, cache, keys):
+        return {key: entry[0] for key, entry in cache.l2.take_many(keys).items()}
+
+    def test_evicted_keys_are_demoted_and_promoted_back(self):
+        cache = self.create_cache()
+        for index in range(3):
+            cache.put(f'tier{index}', f'value{index}')
+        self.assertEqual(len(cache.l2), 1)
+
+        with patch.object(self.sqlite_service, 'get_entry_from_storage') as mock_storage:
+            self.assertEqual(cache.get('tier0'), 'value0')
+            mock_storage.assert_not_called()
+        self.assertIn('tier0', cache.l1.cache)
+        self.assertEqual(self.take(cache, ['tier0', 'tier1']), {'tier1': 'value1'})
+        self.assertEqual(cache.stats()['l2']['hits'], 2)
+
+    def test_a_newer_write_is_never_shadowed(self):
+        cache = self.create_cache()
+        cache.put_many({'stale0': 'old', 'stale1': 'value1', 'stale2': 'value2'})
+        cache.put('stale0', 'new')
+        self.assertEqual(len(cache.l2), 1)
+        self.assertEqual(cache.get('stale0'), 'new')
+        cache.l1._refresh_cache()
+        self.assertEqual(cache.get('stale0'), 'new')
+
+    def test_remove_clears_both_tiers(self):
+        cache = self.create_cache()
+        for index in range(3):
+            cache.put(f'gone{index}', f'value{index}')
+        cache.remove('gone0')
+        self.assertEqual(len(cache.l2), 0)
+        self.assertEqual(cache.remove_many(['gone1', 'gone2', 'gone3']), ['gone1', 'gone2'])
+
+    def test_l2_keeps_its_own_capacity(self):
+        cache = self.create_cache(l2_capacity=2)
+        for index in range(6):
+            cache.put(f'bounded{index}', index)
+        self.assertEqual(self.take(cache, (f'bounded{index}' for index in range(6))),
+                         {'bounded2': 2, 'bounded3': 3})
+        self.assertEqual(cache.stats()['l2']['evictions'], 2)
+
+    def test_l2_keeps_its_own_ttl(self):
+        cache = self.create_cache(l2_ttl=0.05)
+        for index in range(3):
+            cache.put(f'expiring{index}', f'value{index}')
+        time.sleep(0.06)
+        with patch.object(self.sqlite_service, 'get_entry_from_storage', return_value='stored') as mock_storage:
+            self.assertEqual(cache.get('expiring0'), 'stored')
+            mock_storage.assert_called_once_with('expiring0')
+        self.assertEqual(cache.stats()['l2']['expirations'], 1)
+
+    def test_promoted_keys_keep_their_age(self):
+        cache = self.create_cache(capacity=1, ttl=0.2)
+        cache.put('bounce', 'old')
+        written_at = cache.l1.cache['bounce'].timestamp
+        self.sqlite_service.insert_entry_in_storage('bounce', 'new')
+        cache.put('bounced', 'value')
+        self.assertEqual(cache.get('bounce'), 'old')
+        self.assertEqual(cache.l1.cache['bounce'].timestamp, written_at)
+        cache.put('bounced', 'value')
+        time.sleep(0.25)
+        # past the L1's ttl the promotion is dropped and the store is read
+        self.assertEqual(cache.get('bounce'), 'new')
+
+    def test_keys_never_demoted_cost_no_query(self):
+        cache = self.create_cache()
+        statements = []
+        cache.l2.handler.connection.set_trace_callback(statements.append)
+        cache.put_many({'cold0': 'value0', 'cold1': 'value1'})
+        cache.put('cold0', 'value')
+        cache.remove('cold1')
+        self.assertEqual(cache.get('cold0'), 'value')
+        self.assertEqual(statements, [])
+
+    def test_batches_are_written_outside_the_l1_lock(self):
+        cache = self.create_cache(l2_capacity=4)
+        write_batch = cache.l2._write_batch
+        observed = []
+
+        def check_lock():
+            observed.append(cache.l1.lock.acquire(blocking=False))
+            if observed[-1]:
+                cache.l1.lock.release()
+            write_batch()
+
+        with patch.object(cache.l2, '_write_batch', side_effect=check_lock):
+            for index in range(8):
+                cache.put(f'batched{index}', f'value{index}')
+        self.assertTrue(observed)
+        self.assertTrue(all(observed))
+        self.assertEqual(self.take(cache, ['batched2', 'batched5']), {'batched2': 'value2', 'batched5': 'value5'})
+
+    def test_promoted_keys_keep_their_own_ttl(self):
+        cache = self.create_cache(capacity=1)
+        cache.put('own-ttl', 'old', ttl=0.2)
+        cache.put('own-ttl-other', 'value')
+        self.assertEqual(cache.get('own-ttl'), 'old')
+        self.assertEqual(cache.l1.key_ttls, {'own-ttl': 200})
+        cache.put('own-ttl-other', 'value')
+        self.sqlite_service.insert_entry_in_storage('own-ttl', 'fresh')
+        time.sleep(0.25)
+        self.assertEqual(cache.get('own-ttl'), 'fresh')
+        self.assertEqual(cache.l1.key_ttls, {})
+
+    def test_an_eviction_racing_a_write_does_not_demote_the_old_value(self):
+        cache = self.create_cache(capacity=1)
+        cache.put('raced', 'old')
+        put = cache.l1.put
+
+        def evict_then_put(key, value, ttl=None):
+            # another writer fills the L1 between the L2 discard and the L1 write
+            put('racer', 'value')
+            put(key, value, ttl)
+
+        with patch.object(cache.l1, 'put', side_effect=evict_then_put):
+            cache.put('raced', 'new')
+        self.assertEqual(self.take(cache, ['raced', 'racer']), {'racer': 'value'})
+
+    def test_a_failing_l2_falls_back_to_the_store(self):
+        cache = self.create_cache()
+        for index in range(3):
+            cache.put(f'failing{index}', f'value{index}')
+        with patch.object(cache.l2, 'take_many', side_effect=StorageException('disk full')):
+            self.assertEqual(cache.get('failing0'), 'value0')
+            self.assertEqual(cache.get_many(['failing0', 'failing2']), {'failing0': 'value0', 'failing2': 'value2'})
+
+    def test_l2_survives_a_restart(self):
+        cache = self.create_cache()
+        for index in range(3):
+            cache.put(f'restart{index}', f'value{index}')
+        cache.close()
+
+        restarted = self.create_cache()
+        self.assertEqual(restarted.get_many(['restart0']), {'restart0': 'value0'})
+        self.assertEqual(len(restarted.l2), 0)
+
+    def test_l2_is_emptied_after_an_unclean_close(self):
+        tier = DiskTier(10, self.l2_path)
+        tier.put_many([('unclean', 'value', now_ms(), None)])
+        tier.flush()
+        tier.handler.close()
+
+        reopened = DiskTier(10, self.l2_path)
+        self.addCleanup(reopened.close)
+        self.assertEqual(len(reopened), 0)
+
+    def test_get_many_reads_both_tiers_and_the_store(self):
+        self.sqlite_service.insert_entry_in_storage('many-stored', 'stored')
+        cache = self.create_cache(capacity=4)
+        cache.put_many({f'many{index}': f'value{index}' for index in range(5)})
+        self.assertEqual(cache.get_many(['many0', 'many4', 'many-stored']),
+                         {'many0': 'value0', 'many4': 'value4', 'many-stored': 'stored'})
+
+    def test_write_back_values_are_demoted_and_written(self):
+        cache = self.create_cache(write_policy=WritePolicy.WRITE_BACK)
+        for index in range(3):
+            cache.put(f'dirty-tier{index}', f'value{index}')
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('dirty-tier0'), 'value0')
+        self.assertEqual(len(cache.l2), 1)
+
+    def test_sharded_l1(self):
+        cache = self.create_cache(EvictionPolicy.TINY_LFU, capacity=8, shards=2)
+        items = {f'sharded-tier{index}': f'value{index}' for index in range(20)}
+        cache.put_many(items)
+        self.assertEqual(len(cache) + len(cache.l2), 20)
+        self.assertEqual(cache.get_many(items), items)
+
+
+if __name__ == '__main__':
+    unittest.main()
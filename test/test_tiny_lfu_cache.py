@@ -0,0 +1,75 @@
+import unittest
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.count_min_sketch import CountMinSketch
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+
+class TestCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def setUp(self):
+        self.tiny_lfu_cache = CacheFactory.create_cache(eviction_policy=EvictionPolicy.TINY_LFU, capacity=10,
+                                                        db_service=self.sqlite_service, ttl=12,
+                                                        write_policy=WritePolicy.WRITE_BACK, refresh_interval=3,
+                                                        refresh_check=3)
+
+    def test_one_hit_wonders_do_not_displace_hot_keys(self):
+        hot_keys = [f'hot{i}' for i in range(9)]
+        for _ in range(3):
+            for key in hot_keys:
+                self.tiny_lfu_cache.put(key, 'hot')
+        for i in range(50):
+            self.tiny_lfu_cache.put(f'once{i}', 'once')
+        self.assertEqual(len(self.tiny_lfu_cache), 10)
+        self.assertTrue(all(key in self.tiny_lfu_cache.cache for key in hot_keys))
+
+    def test_frequent_candidate_replaces_cold_victim(self):
+        for i in range(10):
+            self.tiny_lfu_cache.put(f'cold{i}', 'cold')
+        for _ in range(5):
+            self.tiny_lfu_cache.sketch.increment('popular')
+        self.tiny_lfu_cache.put('popular', 'value')
+        self.tiny_lfu_cache.put('next', 'value')
+        self.assertIn('popular', self.tiny_lfu_cache.cache)
+        self.assertEqual(len(self.tiny_lfu_cache), 10)
+
+    def test_rejected_dirty_candidate_is_written_back(self):
+        for _ in range(3):
+            for i in range(10):
+                self.tiny_lfu_cache.put(f'resident{i}', 'value')
+        self.tiny_lfu_cache.put('rejected1', 'dirty1')
+        self.tiny_lfu_cache.put('rejected2', 'dirty2')
+        self.assertNotIn('rejected1', self.tiny_lfu_cache.cache)
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('rejected1'), 'dirty1')
+
+    def test_sketch_never_underestimates_and_ages(self):
+        sketch = CountMinSketch(64)
+        for i in range(200):
+            for _ in range(i % 5):
+                sketch.increment(f'key{i}')
+        self.assertTrue(all(sketch.estimate(f'key{i}') >= i % 5 for i in range(200)))
+        self.assertLessEqual(sketch.estimate('never-seen-before'), 4)
+        before = sketch.estimate('key4')
+        sketch.reset()
+        self.assertEqual(sketch.estimate('key4'), before // 2)
+        for _ in range(100):
+            sketch.increment('key1')
+        self.assertEqual(sketch.estimate('key1'), CountMinSketch.MAX_COUNT)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.exceptions import InvalidValueException
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.storage_service import SqliteService
+from custom_cache.value_codecs import CompressingCodec, JsonCodec, MsgpackCodec, PickleCodec, RawCodec, msgpack
+
+DOCUMENT = {'id': 7, 'tags': ['cache', 'codec'] * 50, 'body': 'lorem ipsum ' * 200, 'ratio': 0.5, 'draft': None}
+
+
+class TestValueCodecs(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler, codec=CompressingCodec(JsonCodec(), threshold=256))
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def create_cache(self, **options):
+        return CacheFactory.create_cache(eviction_policy=EvictionPolicy.LRU, capacity=10,
+                                         db_service=self.sqlite_service, refresh_check=3, **options)
+
+    def test_codecs_round_trip(self):
+        codecs = [PickleCodec(), JsonCodec(), CompressingCodec(PickleCodec(), threshold=64)]
+        if msgpack is not None:
+            codecs.append(MsgpackCodec())
+        for codec in codecs:
+            with self.subTest(codec=type(codec).__name__):
+                self.assertEqual(codec.decode(memoryview(codec.encode(DOCUMENT))), DOCUMENT)
+        self.assertEqual(RawCodec().decode(memoryview(b'\x00raw')), b'\x00raw')
+        with self.assertRaises(InvalidValueException):
+            RawCodec().encode('text')
+
+    def test_only_large_values_are_compressed(self):
+        codec = CompressingCodec(JsonCodec(), threshold=256)
+        self.assertEqual(codec.encode('small')[:1], CompressingCodec.PLAIN)
+        encoded = codec.encode(DOCUMENT)
+        self.assertEqual(encoded[:1], CompressingCodec.ZLIB)
+        self.assertLess(len(encoded), len(JsonCodec().encode(DOCUMENT)) // 4)
+
+    def test_values_are_stored_as_blobs(self):
+        cache = self.create_cache()
+        cache.put('document', DOCUMENT)
+        stored_type, = self.sqlite_handler.cursor.execute(
+            "SELECT typeof(value) FROM cache_storage WHERE key = 'document';").fetchone()
+        self.assertEqual(stored_type, 'blob')
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('document'), DOCUMENT)
+
+        self.sqlite_service.insert_entries_in_storage([('many1', {'n': 1}), ('many2', [2])])
+        self.assertEqual(self.create_cache().get_many(['many1', 'many2', 'document']),
+                         {'many1': {'n': 1}, 'many2': [2], 'document': DOCUMENT})
+
+    def test_plain_text_rows_are_still_readable(self):
+        self.sqlite_handler.cursor.execute("INSERT INTO cache_storage (key, value) VALUES ('legacy', 'text');")
+        self.assertEqual(self.create_cache().get('legacy'), 'text')
+
+    def test_values_can_stay_compressed_in_memory(self):
+        cache = self.create_cache(value_codec=CompressingCodec(threshold=256), write_policy=WritePolicy.WRITE_BACK)
+        cache.put('compressed', DOCUMENT)
+        entry = cache.cache['compressed']
+        self.assertEqual(entry.data[:1], CompressingCodec.ZLIB)
+        self.assertEqual(cache.get('compressed'), DOCUMENT)
+        # every read decodes a fresh copy
+        cache.get('compressed')['id'] = 8
+        self.assertEqual(cache.get('compressed')['id'], 7)
+        cache.flush()
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('compressed'), DOCUMENT)
+
+    def test_encoded_values_are_weighed_as_held(self):
+        cache = self.create_cache(value_codec=CompressingCodec(threshold=256), max_weight=10_000,
+                                  weigher=lambda key, value: len(value))
+        cache.put('weighed', DOCUMENT)
+        self.assertEqual(cache.weight, len(cache.cache['weighed'].data))
+        self.assertLess(cache.weight, 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
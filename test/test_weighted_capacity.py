@@ -0,0 +1,70 @@
+import unittest
+
+from custom_cache.cache_factory import CacheFactory
+from custom_cache.database import DatabaseFactory
+from custom_cache.cache_enum import WritePolicy, EvictionPolicy
+from custom_cache.storage_service import SqliteService
+
+
+class TestCache(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # This runs once for all tests
+        cls.sqlite_handler = DatabaseFactory.get_database_handler()
+        cls.sqlite_handler.connect()
+        cls.sqlite_service = SqliteService(cls.sqlite_handler)
+        cls.sqlite_service.create_cache_storage_table()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.sqlite_handler.close()
+
+    def create_cache(self, eviction_policy, **options):
+        return CacheFactory.create_cache(eviction_policy=eviction_policy, capacity=None,
+                                         db_service=self.sqlite_service, ttl=12,
+                                         write_policy=WritePolicy.WRITE_BACK, refresh_interval=3,
+                                         refresh_check=3, max_weight=100,
+                                         weigher=lambda key, value: len(value), **options)
+
+    def test_lru_evicts_until_total_weight_fits(self):
+        cache = self.create_cache(EvictionPolicy.LRU)
+        cache.put('small1', 'x' * 30)
+        cache.put('small2', 'x' * 30)
+        cache.put('small3', 'x' * 30)
+        self.assertEqual(cache.weight, 90)
+        cache.put('large', 'x' * 60)
+        self.assertEqual(list(cache.cache), ['small3', 'large'])
+        self.assertEqual(cache.weight, 90)
+        # evicted dirty entries are written back
+        self.assertEqual(self.sqlite_service.get_entry_from_storage('small1'), 'x' * 30)
+
+    def test_lfu_tracks_weight_on_update_and_remove(self):
+        cache = self.create_cache(EvictionPolicy.LFU)
+        cache.put('key1', 'x' * 40)
+        cache.put('key1', 'x' * 10)
+        cache.put('key2', 'x' * 50)
+        self.assertEqual(cache.weight, 60)
+        cache.remove('key2')
+        self.assertEqual(cache.weight, 10)
+        # the new key is the least frequent, so it is the one that gives way
+        cache.put('key3', 'x' * 95)
+        self.assertEqual(list(cache.cache), ['key1'])
+        self.assertEqual(cache.weight, 10)
+
+    def test_oversized_value_is_not_retained(self):
+        cache = self.create_cache(EvictionPolicy.LRU)
+        cache.put('huge', 'x' * 150)
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.weight, 0)
+
+    def test_sharded_cache_splits_max_weight(self):
+        cache = self.create_cache(EvictionPolicy.LRU, shards=4)
+        self.assertEqual([shard.max_weight for shard in cache.shards], [25] * 4)
+        cache.put_many({f'key{i}': 'x' * 20 for i in range(20)})
+        self.assertLessEqual(cache.weight, 100)
+        self.assertEqual(cache.stats()['weight'], cache.weight)
+
+
+if __name__ == '__main__':
+    unittest.main()